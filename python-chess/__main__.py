@@ -0,0 +1,8 @@
+""" Lets the game be started with: python python-chess [--ansi] from the
+    folder above, the same as running chess.py.
+    """
+import sys
+
+import chess
+
+chess.play_chess(ansi="--ansi" in sys.argv)
@@ -1,907 +1,1177 @@
-import chess_config as config
-from gameboard import print_board
-import chess_pieces as pieces
-
-# TODO add "en passant is not available", "there is no piece there" (for
-#  diagonal pawn movements), and "you have already moved your king"/"you
-#  have already moved that rook" messages to the move_blocked responses,
-#  to give more context, also change pawns moving to diagonal spaces without
-#  pieces on them to read "that is an illegal move" rather than "that space
-#  is blocked"... as it is confusing with no piece on that space.... more a
-#  stylistic thing as "blocked" here simply means the piece would be
-#  capable of the move, there is just no piece there to take. This
-#  contrasts with trying to move a knight to an adjacent space, where the
-#  move is truly illegal
-
-# TODO General:
-#  After moving WP4 to D4 on the first move, WKG attacked_spaces does not
-#  update to include D2
-
-white_player = pieces.Player("white")
-black_player = pieces.Player("black")
-board = pieces.on_board
-turn_count = 0
-promoted_pieces = []
-w_attacked_spaces = config.white_attacked_spaces
-b_attacked_spaces = config.black_attacked_spaces
-
-
-def pieces_remaining():
-    """ Returns a list of display attributes (labels) from all of the pieces
-        currently left on the board. This will be used to check if a
-        player's piece_choice still remains, or if it has been taken.
-        """
-    remaining_pieces_objects = list(board.values())
-    remaining_pieces = {"displays": [], "objects": []}
-    for piece in remaining_pieces_objects:
-        if piece.piece_type is not None:
-            remaining_pieces["displays"].append(piece.display)
-            remaining_pieces["objects"].append(piece)
-    return remaining_pieces
-
-
-def choose_piece(player, remaining_pieces):
-    """ Asks a player for which piece they would like to move. This can
-        be either the full piece label (ex. "WS1", "BKG") or a player
-        can simply enter the piece label without their color ID
-        (ex. "S1", "KG").
-        """
-    while True:
-        piece_choice = input("What piece would you like to move?: ").strip() \
-            .upper()
-        if len(piece_choice) < 3:
-            piece_choice = player.color_id + piece_choice
-        if piece_choice not in pieces.game_pieces:
-            print("That piece does not exist.")
-            continue
-        elif player.color_id not in piece_choice:
-            print("That is not your piece.")
-            continue
-        elif piece_choice not in remaining_pieces["displays"]:
-            print("That piece has been taken.")
-            continue
-        else:
-            break
-    return piece_choice
-
-
-def find_current_piece(piece_choice):
-    """ Takes in the string piece_choice and returns the associated
-        Piece object. This can then be used to check attributes of that
-        object.
-        """
-    remaining_pieces_objects = list(board.values())
-    piece_choice_obj = next(obj for obj in remaining_pieces_objects
-                            if obj.display == piece_choice)
-    return piece_choice_obj
-
-
-def where_to_move(player, piece_choice_obj):
-    """ Asks the player where they would like to move their chosen piece
-        to and returns this as the variable move_to, a string.
-
-        The player enters where they would like to move to using
-        the plain text space ID, ie. "A1", "C8", "H4". There is no need
-        for proper chess notation as this game is meant to be as easy as
-        possible for anybody to play. This is why there are separate
-        inputs for piece and destination.
-        """
-    legal_moves = piece_choice_obj.legal_move()
-    while True:
-        move_to = input(f"Where would you like to move "
-                        f"{piece_choice_obj.display} to? (X to cancel):"
-                        ).strip().upper()
-        if move_to == "X":
-            break
-        elif move_to not in board.keys():
-            print("That space does not exist.")
-            continue
-        elif move_to == piece_choice_obj.current_space:
-            print(f"{piece_choice_obj.display} is already on {move_to}.")
-            continue
-        elif move_to not in legal_moves:
-            print("That is an illegal move.")
-            continue
-        elif move_blocked(player, piece_choice_obj, move_to):
-            print("That space is blocked.")
-            continue
-        else:
-            break
-    return move_to
-
-
-def confirm_move(piece_choice, move_to):
-    """ Asks the player to confirm their chosen piece and location to
-        move the piece to. It returns either "y" or "n".
-        """
-    while True:
-        confirmation = input(f"You would like to move {piece_choice} to "
-                             f"{move_to}, is that correct? (y/n): """
-                             ).strip().lower()
-        if confirmation not in ["y", "n"]:
-            print('Invalid response. Please respond with "y" for yes or "n" '
-                  'for no.')
-            continue
-        else:
-            break
-    return confirmation
-
-
-def pawn_move(piece_choice_obj):
-    """ Modifies necessary attributes of Pawn object after a move."""
-    # turn_count saved to check for en passant on enemy's next turn
-    piece_choice_obj.last_turn_moved = turn_count
-    # Pawn moved 2 spaces on initial move, used to check for en passant
-    if not piece_choice_obj.has_moved \
-            and piece_choice_obj.current_row_index == \
-            piece_choice_obj.start_row_index \
-            + (2 * piece_choice_obj.row_vector):
-        piece_choice_obj.two_space_move = True
-    if not piece_choice_obj.has_moved:
-        piece_choice_obj.has_moved = True
-
-
-def special_move_check(player, piece_choice_obj, move_to, space_vector):
-    """ Checks to see if a special move (en passant or castling) has
-        occurred. A dictionary is returned containing the result, as
-        well as the necessary information for the perform_move function.
-        """
-    move_to_col_index = config.col.index(move_to[0])
-    # If en passant has occurred
-    if piece_choice_obj.piece_type == "pawn" \
-            and move_to[0] != piece_choice_obj.current_space[0] \
-            and board[move_to].piece_type is None:
-        special_move_executed = True
-        special_move_type = "en_passant"
-        special_space_1 = en_passant(piece_choice_obj)["enemy_space"]
-        special_action_1 = pieces.OpenSpace()
-        special_space_2 = None
-        special_action_2 = None
-    # If castling has occurred
-    elif piece_choice_obj.piece_type == "king" \
-            and (move_to_col_index == 2
-                 or move_to_col_index == 6) \
-            and not piece_choice_obj.has_moved:
-        special_move_executed = True
-        special_move_type = "castling"
-        castle_result = castle(player, piece_choice_obj, move_to, space_vector)
-        special_space_1 = castle_result["castle_space"]
-        special_action_1 = castle_result["castle_rook"]
-        special_space_2 = castle_result["castle_rook_start"]
-        special_action_2 = pieces.OpenSpace()
-    else:
-        special_move_executed = False
-        special_move_type = None
-        special_space_1 = None
-        special_space_2 = None
-        special_action_1 = None
-        special_action_2 = None
-    special_move_result = {"executed": special_move_executed,
-                           "type": special_move_type,
-                           "space_1": special_space_1,
-                           "space_2": special_space_2,
-                           "action_1": special_action_1,
-                           "action_2": special_action_2
-                           }
-    return special_move_result
-
-
-def space_shift(piece_choice_obj, move_to):
-    """ Basic movement of pieces on board, and modifying piece
-        attributes accordingly. "Basic" in that it does not perform
-        special moves including en passant and castling.
-        """
-    (board[move_to], board[piece_choice_obj.current_space]) = \
-        (piece_choice_obj, pieces.OpenSpace())
-    piece_choice_obj.current_space = move_to
-    (piece_choice_obj.current_col_index,
-     piece_choice_obj.current_row_index) = \
-        (config.col.index(piece_choice_obj.current_space[0]),
-         config.row.index(piece_choice_obj.current_space[1]))
-
-
-def perform_move(player, piece_choice_obj, move_to, space_vector):
-    """ Moves Piece object to move_to space and performs any special
-        move operations such as also moving the rook when castling, as
-        well as taking the enemy pawn in en passant after the friendly
-        pawn has moved.
-        """
-    special_move = special_move_check(player, piece_choice_obj,
-                                      move_to, space_vector)
-    if special_move["executed"] and special_move["type"] == "en_passant":
-        space_shift(piece_choice_obj, move_to)
-        board[special_move["space_1"]] = special_move["action_1"]
-    elif special_move["executed"] and special_move["type"] == "castling":
-        space_shift(piece_choice_obj, move_to)
-        board[special_move["space_1"]] = special_move["action_1"]
-        board[special_move["space_2"]] = special_move["action_2"]
-    else:
-        space_shift(piece_choice_obj, move_to)
-    global turn_count
-    turn_count += 1
-    if piece_choice_obj.piece_type == "pawn":
-        pawn_move(piece_choice_obj)
-        if piece_choice_obj.current_row_index in (0, 7):
-            promote_pawn(piece_choice_obj)
-    elif piece_choice_obj.piece_type in ("rook", "king") \
-            and not piece_choice_obj.has_moved:
-        piece_choice_obj.has_moved = True
-
-
-def player_move(player):
-    """ Gathers player input player input on what they would like to
-        move where, then executes the move.
-        """
-    print(f"Your turn {player}.")
-    pieces_left = pieces_remaining()
-    while True:
-        piece_choice = choose_piece(player, pieces_left)
-        piece_choice_obj = find_current_piece(piece_choice)
-        move_to = where_to_move(player, piece_choice_obj)
-        if move_to == "X":
-            continue
-        confirmation = confirm_move(piece_choice, move_to)
-        if confirmation == "n":
-            continue
-        else:
-            break
-    space_vector = create_space_vector(piece_choice_obj, move_to)
-    perform_move(player, piece_choice_obj, move_to, space_vector)
-
-
-def find_space_vector_direction(piece_choice_obj, move_to):
-    """ A space_vector (ie. an ordered list of spaces within a piece's
-        potential movement) is needed to run move_blocked(). The vector
-        will be iterated over, with move_blocked() checking if there are
-        pieces at any of the spaces. In order to create the space_vector
-        we first use find_vector_direction() to determine the directions
-        of row and column movement from current_space to move_to,
-        represented as 1 and -1. These will then be used in
-        create_space_vector() to iterate over spaces of the board,
-        appending the results to the space_vector.
-        """
-    move_to_col = move_to[0]
-    move_to_row = move_to[1]
-    current_col_index = piece_choice_obj.current_col_index
-    current_row_index = piece_choice_obj.current_row_index
-    move_to_col_index = config.col.index(move_to_col)
-    move_to_row_index = config.row.index(move_to_row)
-
-    # move_to is directly above current space.
-    if move_to_col_index == current_col_index \
-            and move_to_row_index < current_row_index:
-        space_col_direction = 0
-        space_row_direction = -1
-    # move_to is to the right and up from current space.
-    elif move_to_col_index > current_col_index \
-            and move_to_row_index < current_row_index:
-        space_col_direction = 1
-        space_row_direction = -1
-    # move_to is directly to the right of current space.
-    elif move_to_col_index > current_col_index \
-            and move_to_row_index == current_row_index:
-        space_col_direction = 1
-        space_row_direction = 0
-    # move_to is to the right and down from current space.
-    elif move_to_col_index > current_col_index \
-            and move_to_row_index > current_row_index:
-        space_col_direction = 1
-        space_row_direction = 1
-    # move_to is directly below current space.
-    elif move_to_col_index == current_col_index \
-            and move_to_row_index > current_row_index:
-        space_col_direction = 0
-        space_row_direction = 1
-    # move_to is to the left and down from current space.
-    elif move_to_col_index < current_col_index \
-            and move_to_row_index > current_row_index:
-        space_col_direction = -1
-        space_row_direction = 1
-    # move_to is directly to the left of current space.
-    elif move_to_col_index < current_col_index \
-            and move_to_row_index == current_row_index:
-        space_col_direction = -1
-        space_row_direction = 0
-    # move_to is to the left and up from current space.
-    #
-    # if statement would be:
-    # elif move_to_col_index < current_col_index \
-    #         and move_to_row_index < current_row_index:
-    else:
-        space_col_direction = -1
-        space_row_direction = -1
-    space_vector_direction = {"col_dir": space_col_direction,
-                              "row_dir": space_row_direction}
-    return space_vector_direction
-
-
-def create_space_vector(piece_choice_obj, move_to):
-    """ A space_vector (ie. an ordered list of Piece objects at the
-        spaces within a piece's potential movement) is needed to run
-        move_blocked(). The vector will be iterated over, with
-        move_blocked() checking if there are pieces at any of the
-        spaces. In order to create the space_vector we first use
-        find_vector_direction() to determine the directions of row and
-        column movement from current_space to move_to, represented as 1
-        and -1. These will then be used in create_space_vector() to
-        iterate over spaces of the board, appending the results to the
-        space_vector.
-        """
-    space_vector_direction = find_space_vector_direction(piece_choice_obj,
-                                                         move_to)
-    spaces = []
-    move_to_col = move_to[0]
-    move_to_row = move_to[1]
-    current_col_index = piece_choice_obj.current_col_index
-    current_row_index = piece_choice_obj.current_row_index
-    move_to_col_index = config.col.index(move_to_col)
-    move_to_row_index = config.row.index(move_to_row)
-    # Initialize space_col_index and space_row index at current space.
-    space_col_index = current_col_index
-    space_row_index = current_row_index
-    if piece_choice_obj.piece_type == "knight":
-        space_vector = [board[move_to]]
-    else:
-        # As long as the examined space to add to the space vector is not
-        # the move_to space, run the loop. It will iterate space_col_index
-        # and space_row_index by one space in direction of movement each
-        # time. Then add that space to the spaces list. Once the loop
-        # reaches the move_to space, it adds it to the list. The next round
-        # of the loop has the examined space equal to the move_to space, so
-        # the loop breaks.
-        while space_col_index != move_to_col_index \
-                or space_row_index != move_to_row_index:
-            space_col_index += space_vector_direction["col_dir"]
-            space_row_index += space_vector_direction["row_dir"]
-            space = config.col[space_col_index] + config.row[space_row_index]
-            spaces.append(space)
-        space_vector = [None] * len(spaces)
-        for space in spaces:
-            space_vector[spaces.index(space)] = board[space]
-    return space_vector
-
-
-def all_open(space_vector):
-    """ Returns True if space_vector contains only open spaces."""
-    return all(space.piece_type is None for space in space_vector)
-
-
-def en_passant(piece_choice_obj):
-    """ Checks to see if an enemy pawn can be taken via en passant. A
-        dictionary is returned containing the result, as well as the
-        necessary information for the perform_move function).
-        """
-    en_passant_friendly_space = []
-    en_passant_enemy_space = []
-    en_passant_enemy_object = []
-    current_col_index = piece_choice_obj.current_col_index
-    for col_vector in (-1, 1):
-        if 0 <= current_col_index + col_vector <= 7:
-            row_adjacent_obj = board[
-                config.col[piece_choice_obj.current_col_index + col_vector]
-                + config.row[piece_choice_obj.current_row_index]]
-        else:
-            continue
-        # En passant conditions:
-        #
-        # 1) If friendly pawn is in its 5th row AND
-        # 2) The adjacent space in the same row has a pawn on it AND
-        # 3) That pawn is an enemy pawn AND
-        # 4) The enemy piece moved two spaces on its first move AND
-        # 5) The turn being played is the immediate turn following the
-        # two-space move
-        # THEN the enemy pawn can be taken by the friendly pawn moving
-        # into the space the enemy pawn moved through (ie. the 6th row
-        # space in the column of the enemy pawn. The for loop checks
-        # both the left and right adjacent spaces.
-        if piece_choice_obj.current_row_index == \
-                piece_choice_obj.start_row_index + \
-                (3 * piece_choice_obj.row_vector) \
-                and row_adjacent_obj.piece_type == "pawn" \
-                and piece_choice_obj.color != row_adjacent_obj.color \
-                and row_adjacent_obj.two_space_move \
-                and row_adjacent_obj.last_turn_moved == turn_count:
-            en_passant_friendly_space.append(
-                config.col[current_col_index + col_vector]
-                + config.row[piece_choice_obj.current_row_index +
-                             piece_choice_obj.row_vector])
-            en_passant_enemy_space.append(row_adjacent_obj.current_space)
-            en_passant_enemy_object.append(row_adjacent_obj)
-    if len(en_passant_friendly_space) > 0:
-        en_passant_available = True
-    else:
-        en_passant_available = False
-        en_passant_friendly_space = [None]
-        en_passant_enemy_space = [None]
-        en_passant_enemy_object = [None]
-    en_passant_result = {"available": en_passant_available,
-                         "friendly_space": en_passant_friendly_space[0],
-                         "enemy_space": en_passant_enemy_space[0],
-                         "enemy_object": en_passant_enemy_object[0]
-                         }
-    return en_passant_result
-
-
-# TODO BP5 can move to D6 right off the bat... the confirmation is asked for
-#  and it is not being blocked. WP4 is being blocked from C3...maybe
-#  correctly, but why is it different than Bp5 to D6?
-def pawn_blocked(player, piece_choice_obj, move_to, space_vector):
-    """ Determines if any pieces are in the way preventing the pawn
-        from moving, taking into account if the piece is an enemy piece
-        and can be taken. pawn_blocked is broken out to maintain flatter
-        code due to the pawn having special rules involving diagonal
-        and en passant capture.
-        """
-    move_to_col_index = config.col.index(move_to[0])
-    en_passant_check = en_passant(piece_choice_obj)
-    if all_open(space_vector) \
-            and move_to_col_index == piece_choice_obj.current_col_index:
-        return False
-    # Diagonal capture conditions:
-    # 1) All pieces before the move_to are open
-    # 2) There is a piece on move_to
-    # 3) The piece on move_to is an enemy piece
-    # 4) move_to is not in the same column as the pawn (we want
-    # to restrict blocking to only affecting spaces immediately
-    # in front of a pawn).
-    # NOTE: This elif should also account for if the diagonal space
-    # is blank, and the pawn is thus blocked from moving. The
-    # condition of "and space_vector[-1] != open_space" would be
-    # violated if the space was an open_space, thus the function
-    # would move to the else statement, and return True (ie. the
-    # pawn is blocked).
-    # TODO **TEST** check if I have to add condition for if the diagonal
-    #  space is blank... currently it seems that the below elif should cover
-    #  that. The condition of "and space_vector[-1].piece_type is not None
-    #  would be violated if the space was an open space, thus the function
-    #  would move to the else statement, and return True (ie. it is
-    #  blocked)
-    # TODO check if below commented code must be added back as a check in
-    #  the below elif... I don't believe it needs to be as for
-    #  non-same-column moves (ie. diagonal capture) there is only one space
-    #  in the space vector
-    # all_open(space_vector[:-1]) and \
-    elif space_vector[-1].piece_type is not None \
-            and space_vector[-1].color != player.color \
-            and move_to_col_index != piece_choice_obj.current_col_index:
-        return False
-    # Added 'and move_to == en_passant_check["friendly_space"]' because
-    # of the following scenario:
-    #
-    # BP5 is at E6, WP5 moves to E5, BP4 does a two-space move to D5,
-    # enabling en passant if WP5 moves this turn. WP5 decides instead to
-    # move to E6. By the rules, this should be blocked. However, it is
-    # allowed (See below).
-    #
-    # Only using en_passant_check["available"] causes pawn_blocked() to
-    # return False, because en passant can be performed on BP4. Since
-    # the pawn is considered not blocked, and move_to is set to E6, WP5
-    # is then able to take forward, replacing BP5 on E6. Pawns can't
-    # take forward, hence we check to make sure that move_to is set to
-    # the en passant friendly space (ie. the player intends to actually
-    # perform en passant) before we consider the move not blocked.
-    elif en_passant_check["available"] \
-            and move_to == en_passant_check["friendly_space"]:
-        return False
-    else:
-        return True
-
-
-def knight_blocked(player, space_vector):
-    """ Determines if a knight's move is blocked, taking into account
-        they can jump over other pieces.
-        """
-    if space_vector[-1].piece_type is not None and space_vector[-1].color \
-            == player.color:
-        return True
-    else:
-        return False
-
-
-# TODO update this function once king in check/sattacked spaces is finished
-#  so that king cannot castle through check
-def castle(player, piece_choice_obj, move_to, space_vector):
-    """ Checks to see if castling is available on the move_to side of
-        the board. A dictionary is returned containing the result, as
-        well as the necessary information for the perform_move function.
-        """
-    # TODO add conditions to prevent king from castling if it is in check or
-    #  would pass through check (can't get out of check or pass through
-    #  check when castling), as well as condition blocking castling if there
-    #  are pieces between the king and the castle... finally check that
-    #  king/rook has_moved functions work
-    #
-    # TODO: make sure that the castling function operates off of a space
-    #  vector... if castling
-    #  IS available, may just hard-code the space vector values since this
-    #  function is checking if a space vector has any
-    #  attacking spaces. If the king "teleports" and never "space vector
-    #  checks" the spaces in between, it would only theoretically prevent
-    #  moving into check, while missing going through check to get to move_to
-    #
-    # TODO: for moving through check ---
-    #  run a space vector out for the move... if space vector contains
-    #  element from team attacked spaces, king will move through check
-    move_to_col_index = config.col.index(move_to[0])
-    # Queenside castling
-    if piece_choice_obj.current_space == piece_choice_obj.start_space \
-            and move_to_col_index in (2, 3):
-        # When queenside castling, add position at column B in
-        # respective row to space_vector before checking if spaces are
-        # open (due to rook longer distance between king and rook).
-        space_vector.append(
-            board[config.col[1] +
-                  config.row[piece_choice_obj.current_row_index]]
-        )
-        castle_rook = pieces.starting_rooks[player.color]["queenside"]
-        castle_rook_start = castle_rook.start_space
-        castle_space = config.col[3] + \
-            config.row[piece_choice_obj.current_row_index]
-    # Kingside castling
-    elif piece_choice_obj.current_space == piece_choice_obj.start_space \
-            and move_to_col_index in (5, 6):
-        castle_rook = pieces.starting_rooks[player.color]["kingside"]
-        castle_rook_start = castle_rook.start_space
-        castle_space = config.col[5] + \
-            config.row[piece_choice_obj.current_row_index]
-    else:
-        castle_rook = None
-        castle_rook_start = None
-        castle_space = None
-    if castle_rook is None:
-        castle_available = False
-    elif all_open(space_vector) and not piece_choice_obj.has_moved \
-            and not castle_rook.has_moved:
-        castle_available = True
-    else:
-        castle_available = False
-    castle_result = {"available": castle_available,
-                     "castle_rook": castle_rook,
-                     "castle_rook_start": castle_rook_start,
-                     "castle_space": castle_space
-                     }
-    return castle_result
-
-
-# TODO test king_blocked() (may need further development to finish)
-def king_blocked(player, piece_choice_obj, move_to, space_vector):
-    """ Determines if any pieces are in the way preventing the king
-        from moving, taking into account if either the king or a rook
-        has moved when trying to castle, and if the king is in check or
-        not.
-        """
-    can_castle = castle(player, piece_choice_obj, move_to,
-                        space_vector)["available"]
-    if will_move_into_check(player, move_to):
-        return True
-    elif can_castle:
-        return False
-    elif all_open(space_vector):
-        return False
-    # TODO Check over following code... copied from else statement of
-    #  move_blocked()
-    elif all_open(space_vector[:-1]) \
-            and space_vector[-1].piece_type is not None \
-            and space_vector[-1].color != player.color:
-        return False
-    else:  # When friendly piece is at move_to
-        return True
-
-
-def move_blocked(player, piece_choice_obj, move_to):
-    """ Determines if any pieces are in the way preventing the chosen
-        piece from moving, taking into account jumping rules for the
-        knight as well as if the piece is an enemy piece and can be
-        taken.
-        """
-    # Uses functions to create a space_vector, ie. a list populated in
-    # order with the Piece objects located at spaces originating from
-    # the current space and out to the move_to space. Given that this
-    # function works off the argument move_to, this vector originates
-    # from the current position of the piece and fires out to the
-    # move_to position. Keep in mind we have already checked that this
-    # move is theoretically within the legal movement pattern of the
-    # piece using legal_move(move_to) func. Thus, we only need to check
-    # the chosen movement vector rather than each of the possible ones
-    # individually.
-    #
-    # To check if a space is blocked, we simply need to check the
-    # following scenarios:
-    # 1) Is the entire vector empty? If yes, the piece is free to move
-    #  to the final position of the vector. ie. Not blocked.
-    # 2) Is the final position occupied by an enemy piece? If yes, the
-    #  piece can move and take it. ie. Not blocked.
-    # 3) Is the final position occupied by a friendly piece? If yes,
-    #  piece is blocked.
-    # 4) Is there a piece along the path? ie. A position other than
-    #   the final position. If yes, piece is blocked.
-    space_vector = create_space_vector(piece_choice_obj, move_to)
-    # Different move rules since pawns can't take forward
-    if piece_choice_obj.piece_type == "pawn":
-        return pawn_blocked(player, piece_choice_obj, move_to, space_vector)
-    # Different move rules since knights can jump
-    elif piece_choice_obj.piece_type == "knight":
-        return knight_blocked(player, space_vector)
-    # Different move rules since kings can castle
-    elif piece_choice_obj.piece_type == "king":
-        return king_blocked(player, piece_choice_obj, move_to, space_vector)
-    # All other pieces can move if their path is open, or if an enemy
-    # piece is at the end of their path.
-    else:
-        if all_open(space_vector):
-            return False
-        elif all_open(space_vector[:-1]) \
-                and space_vector[-1].piece_type is not None \
-                and space_vector[-1].color != player.color:
-            return False
-        else:
-            return True
-# TODO Add reasons to blocked function... ie if a king is blocked because a
-#  friendly piece is there, or if it is because it would move into check...
-#  if a pawn can't move two spaces forward, or if a pawn can't move
-#  diagonally without taking, etc.... make these into a list, ie. return the
-#  False/True value as well as "reason":... similar to how castle() returns
-#  are done with multiple variables store in one list that is returned
-
-
-def promote_pawn(piece_choice_obj):
-    """ Packages all promotion functions into one."""
-    promote_to = promote_to_what(piece_choice_obj)
-    next_num_id = find_next_num_id(promote_to)
-    promote_piece(piece_choice_obj, promote_to, next_num_id)
-
-
-def promote_to_what(piece_choice_obj):
-    """ Asks the player what piece they would like to promote their
-        pawn to, then calls the associated promotion function."""
-    while True:
-        promote_to = input(f"What would you like to promote"
-                           f" {piece_choice_obj} to?: (Q/N/R/S)")\
-            .strip().upper()
-        if promote_to not in ("Q", "N", "R", "S"):
-            print("That is not a legal promotion.")
-            continue
-        else:
-            break
-    return promote_to
-
-
-def find_next_num_id(promote_to):
-    """ Determines the next num_id attribute for the desired
-        promotion."""
-    initial_qnrs = list(filter(lambda piece:
-                               piece.unit in ("Q", "N", "R", "S"),
-                               pieces.starting_pieces.values()))
-    global promoted_pieces
-    similar_pieces = list(filter(lambda piece: piece.unit == promote_to,
-                                 initial_qnrs + promoted_pieces))
-    max_num_id = max(map(lambda piece: piece.num_id, similar_pieces))
-    next_num_id = max_num_id + 1
-    return next_num_id
-
-
-def promote_piece(piece_choice_obj, promote_to, next_num_id):
-    """ Performs requested promotion, replacing the pawn with the
-        desired piece object."""
-    if promote_to == "Q":
-        promoted_piece = pieces.Queen(piece_choice_obj.color, next_num_id,
-                                      piece_choice_obj.current_space,
-                                      piece_choice_obj.current_space)
-    elif promote_to == "N":
-        promoted_piece = pieces.Knight(piece_choice_obj.color, next_num_id,
-                                       piece_choice_obj.current_space,
-                                       piece_choice_obj.current_space)
-    elif promote_to == "R":
-        promoted_piece = pieces.Rook(piece_choice_obj.color, next_num_id,
-                                     piece_choice_obj.current_space,
-                                     piece_choice_obj.current_space)
-    else:
-        promoted_piece = pieces.Bishop(piece_choice_obj.color, next_num_id,
-                                       piece_choice_obj.current_space,
-                                       piece_choice_obj.current_space)
-    (promoted_piece.current_col_index, promoted_piece.current_row_index) = \
-        (config.col.index(piece_choice_obj.current_space[0]),
-         config.row.index(piece_choice_obj.current_space[1]))
-    global promoted_pieces  # TODO is "global" necessary?
-    piece_choice_obj.promoted = True
-    promoted_pieces.append(promoted_piece)
-    board[piece_choice_obj.current_space] = promoted_piece
-    pieces.game_pieces.append(promoted_piece.display)
-
-
-# TODO: Finish this function. Will need to modify turn_count and turn_count
-#  of pawns as well to make sure that en passant rules still come into effect
-#  properly, then reverse perform_move's actions
-#   https://www.quora.com/How-would-you-make-an-undo-function-in-Python
-def undo_last_move():
-    pass
-
-
-def redo_last_move():
-    pass
-
-
-# TODO pawns begin with diagonal attacks... but when WP4 moves to D3,
-#  the attacks on D3 don't go away... fix this... currently pawn function
-#  does not work because of this
-def find_attacked_spaces(piece):
-    """ Determines the spaces attacked by an individual piece (ie. which
-        moves a piece can make to take an enemy piece)."""
-    legal_moves = piece.legal_move()
-    if piece.color == "white":
-        player = white_player
-    else:
-        player = black_player
-    # Most pieces can take an enemy piece using any legal move. Only
-    # exception is for pawns, since they cannot take forward, so we must
-    # isolate only the diagonal spaces as attacked_spaces. We do this by
-    # first filtering for diagonal_spaces, then filtering again for any
-    # allowed moves remaining.
-    if piece.piece_type == "pawn":
-        diagonal_spaces = list(filter(
-            lambda space: space[0] != piece.current_space[0], legal_moves))
-        attacked_spaces = list(filter(
-            # Filtering for open spaces and spaces occupied by an enemy
-            # piece, ie. the spaces a pawn is truly attacking
-            lambda space: board[space].piece_type is None or (board[
-                space].piece_type is not None and board[space].color !=
-                player.color), diagonal_spaces))
-    else:
-        attacked_spaces = list(filter(lambda space: not move_blocked(
-            player, piece, space), legal_moves))
-    return attacked_spaces
-
-
-def update_attacked_spaces():
-    """ Determines the spaces attacked by all pieces on the board,
-        updating each color's attacked spaces list accordingly. These
-        are then compared to a king's position/moves to see if a king
-        has been placed into check, or is about to move into/through
-        check."""
-    remaining_pieces = pieces_remaining()
-    for piece in remaining_pieces["objects"]:
-        attacked_spaces = find_attacked_spaces(piece)
-        if piece.color == "white":
-            w_attacked_spaces.update({piece.display: attacked_spaces})
-        else:
-            b_attacked_spaces.update({piece.display: attacked_spaces})
-# TODO add method to switch/update to new piece's attacked positions after
-#  promotion of a pawn... ie. switch from diagonal single space attack with
-#  pawn to queen attack, etc. Is this covered simply by
-#  update_attacked_spaces() running after a move is made?
-
-# TODO finish this
-# def is_in_check(player):
-#     """ Determines if the King is in check."""
-#     for all pieces (of one color) on board:
-#         find attacked spaces
-#         team_attacked_spaces.append(find attacked spaces) # update instead?
-#         # for those pieces which already have a dictionary entry
-#     """ For finding if a king is in check, 1st continually find all legal
-#         moves (attacked spaces) of each piece. Add each of those to an entry
-#         in a dictionary. Must recheck all pieces each turn, since movement
-#         of one can blockeither enemy or friendly pieces. If a piece is
-#         taken, then remove its entry from the dictionary, i.e. Re opening
-#         those spaces to the king. Continue to update the spaces, And when
-#         the king is selected then simply perform a check Similar to legal
-#         move or move blocked from the database dictionary of spaces that
-#         are potentially covered by those pieces. Make sure special
-#         conditions are accounted for such as pawns only taking diagonally.
-#         To check if king is in check after opposing piece moves, simply run
-#         the is_in_check function and print a message. To check if king will
-#         be moving into check on his turn, add the exception to the
-#         where_to_move function"""
-#     pass
-# TODO somehow force this or an associated function to check if a move made
-#  does not eliminate the check condition... ie. is_in_check is still True
-#  after a move_to choice... then prevent that move. This may need to be
-#  done within move_blocked
-
-
-def will_move_into_check(player, move_to):
-    if player.color == "white":
-        enemy_attacked_spaces = b_attacked_spaces
-    else:
-        enemy_attacked_spaces = w_attacked_spaces
-    if move_to in enemy_attacked_spaces:
-        return True
-    else:
-        return False
-
-    #TODO this function isn't preventing king from moving into check... make
-    # it soe that it does
-
-
-def is_victory(player):
-    pass
-
-
-def is_draw():
-    # Check the legal moves function for the king, then see if the king is
-    # blocked because of it being in check or passing through check at all
-    # spaces.. ie. move_blocked = True for each element of legal_moves,
-    # then the king has been checkmated
-    #
-    # https://www.thesprucecrafts.com/types-of-draws-in-chess-611536
-    pass
-
-
-# TODO finish this function once the actual robots work... likely this should
-#  be a separate module
-def reset_robots():
-    pass
-
-
-def save_game():
-    # Export board positions, pieces, current player move, all piece states,
-    # attacked spaces, etc. and any other data to a text file, later to be
-    # imported
-    pass
-
-
-def ask_to_load_game():
-    # Ask player to input if they want to load a game or start a new one
-    #
-    # Add to play_chess()
-    pass
-
-
-def load_game():
-    # Load in exported text file so the game can update to the previous saved
-    # state
-    pass
-
-
-# TODO update this after figuring out how to confirm if a king is in check
-#  or not... ie. update is_in_check func, etc.
-def play_chess():
-    # TODO **TEST** include function to clear piece lists and then re-create
-    #  all pieces beforehand? ie. reset the pieces so that all of the piece
-    #  lists are not tacking on extra pieces beyond the starting pieces between
-    #  sessions. This may not be an issue if the computer turns on and off and
-    #  you are playing on the screen, however maybe it is an issue if you
-    #  simple start a new game when the actual robots are involved? This may
-    #  not be a problem, as re-running the program would like clear
-    #  everything. This will need to be done anyway once a game is
-    #  completed.
-    while True:
-        print_board(config.height, config.width, config.board_color,
-                    config.board_pos_id, board)
-        update_attacked_spaces()
-        player_move(white_player)
-        print_board(config.height, config.width, config.board_color,
-                    config.board_pos_id, board)
-        update_attacked_spaces()
-        # if is_in_check(black_player):
-        #     print("Check, black.")
-        # elif is_victory(white_player):
-        #     print("Checkmate black. White wins! Congratulations!")
-        #     break
-        # elif is_draw():
-        #     print("It's a draw!")
-        #     break
-        player_move(black_player)
-        # if is_in_check(white_player):
-        #     print_board(config.height, config.width, config.board_color,
-        #                 config.board_pos_id, board)
-        #     print("Check, white.")
-        # elif is_victory(black_player):
-        #     print_board(config.height, config.width, config.board_color,
-        #                 config.board_pos_id, board)
-        #     print("Checkmate white. Black wins! Congratulations!")
-        #     break
-        # elif is_draw():
-        #     print_board(config.height, config.width, config.board_color,
-        #                 config.board_pos_id, board)
-        #     print("It's a draw!")
-        #     break
-
-
-# TODO: Cleanup nested for loops, comments of sections, add variables for
-#  simple transformations like " new_col_index = current_col_index + col_vector"
-#  function calls, Combine "current space" stuff into function def current_space(style)
-#   or perhaps find_space(style, piece_choice, move_to) or similar
-#   where style describes what you want to have returned... the current piece
-#   there, the ID (A1) the column ID (A), the row ID (1) the
-#   current_row_index, or the current_col_index,
-play_chess()
+import sys
+import time
+
+import chess_config as config
+from gameboard import BoardRenderer
+import chess_pieces as pieces
+import chess_position
+import chess_movegen
+import chess_search
+import chess_fen
+import chess_pgn
+import chess_book
+import chess_tablebase
+from chess_tt import TranspositionTable
+from chess_attacks import AttackMaps, changed_spaces
+
+# TODO add "en passant is not available", "there is no piece there" (for
+#  diagonal pawn movements), and "you have already moved your king"/"you
+#  have already moved that rook" messages to the move_blocked responses,
+#  to give more context, also change pawns moving to diagonal spaces without
+#  pieces on them to read "that is an illegal move" rather than "that space
+#  is blocked"... as it is confusing with no piece on that space.... more a
+#  stylistic thing as "blocked" here simply means the piece would be
+#  capable of the move, there is just no piece there to take. This
+#  contrasts with trying to move a knight to an adjacent space, where the
+#  move is truly illegal
+
+
+def confirm_move(piece_choice, move_to):
+    """ Asks the player to confirm their chosen piece and location to
+        move the piece to. It returns either "y" or "n".
+        """
+    while True:
+        confirmation = input(f"You would like to move {piece_choice} to "
+                             f"{move_to}, is that correct? (y/n): """
+                             ).strip().lower()
+        if confirmation not in ["y", "n"]:
+            print('Invalid response. Please respond with "y" for yes or "n" '
+                  'for no.')
+            continue
+        else:
+            break
+    return confirmation
+
+
+def promote_to_what(piece_choice_obj):
+    """ Asks the player what piece they would like to promote their
+        pawn to, then calls the associated promotion function."""
+    while True:
+        promote_to = input(f"What would you like to promote"
+                           f" {piece_choice_obj} to?: (Q/N/R/S)")\
+            .strip().upper()
+        if promote_to not in ("Q", "N", "R", "S"):
+            print("That is not a legal promotion.")
+            continue
+        else:
+            break
+    return promote_to
+
+
+# TODO finish this function once the actual robots work... likely this should
+#  be a separate module
+def reset_robots():
+    pass
+
+
+def player_name(player):
+    """ Returns the name a player is recorded under in the PGN file."""
+    return "Computer" if player.time_budget is not None else "Human"
+
+
+class Game:
+    """ One game of chess: its board, players, turn counter, promoted
+        pieces and move history, along with the bitboard Position and
+        attack maps kept in step with the board. All of a game's state
+        lives on its Game object, so any number of games can be played
+        side by side in one process.
+
+        white_player and black_player default to people choosing moves
+        with input(). fen, if given, starts the game from that position
+        rather than the starting one (see load_game()).
+        """
+
+    def __init__(self, white_player=None, black_player=None, fen=None):
+        self.white_player = white_player or pieces.Player("white")
+        self.black_player = black_player or pieces.Player("black")
+        # Space IDs and the Piece/OpenSpace objects on them. Each game
+        # gets its own set of pieces, since pieces keep their own
+        # current space and move history.
+        self.board = pieces.new_board()
+        # Labels of every piece that has been in the game, including
+        # promoted pieces, for telling "does not exist" from "has been
+        # taken" in choose_piece()
+        self.game_pieces = [piece.display for piece in self.board.values()
+                            if piece.piece_type is not None]
+        self.turn_count = 0
+        self.promoted_pieces = []
+        # Bitboard copy of board, kept in step with it by perform_move()
+        # and undo_last_move()/redo_last_move(). Blocking and attack
+        # queries run against this rather than walking board space by
+        # space. A new board is always the starting position, so it is
+        # copied rather than worked out again from board.
+        self.position = chess_position.start_position()
+        # Records of each move played (see perform_move()), and of moves
+        # taken back by undo_last_move() that can still be replayed
+        self.move_history = []
+        self.undone_moves = []
+        # Number of pieces of each color attacking each space, updated
+        # after every move by perform_move() and
+        # undo_last_move()/redo_last_move()
+        self.attack_maps = AttackMaps(self.position)
+        # (Zobrist key, legal moves, chess_movegen state) of the last
+        # position checked by current_game_state(), so that is_victory()
+        # and is_draw() share one run of the move generator
+        self.game_state_cache = (None, [], chess_movegen.ONGOING)
+        # Search results kept by computer_move() from one move to the
+        # next, made when a computer player first moves. Keys don't
+        # depend on the game, so games may also be given a shared table.
+        # Not used with config.search_workers above 1, when the workers
+        # share a table of their own.
+        self.transposition_table = None
+        # The chess_book.OpeningBook computer_move() takes its first moves
+        # from. None for the book in config.opening_book_file, if any.
+        self.opening_book = None
+        # The chess_tablebase.Tablebase computer_move() plays endings from.
+        # None for the tables in config.tablebase_dir, if any.
+        self.tablebase = None
+        # FEN of the position the game started from, for the game record
+        self.start_fen = chess_position.start_fen
+        # A chess_broadcast.GameBroadcast sending each move to anyone
+        # watching the game, if it has been given one
+        self.broadcast = None
+        if fen is not None:
+            self.load_game(fen)
+
+    def pieces_remaining(self):
+        """ Returns a list of display attributes (labels) from all of the
+            pieces currently left on the board. This will be used to check
+            if a player's piece_choice still remains, or if it has been
+            taken.
+            """
+        remaining_pieces = {"displays": [], "objects": []}
+        for space_num in chess_position.squares(self.position.all_occupied):
+            piece = self.board[config.board_pos_id[space_num]]
+            remaining_pieces["displays"].append(piece.display)
+            remaining_pieces["objects"].append(piece)
+        return remaining_pieces
+
+    def choose_piece(self, player, remaining_pieces):
+        """ Asks a player for which piece they would like to move. This can
+            be either the full piece label (ex. "WS1", "BKG") or a player
+            can simply enter the piece label without their color ID
+            (ex. "S1", "KG").
+            """
+        while True:
+            piece_choice = input("What piece would you like to move?: ") \
+                .strip().upper()
+            if piece_choice == "SAVE":
+                print(f"Game saved to {self.save_game()}.")
+                continue
+            if len(piece_choice) < 3:
+                piece_choice = player.color_id + piece_choice
+            problem = self.piece_problem(player, piece_choice,
+                                         remaining_pieces)
+            if problem is not None:
+                print(problem)
+                continue
+            else:
+                break
+        return piece_choice
+
+    def piece_problem(self, player, piece_choice, remaining_pieces):
+        """ Returns why player can't move the piece labelled piece_choice,
+            or None if they can.
+            """
+        if piece_choice not in self.game_pieces:
+            return "That piece does not exist."
+        elif player.color_id not in piece_choice:
+            return "That is not your piece."
+        elif piece_choice not in remaining_pieces["displays"]:
+            return "That piece has been taken."
+        else:
+            return None
+
+    def find_current_piece(self, piece_choice):
+        """ Takes in the string piece_choice and returns the associated
+            Piece object. This can then be used to check attributes of that
+            object.
+            """
+        # Only the spaces holding pieces of the chosen piece's color need to
+        # be searched. The first character of the label is the color ID.
+        color = chess_position.color_ids.index(piece_choice[0])
+        piece_choice_obj = next(
+            self.board[config.board_pos_id[space_num]]
+            for space_num in chess_position.squares(
+                self.position.occupied[color])
+            if self.board[config.board_pos_id[space_num]].display
+            == piece_choice)
+        return piece_choice_obj
+
+    def where_to_move(self, player, piece_choice_obj):
+        """ Asks the player where they would like to move their chosen piece
+            to and returns this as the variable move_to, a string.
+
+            The player enters where they would like to move to using
+            the plain text space ID, ie. "A1", "C8", "H4". There is no need
+            for proper chess notation as this game is meant to be as easy as
+            possible for anybody to play. This is why there are separate
+            inputs for piece and destination.
+            """
+        while True:
+            move_to = input(f"Where would you like to move "
+                            f"{piece_choice_obj.display} to? (X to cancel):"
+                            ).strip().upper()
+            if move_to == "X":
+                break
+            problem = self.move_problem(player, piece_choice_obj, move_to)
+            if problem is not None:
+                print(problem)
+                continue
+            else:
+                break
+        return move_to
+
+    def move_problem(self, player, piece_choice_obj, move_to):
+        """ Returns why the chosen piece can't move to move_to, or None if
+            it can.
+            """
+        if move_to not in self.board.keys():
+            return "That space does not exist."
+        elif move_to == piece_choice_obj.current_space:
+            return f"{piece_choice_obj.display} is already on {move_to}."
+        elif move_to not in piece_choice_obj.legal_move():
+            return "That is an illegal move."
+        elif self.move_blocked(player, piece_choice_obj, move_to):
+            return "That space is blocked."
+        elif piece_choice_obj.piece_type != "king" \
+                and self.exposes_king(player, piece_choice_obj, move_to):
+            return "That would leave your king in check."
+        else:
+            return None
+
+    def pawn_move(self, piece_choice_obj):
+        """ Modifies necessary attributes of Pawn object after a move."""
+        # turn_count saved to check for en passant on enemy's next turn
+        piece_choice_obj.last_turn_moved = self.turn_count
+        # Pawn moved 2 spaces on initial move, used to check for en passant
+        if not piece_choice_obj.has_moved \
+                and piece_choice_obj.current_row_index == \
+                piece_choice_obj.start_row_index \
+                + (2 * piece_choice_obj.row_vector):
+            piece_choice_obj.two_space_move = True
+        if not piece_choice_obj.has_moved:
+            piece_choice_obj.has_moved = True
+
+    def special_move_check(self, player, piece_choice_obj, move_to):
+        """ Checks to see if a special move (en passant or castling) has
+            occurred. A dictionary is returned containing the result, as
+            well as the necessary information for the perform_move function.
+            """
+        move_to_col_index = config.col.index(move_to[0])
+        # If en passant has occurred
+        if piece_choice_obj.piece_type == "pawn" \
+                and move_to[0] != piece_choice_obj.current_space[0] \
+                and self.board[move_to].piece_type is None:
+            special_move_executed = True
+            special_move_type = "en_passant"
+            special_space_1 = self.en_passant(piece_choice_obj)["enemy_space"]
+            special_action_1 = pieces.EMPTY
+            special_space_2 = None
+            special_action_2 = None
+        # If castling has occurred
+        elif piece_choice_obj.piece_type == "king" \
+                and (move_to_col_index == 2
+                     or move_to_col_index == 6) \
+                and not piece_choice_obj.has_moved:
+            special_move_executed = True
+            special_move_type = "castling"
+            castle_result = self.castle(player, piece_choice_obj, move_to)
+            special_space_1 = castle_result["castle_space"]
+            special_action_1 = castle_result["castle_rook"]
+            special_space_2 = castle_result["castle_rook_start"]
+            special_action_2 = pieces.EMPTY
+        else:
+            special_move_executed = False
+            special_move_type = None
+            special_space_1 = None
+            special_space_2 = None
+            special_action_1 = None
+            special_action_2 = None
+        special_move_result = {"executed": special_move_executed,
+                               "type": special_move_type,
+                               "space_1": special_space_1,
+                               "space_2": special_space_2,
+                               "action_1": special_action_1,
+                               "action_2": special_action_2
+                               }
+        return special_move_result
+
+    def space_shift(self, piece_choice_obj, move_to):
+        """ Basic movement of pieces on board, and modifying piece
+            attributes accordingly. "Basic" in that it does not perform
+            special moves including en passant and castling.
+            """
+        (self.board[move_to], self.board[piece_choice_obj.current_space]) = \
+            (piece_choice_obj, pieces.EMPTY)
+        piece_choice_obj.current_space = move_to
+        (piece_choice_obj.current_row_index,
+         piece_choice_obj.current_col_index) = \
+            divmod(config.board_pos[move_to], config.width)
+
+    def encode_player_move(self, piece_choice_obj, move_to, special_move):
+        """ Converts a move chosen by a player into the encoded move integer
+            used by Position.make_move() (see chess_position.encode_move()).
+            Must be called before the move is performed, while any piece
+            being taken is still on move_to. Promotion flags are added by
+            perform_move() once the player has chosen the new piece.
+            """
+        from_num = config.board_pos[piece_choice_obj.current_space]
+        move_to_num = config.board_pos[move_to]
+        if special_move["type"] == "en_passant":
+            flag = chess_position.EN_PASSANT
+        elif special_move["type"] == "castling":
+            if move_to_num > from_num:
+                flag = chess_position.KINGSIDE_CASTLE
+            else:
+                flag = chess_position.QUEENSIDE_CASTLE
+        elif self.board[move_to].piece_type is not None:
+            flag = chess_position.CAPTURE
+        elif piece_choice_obj.piece_type == "pawn" \
+                and abs(move_to_num - from_num) == 2 * config.width:
+            flag = chess_position.DOUBLE_PUSH
+        else:
+            flag = chess_position.QUIET
+        return chess_position.encode_move(from_num, move_to_num, flag)
+
+    def record_move_state(self, move):
+        """ Saves the board entries, and the attributes of the pieces on
+            them, for every space a move touches: the spaces moved from and
+            to, the space of a pawn taken en passant and the spaces of a
+            castling rook. Used to take back and replay moves.
+            """
+        from_num = move & 63
+        move_to_num = move >> 6 & 63
+        flag = move >> 12
+        space_nums = [from_num, move_to_num]
+        if flag == chess_position.EN_PASSANT:
+            space_nums.append(from_num // config.width * config.width
+                              + move_to_num % config.width)
+        elif flag in (chess_position.KINGSIDE_CASTLE,
+                      chess_position.QUEENSIDE_CASTLE):
+            # Kings castle from their starting row, row 1 for white
+            color = chess_position.WHITE \
+                if from_num // config.width == config.height - 1 \
+                else chess_position.BLACK
+            castle_flag = (chess_position.WHITE_KINGSIDE
+                           if flag == chess_position.KINGSIDE_CASTLE
+                           else chess_position.WHITE_QUEENSIDE) << 2 * color
+            space_nums.extend(chess_position.castling_spaces[castle_flag][2:])
+        spaces = [config.board_pos_id[space_num] for space_num in space_nums]
+        return {"board": {space: self.board[space] for space in spaces},
+                "attributes": [(self.board[space],
+                                {name: getattr(self.board[space], name)
+                                 for name
+                                 in self.board[space].moving_attributes})
+                               for space in spaces
+                               if self.board[space].piece_type is not None]}
+
+    def restore_move_state(self, move_state):
+        """ Puts back the board entries and piece attributes saved by
+            record_move_state().
+            """
+        self.board.update(move_state["board"])
+        for piece, attributes in move_state["attributes"]:
+            for key, value in attributes.items():
+                setattr(piece, key, value)
+
+    def perform_move(self, player, piece_choice_obj, move_to, promote_to=None):
+        """ Moves Piece object to move_to space and performs any special
+            move operations such as also moving the rook when castling, as
+            well as taking the enemy pawn in en passant after the friendly
+            pawn has moved. promote_to is the unit of the piece a pawn
+            reaching the last row becomes, asked for if not given.
+            """
+        special_move = self.special_move_check(player, piece_choice_obj,
+                                               move_to)
+        move = self.encode_player_move(piece_choice_obj, move_to, special_move)
+        move_record = {"move": move, "before": self.record_move_state(move),
+                       "promoted_piece": None}
+        if special_move["executed"] and special_move["type"] == "en_passant":
+            self.space_shift(piece_choice_obj, move_to)
+            self.board[special_move["space_1"]] = special_move["action_1"]
+        elif special_move["executed"] and special_move["type"] == "castling":
+            self.space_shift(piece_choice_obj, move_to)
+            # space_shift() also opens up the rook's starting space
+            # (special_move["space_2"]) and updates its current_space so
+            # that its legal moves are found from the correct space.
+            self.space_shift(special_move["action_1"], special_move["space_1"])
+            special_move["action_1"].has_moved = True
+        else:
+            self.space_shift(piece_choice_obj, move_to)
+        self.turn_count += 1
+        if piece_choice_obj.piece_type == "pawn":
+            self.pawn_move(piece_choice_obj)
+            if piece_choice_obj.current_row_index in (0, 7):
+                self.promote_pawn(piece_choice_obj, promote_to)
+                # Add the chosen piece to the encoded move
+                promoted_piece = self.board[move_to]
+                flag = move >> 12
+                promotion_flag = chess_position.CAPTURE_PROMOTION \
+                    if flag == chess_position.CAPTURE \
+                    else chess_position.PROMOTION
+                move = (move & 0xFFF) | (
+                    promotion_flag | chess_position.piece_type_nums[
+                        promoted_piece.piece_type] - 1) << 12
+                move_record["move"] = move
+                move_record["promoted_piece"] = promoted_piece
+        elif piece_choice_obj.piece_type in ("rook", "king") \
+                and not piece_choice_obj.has_moved:
+            piece_choice_obj.has_moved = True
+        # Play the move on the bitboards as well, keeping the undo record
+        # and the state of the touched spaces after the move for
+        # undo_last_move()/redo_last_move()
+        move_record["undo"] = self.position.make_move(move)
+        self.attack_maps.update(self.position,
+                                changed_spaces(move, self.position.turn ^ 1))
+        move_record["after"] = self.record_move_state(move)
+        self.move_history.append(move_record)
+        self.undone_moves.clear()
+        if self.broadcast is not None:
+            self.broadcast.publish_move(self.position, move)
+
+    def player_move(self, player):
+        """ Gathers player input player input on what they would like to
+            move where, then executes the move.
+            """
+        print(f"Your turn {player}.")
+        pieces_left = self.pieces_remaining()
+        while True:
+            piece_choice = self.choose_piece(player, pieces_left)
+            piece_choice_obj = self.find_current_piece(piece_choice)
+            move_to = self.where_to_move(player, piece_choice_obj)
+            if move_to == "X":
+                continue
+            confirmation = confirm_move(piece_choice, move_to)
+            if confirmation == "n":
+                continue
+            else:
+                break
+        self.perform_move(player, piece_choice_obj, move_to)
+
+    def book_move(self):
+        """ Returns a move from the opening book for the position, or
+            None if the book has none or the game is more than
+            config.book_plies moves old.
+            """
+        if len(self.move_history) >= config.book_plies:
+            return None
+        book = self.opening_book or chess_book.default_book()
+        if book is None:
+            return None
+        return book.choose_move(self.position)
+
+    def tablebase_move(self):
+        """ Returns the best move of the position and how the game ends
+            with it (see chess_tablebase.Tablebase.best_move()), or None
+            if the endgame tablebase doesn't cover the position.
+            """
+        tablebase = self.tablebase or chess_tablebase.default_tablebase()
+        if tablebase is None:
+            return None
+        return tablebase.best_move(self.position)
+
+    def computer_move(self, player):
+        """ Lets the computer choose and play the player's move, taking
+            it from the opening book early in the game or the endgame
+            tablebase late in it, or else searching for up to
+            player.time_budget seconds. Plays in place of player_move()
+            (see take_turn()).
+            """
+        print(f"Your turn {player}. Thinking...")
+        move = self.book_move()
+        ending = None if move is not None else self.tablebase_move()
+        if move is not None:
+            how = "from the opening book"
+        elif ending is not None:
+            move, (outcome, plies) = ending
+            if outcome == chess_tablebase.DRAW:
+                how = "endgame tablebase: a draw"
+            elif outcome == chess_tablebase.WIN:
+                how = f"endgame tablebase: wins in {plies} plies"
+            else:
+                how = f"endgame tablebase: loses in {plies} plies"
+        else:
+            # Each undo record keeps the key of the position before its
+            # move (see Position.make_move()), so the search can avoid
+            # repetitions
+            history_keys = [move_record["undo"] >> 32
+                            for move_record in self.move_history]
+            if config.search_workers > 1:
+                # Imported here, as starting worker processes is only
+                # worth it for a computer player on several cores
+                import chess_smp
+                result = chess_smp.default_parallel_search().search(
+                    self.position, player.time_budget,
+                    history_keys=history_keys)
+            else:
+                if self.transposition_table is None:
+                    self.transposition_table = TranspositionTable(
+                        config.transposition_table_mb)
+                result = chess_search.search(
+                    self.position, player.time_budget,
+                    history_keys=history_keys,
+                    table=self.transposition_table)
+            move = result["move"]
+            how = f"depth {result['depth']}, {result['nodes']} positions"
+        piece_choice_obj = self.board[config.board_pos_id[move & 63]]
+        move_to = config.board_pos_id[move >> 6 & 63]
+        flag = move >> 12
+        if flag & chess_position.PROMOTION:
+            promote_to = chess_position.units[(flag & 3) + 1]
+        else:
+            promote_to = None
+        print(f"{player} moves {piece_choice_obj.display} to {move_to} "
+              f"({how}).")
+        self.perform_move(player, piece_choice_obj, move_to, promote_to)
+
+    def current_player(self):
+        """ Returns the player whose turn it is. Turns follow turn_count
+            rather than white then black, since a loaded game may have
+            black to move.
+            """
+        if self.turn_count % 2:
+            return self.black_player
+        else:
+            return self.white_player
+
+    def play_move(self, piece_choice, move_to, promote_to=None):
+        """ Plays a move for the player whose turn it is without asking
+            for input, for games run by another program rather than at
+            the console. piece_choice is a piece label as typed into
+            choose_piece() (ex. "WN1" or "N1"), move_to a space ID and
+            promote_to the unit a pawn reaching the last row becomes (a
+            queen if not given). Returns None if the move was played,
+            otherwise why it wasn't, as the console game would print it.
+            """
+        if self.result() is not None:
+            return "The game is over."
+        player = self.current_player()
+        piece_choice = piece_choice.strip().upper()
+        if len(piece_choice) < 3:
+            piece_choice = player.color_id + piece_choice
+        problem = self.piece_problem(player, piece_choice,
+                                     self.pieces_remaining())
+        if problem is not None:
+            return problem
+        piece_choice_obj = self.find_current_piece(piece_choice)
+        move_to = move_to.strip().upper()
+        problem = self.move_problem(player, piece_choice_obj, move_to)
+        if problem is not None:
+            return problem
+        elif promote_to not in (None, "Q", "N", "R", "S"):
+            return "That is not a legal promotion."
+        self.perform_move(player, piece_choice_obj, move_to,
+                          promote_to or "Q")
+        return None
+
+    def take_turn(self, player):
+        """ Has the player move, choosing by input() or, for a player given
+            a time_budget, by computer_move().
+            """
+        if player.time_budget is None:
+            self.player_move(player)
+        else:
+            self.computer_move(player)
+
+    def en_passant(self, piece_choice_obj):
+        """ Checks to see if an enemy pawn can be taken via en passant. A
+            dictionary is returned containing the result, as well as the
+            necessary information for the perform_move function).
+            """
+        en_passant_friendly_space = []
+        en_passant_enemy_space = []
+        en_passant_enemy_object = []
+        current_col_index = piece_choice_obj.current_col_index
+        for col_vector in (-1, 1):
+            if 0 <= current_col_index + col_vector <= 7:
+                row_adjacent_obj = self.board[
+                    config.col[piece_choice_obj.current_col_index + col_vector]
+                    + config.row[piece_choice_obj.current_row_index]]
+            else:
+                continue
+            # En passant conditions:
+            #
+            # 1) If friendly pawn is in its 5th row AND
+            # 2) The adjacent space in the same row has a pawn on it AND
+            # 3) That pawn is an enemy pawn AND
+            # 4) The enemy piece moved two spaces on its first move AND
+            # 5) The turn being played is the immediate turn following the
+            # two-space move
+            # THEN the enemy pawn can be taken by the friendly pawn moving
+            # into the space the enemy pawn moved through (ie. the 6th row
+            # space in the column of the enemy pawn. The for loop checks
+            # both the left and right adjacent spaces.
+            if piece_choice_obj.current_row_index == \
+                    piece_choice_obj.start_row_index + \
+                    (3 * piece_choice_obj.row_vector) \
+                    and row_adjacent_obj.piece_type == "pawn" \
+                    and piece_choice_obj.color != row_adjacent_obj.color \
+                    and row_adjacent_obj.two_space_move \
+                    and row_adjacent_obj.last_turn_moved == self.turn_count:
+                en_passant_friendly_space.append(
+                    config.col[current_col_index + col_vector]
+                    + config.row[piece_choice_obj.current_row_index +
+                                 piece_choice_obj.row_vector])
+                en_passant_enemy_space.append(row_adjacent_obj.current_space)
+                en_passant_enemy_object.append(row_adjacent_obj)
+        if len(en_passant_friendly_space) > 0:
+            en_passant_available = True
+        else:
+            en_passant_available = False
+            en_passant_friendly_space = [None]
+            en_passant_enemy_space = [None]
+            en_passant_enemy_object = [None]
+        en_passant_result = {"available": en_passant_available,
+                             "friendly_space": en_passant_friendly_space[0],
+                             "enemy_space": en_passant_enemy_space[0],
+                             "enemy_object": en_passant_enemy_object[0]
+                             }
+        return en_passant_result
+
+    # TODO BP5 can move to D6 right off the bat... the confirmation is asked
+    #  for and it is not being blocked. WP4 is being blocked from C3...maybe
+    #  correctly, but why is it different than Bp5 to D6?
+    def pawn_blocked(self, player, piece_choice_obj, move_to):
+        """ Determines if any pieces are in the way preventing the pawn
+            from moving, taking into account if the piece is an enemy piece
+            and can be taken. pawn_blocked is broken out to maintain flatter
+            code due to the pawn having special rules involving diagonal
+            and en passant capture.
+            """
+        move_to_col_index = config.col.index(move_to[0])
+        current_num = config.board_pos[piece_choice_obj.current_space]
+        move_to_num = config.board_pos[move_to]
+        enemy_color = 1 - chess_position.color_nums[player.color]
+        en_passant_check = self.en_passant(piece_choice_obj)
+        # Forward moves need the space(s) up to and including move_to to be
+        # open, since pawns cannot take forward.
+        if move_to_col_index == piece_choice_obj.current_col_index:
+            return not self.position.path_clear(current_num, move_to_num) \
+                or bool(self.position.all_occupied
+                        & config.board_bits[move_to_num])
+        # Diagonal capture is allowed if there is an enemy piece on move_to.
+        # If the diagonal space is open, the pawn can only move there by
+        # taking en passant, checked below, and is otherwise blocked.
+        elif self.position.occupied[enemy_color] \
+                & config.board_bits[move_to_num]:
+            return False
+        # Added 'and move_to == en_passant_check["friendly_space"]' because
+        # of the following scenario:
+        #
+        # BP5 is at E6, WP5 moves to E5, BP4 does a two-space move to D5,
+        # enabling en passant if WP5 moves this turn. WP5 decides instead to
+        # move to E6. By the rules, this should be blocked. However, it is
+        # allowed (See below).
+        #
+        # Only using en_passant_check["available"] causes pawn_blocked() to
+        # return False, because en passant can be performed on BP4. Since
+        # the pawn is considered not blocked, and move_to is set to E6, WP5
+        # is then able to take forward, replacing BP5 on E6. Pawns can't
+        # take forward, hence we check to make sure that move_to is set to
+        # the en passant friendly space (ie. the player intends to actually
+        # perform en passant) before we consider the move not blocked.
+        elif en_passant_check["available"] \
+                and move_to == en_passant_check["friendly_space"]:
+            return False
+        else:
+            return True
+
+    def knight_blocked(self, player, move_to):
+        """ Determines if a knight's move is blocked, taking into account
+            they can jump over other pieces.
+            """
+        color = chess_position.color_nums[player.color]
+        if self.position.occupied[color] \
+                & config.board_bits[config.board_pos[move_to]]:
+            return True
+        else:
+            return False
+
+    def castle(self, player, piece_choice_obj, move_to):
+        """ Checks to see if castling is available on the move_to side of
+            the board. A dictionary is returned containing the result, as
+            well as the necessary information for the perform_move function.
+            """
+        move_to_col_index = config.col.index(move_to[0])
+        color = chess_position.color_nums[player.color]
+        # The rook is whatever stands in the corner, so that castling also
+        # works in games loaded from a saved position (see load_game()).
+        # r_start lists each color's queenside rook first.
+        # Queenside castling
+        if piece_choice_obj.current_space == piece_choice_obj.start_space \
+                and move_to_col_index == 2:
+            castle_rook_start = config.r_start[2 * color]
+            castle_rook = self.board[castle_rook_start]
+            castle_space = config.col[3] + \
+                config.row[piece_choice_obj.current_row_index]
+        # Kingside castling
+        elif piece_choice_obj.current_space == piece_choice_obj.start_space \
+                and move_to_col_index == 6:
+            castle_rook_start = config.r_start[2 * color + 1]
+            castle_rook = self.board[castle_rook_start]
+            castle_space = config.col[5] + \
+                config.row[piece_choice_obj.current_row_index]
+        else:
+            castle_rook = None
+            castle_rook_start = None
+            castle_space = None
+        # Every space between the king and the rook must be open. Queenside
+        # this includes the B column space the king does not pass over. The
+        # king also can't castle out of, through or into check.
+        if castle_rook is None:
+            castle_available = False
+        elif castle_rook.piece_type == "rook" \
+                and castle_rook.color == player.color \
+                and not self.castle_through_check(player, piece_choice_obj,
+                                                  move_to) \
+                and self.position.path_clear(
+                    config.board_pos[piece_choice_obj.current_space],
+                    config.board_pos[castle_rook_start]) \
+                and not piece_choice_obj.has_moved \
+                and not castle_rook.has_moved:
+            castle_available = True
+        else:
+            castle_available = False
+        castle_result = {"available": castle_available,
+                         "castle_rook": castle_rook,
+                         "castle_rook_start": castle_rook_start,
+                         "castle_space": castle_space
+                         }
+        return castle_result
+
+    def castle_through_check(self, player, piece_choice_obj, move_to):
+        """ Returns True if the enemy attacks the king's space, the space
+            the king passes over or move_to.
+            """
+        enemy_color = chess_position.color_nums[player.color] ^ 1
+        king_num = config.board_pos[piece_choice_obj.current_space]
+        move_to_num = config.board_pos[move_to]
+        king_path = config.between_bits[king_num][move_to_num] \
+            | config.board_bits[king_num] | config.board_bits[move_to_num]
+        return any(self.attack_maps.is_attacked(space_num, enemy_color)
+                   for space_num in chess_position.squares(king_path))
+
+    # TODO test king_blocked() (may need further development to finish)
+    def king_blocked(self, player, piece_choice_obj, move_to):
+        """ Determines if any pieces are in the way preventing the king
+            from moving, taking into account if either the king or a rook
+            has moved when trying to castle, and if the king is in check or
+            not.
+            """
+        color = chess_position.color_nums[player.color]
+        move_to_col_index = config.col.index(move_to[0])
+        if self.will_move_into_check(player, move_to):
+            return True
+        # Two-column king moves are only possible by castling
+        elif abs(move_to_col_index - piece_choice_obj.current_col_index) == 2:
+            return not self.castle(player, piece_choice_obj,
+                                   move_to)["available"]
+        elif self.position.occupied[color] \
+                & config.board_bits[config.board_pos[move_to]]:
+            return True  # When friendly piece is at move_to
+        else:
+            return False
+
+    def move_blocked(self, player, piece_choice_obj, move_to):
+        """ Determines if any pieces are in the way preventing the chosen
+            piece from moving, taking into account jumping rules for the
+            knight as well as if the piece is an enemy piece and can be
+            taken.
+            """
+        # Keep in mind we have already checked that this move is
+        # theoretically within the legal movement pattern of the piece
+        # using legal_move(move_to) func. Thus, we only need to check the
+        # spaces along the chosen movement path rather than each of the
+        # possible ones individually.
+        #
+        # To check if a space is blocked, we simply need to check the
+        # following scenarios:
+        # 1) Is there a piece along the path? ie. A position other than
+        #   the final position. If yes, piece is blocked.
+        # 2) Is the final position occupied by a friendly piece? If yes,
+        #  piece is blocked.
+        # 3) Otherwise the final position is open or holds an enemy piece
+        #  that can be taken. ie. Not blocked.
+        #
+        # Both checks are done by masking the position's occupancy
+        # bitboards with the spaces between current_space and move_to, and
+        # with the move_to space itself.
+        #
+        # Different move rules since pawns can't take forward
+        if piece_choice_obj.piece_type == "pawn":
+            return self.pawn_blocked(player, piece_choice_obj, move_to)
+        # Different move rules since knights can jump
+        elif piece_choice_obj.piece_type == "knight":
+            return self.knight_blocked(player, move_to)
+        # Different move rules since kings can castle
+        elif piece_choice_obj.piece_type == "king":
+            return self.king_blocked(player, piece_choice_obj, move_to)
+        # All other pieces can move if their path is open, or if an enemy
+        # piece is at the end of their path.
+        else:
+            color = chess_position.color_nums[player.color]
+            move_to_num = config.board_pos[move_to]
+            if not self.position.path_clear(
+                    config.board_pos[piece_choice_obj.current_space],
+                    move_to_num):
+                return True
+            elif self.position.occupied[color] \
+                    & config.board_bits[move_to_num]:
+                return True
+            else:
+                return False
+    # TODO Add reasons to blocked function... ie if a king is blocked
+    #  because a friendly piece is there, or if it is because it would move
+    #  into check... if a pawn can't move two spaces forward, or if a pawn
+    #  can't move diagonally without taking, etc.... make these into a
+    #  list, ie. return the False/True value as well as "reason":...
+    #  similar to how castle() returns are done with multiple variables
+    #  store in one list that is returned
+
+    def promote_pawn(self, piece_choice_obj, promote_to=None):
+        """ Packages all promotion functions into one."""
+        if promote_to is None:
+            promote_to = promote_to_what(piece_choice_obj)
+        next_num_id = self.find_next_num_id(promote_to)
+        self.promote_piece(piece_choice_obj, promote_to, next_num_id)
+
+    def find_next_num_id(self, promote_to):
+        """ Determines the next num_id attribute for the desired
+            promotion."""
+        # Pieces on the board rather than the starting pieces, since a
+        # loaded game may not have started from the starting pieces
+        similar_pieces = list(filter(lambda piece: piece.unit == promote_to,
+                                     list(self.board.values())
+                                     + self.promoted_pieces))
+        max_num_id = max(map(lambda piece: piece.num_id, similar_pieces),
+                         default=0)
+        next_num_id = max_num_id + 1
+        return next_num_id
+
+    def promote_piece(self, piece_choice_obj, promote_to, next_num_id):
+        """ Performs requested promotion, replacing the pawn with the
+            desired piece object."""
+        if promote_to == "Q":
+            promoted_piece = pieces.Queen(
+                piece_choice_obj.color, next_num_id,
+                piece_choice_obj.current_space, piece_choice_obj.current_space)
+        elif promote_to == "N":
+            promoted_piece = pieces.Knight(
+                piece_choice_obj.color, next_num_id,
+                piece_choice_obj.current_space, piece_choice_obj.current_space)
+        elif promote_to == "R":
+            promoted_piece = pieces.Rook(
+                piece_choice_obj.color, next_num_id,
+                piece_choice_obj.current_space, piece_choice_obj.current_space)
+        else:
+            promoted_piece = pieces.Bishop(
+                piece_choice_obj.color, next_num_id,
+                piece_choice_obj.current_space, piece_choice_obj.current_space)
+        (promoted_piece.current_col_index,
+         promoted_piece.current_row_index) = \
+            (config.col.index(piece_choice_obj.current_space[0]),
+             config.row.index(piece_choice_obj.current_space[1]))
+        piece_choice_obj.promoted = True
+        self.promoted_pieces.append(promoted_piece)
+        self.board[piece_choice_obj.current_space] = promoted_piece
+        self.game_pieces.append(promoted_piece.display)
+
+    def undo_last_move(self):
+        """ Takes back the last move played. The bitboards are restored
+            from the move's undo record, and the board entries and piece
+            attributes (has_moved, two_space_move, etc.) from the state
+            saved before the move, so en passant and castling rules carry
+            on as they were. Returns False if there is no move to undo.
+            """
+        if not self.move_history:
+            return False
+        move_record = self.move_history.pop()
+        self.position.unmake_move(move_record["move"], move_record["undo"])
+        self.attack_maps.update(self.position,
+                                changed_spaces(move_record["move"],
+                                               self.position.turn))
+        self.restore_move_state(move_record["before"])
+        promoted_piece = move_record["promoted_piece"]
+        if promoted_piece is not None:
+            self.promoted_pieces.remove(promoted_piece)
+            self.game_pieces.remove(promoted_piece.display)
+        self.turn_count -= 1
+        self.undone_moves.append(move_record)
+        if self.broadcast is not None:
+            self.broadcast.publish_keyframe(self.position)
+        return True
+
+    def redo_last_move(self):
+        """ Replays the last move taken back by undo_last_move(). Returns
+            False if there is no move to redo.
+            """
+        if not self.undone_moves:
+            return False
+        move_record = self.undone_moves.pop()
+        move_record["undo"] = self.position.make_move(move_record["move"])
+        self.attack_maps.update(self.position,
+                                changed_spaces(move_record["move"],
+                                               self.position.turn ^ 1))
+        self.restore_move_state(move_record["after"])
+        promoted_piece = move_record["promoted_piece"]
+        if promoted_piece is not None:
+            self.promoted_pieces.append(promoted_piece)
+            self.game_pieces.append(promoted_piece.display)
+        self.turn_count += 1
+        self.move_history.append(move_record)
+        if self.broadcast is not None:
+            self.broadcast.publish_move(self.position, move_record["move"])
+        return True
+
+    def is_in_check(self, player):
+        """ Determines if the King is in check."""
+        return self.position.is_in_check(
+            chess_position.color_nums[player.color])
+
+    def exposes_king(self, player, piece_choice_obj, move_to):
+        """ Returns True if moving the chosen piece (any but the king) to
+            move_to would leave the player's king in check. That happens if
+            the piece is pinned and move_to is off the line of the pin, or
+            if the king is already in check and the move neither takes the
+            checking piece nor blocks its line to the king.
+            """
+        color = chess_position.color_nums[player.color]
+        enemy_color = color ^ 1
+        current_num = config.board_pos[piece_choice_obj.current_space]
+        move_to_num = config.board_pos[move_to]
+        move_to_bit = config.board_bits[move_to_num]
+        king_num = self.position.king_space(color)
+        # En passant takes a pawn that is not on move_to, and removes two
+        # pieces from one row at once, so look for attackers directly on
+        # the board as it would be after the move.
+        if piece_choice_obj.piece_type == "pawn" \
+                and move_to_num % config.width \
+                != current_num % config.width \
+                and not self.position.all_occupied & move_to_bit:
+            taken_bit = config.board_bits[current_num - current_num
+                                          % config.width
+                                          + move_to_num % config.width]
+            after = self.position.all_occupied \
+                ^ config.board_bits[current_num] ^ taken_bit ^ move_to_bit
+            return bool(self.position.attackers_to(king_num, enemy_color,
+                                                   after)
+                        & ~taken_bit)
+        pin_mask = chess_movegen.find_pins(self.position,
+                                           color).get(current_num)
+        if pin_mask is not None and not pin_mask & move_to_bit:
+            return True
+        checkers = self.position.checkers(color)
+        if not checkers:
+            return False
+        # In double check only the king can move
+        elif checkers & (checkers - 1):
+            return True
+        else:
+            checker_num = checkers.bit_length() - 1
+            return not (checkers
+                        | config.between_bits[king_num][checker_num]) \
+                & move_to_bit
+
+    def will_move_into_check(self, player, move_to):
+        """ Returns True if the player's king would be attacked on
+            move_to.
+            """
+        color = chess_position.color_nums[player.color]
+        enemy_color = color ^ 1
+        move_to_num = config.board_pos[move_to]
+        king_num = self.position.king_space(color)
+        if self.attack_maps.is_attacked(move_to_num, enemy_color):
+            return True
+        # A king in check from a rook, bishop or queen can't escape by
+        # stepping back along the line of attack. The attack maps stop
+        # that line at the king, so look again with the king lifted off.
+        elif self.attack_maps.is_attacked(king_num, enemy_color):
+            return bool(self.position.attackers_to(
+                move_to_num, enemy_color,
+                self.position.all_occupied ^ config.board_bits[king_num]))
+        else:
+            return False
+
+    def current_game_state(self):
+        """ Returns the legal moves of the side to move and whether the
+            game is ONGOING, or over by CHECKMATE or STALEMATE (see
+            chess_movegen.game_state()), reusing the last answer if the
+            position has not changed.
+            """
+        if self.game_state_cache[0] != self.position.key:
+            self.game_state_cache = (self.position.key,
+                                     *chess_movegen.game_state(
+                                         self.position))
+        return self.game_state_cache[1], self.game_state_cache[2]
+
+    def is_victory(self, player):
+        """ Returns True if player has checkmated the other side."""
+        color = chess_position.color_nums[player.color]
+        return self.position.turn != color \
+            and self.current_game_state()[1] == chess_movegen.CHECKMATE
+
+    def is_draw(self):
+        """ Returns the reason the game is drawn, or None if it is not.
+
+            https://www.thesprucecrafts.com/types-of-draws-in-chess-611536
+            """
+        if self.current_game_state()[1] == chess_movegen.STALEMATE:
+            return "stalemate"
+        elif self.position.halfmove_clock >= 100:
+            return "the fifty-move rule"
+        elif self.position.is_insufficient_material():
+            return "insufficient material"
+        # A position can only repeat back as far as the last pawn move or
+        # capture. Each undo record holds the key of the position before
+        # its move in its top bits (see Position.make_move()).
+        elif self.position.halfmove_clock >= 4 and sum(
+                move_record["undo"] >> 32 == self.position.key
+                for move_record
+                in self.move_history[-self.position.halfmove_clock:]
+        ) >= 2:
+            return "threefold repetition"
+        else:
+            return None
+
+    def result(self):
+        """ Returns the result of the game as written in PGN files: "1-0"
+            or "0-1" for a win by checkmate, "1/2-1/2" for a draw, or None
+            while the game goes on.
+            """
+        if self.current_game_state()[1] == chess_movegen.CHECKMATE:
+            if self.position.turn == chess_position.WHITE:
+                return "0-1"
+            else:
+                return "1-0"
+        elif self.is_draw():
+            return "1/2-1/2"
+        else:
+            return None
+
+    def save_game(self, file_name="saved_game.fen"):
+        """ Saves the game as a FEN string in file_name (see
+            chess_fen.py), which keeps the pieces, the side to move,
+            castling and en passant rights and the move counters. Returns
+            file_name.
+            """
+        # Written from the Position rather than rebuilt from the board,
+        # so the saved game is exactly the one being played
+        with open(file_name, "w") as save_file:
+            save_file.write(self.position.to_fen() + "\n")
+        return file_name
+
+    def ask_to_load_game(self):
+        """ Asks the player if they would like to load a saved game, or
+            set up a position from a FEN string, rather than start a new
+            game.
+            """
+        while True:
+            load = input("Would you like to load a saved game? (y/n): ") \
+                .strip().lower()
+            if load == "n":
+                return
+            elif load != "y":
+                print('Invalid response. Please respond with "y" for yes or '
+                      '"n" for no.')
+                continue
+            saved_game = input("Enter a saved game file name or a FEN "
+                               "(blank for saved_game.fen): ").strip()
+            try:
+                self.load_game(saved_game or "saved_game.fen")
+            except (OSError, ValueError) as error:
+                print(f"That game could not be loaded: {error}")
+                continue
+            print("Game loaded.")
+            return
+
+    def load_game(self, saved_game):
+        """ Replaces the game in progress with a saved one. saved_game is
+            either a FEN string or the name of a file written by
+            save_game(). Raises OSError if the file can't be read, and
+            ValueError if it does not hold a valid FEN.
+            """
+        if "/" in saved_game:
+            fen = saved_game
+        else:
+            with open(saved_game) as save_file:
+                fen = save_file.read().strip()
+        saved = chess_fen.fen_to_board(fen)
+        self.board = saved["board"]
+        self.game_pieces = [piece.display for piece in self.board.values()
+                            if piece.piece_type is not None]
+        self.turn_count = saved["turn_count"]
+        self.promoted_pieces = []
+        self.move_history = []
+        self.undone_moves = []
+        self.position = saved["position"]
+        self.attack_maps = AttackMaps(self.position)
+        self.game_state_cache = (None, [], chess_movegen.ONGOING)
+        self.start_fen = self.position.to_fen()
+        if self.broadcast is not None:
+            self.broadcast.publish_keyframe(self.position)
+
+    def record_game(self, result, file_name="games.pgn"):
+        """ Adds the finished game to the end of the PGN file file_name
+            (see chess_pgn.py), so every game played builds up one
+            archive. result is "1-0", "0-1" or "1/2-1/2".
+            """
+        with open(file_name, "a") as pgn_file:
+            chess_pgn.write_game(pgn_file,
+                                 [move_record["move"]
+                                  for move_record in self.move_history],
+                                 result,
+                                 {"Event": "python-chess game",
+                                  "Date": time.strftime("%Y.%m.%d"),
+                                  "White": player_name(self.white_player),
+                                  "Black": player_name(self.black_player)},
+                                 self.start_fen)
+
+    def play_chess(self, ansi=False):
+        """ Plays the game to the end at the console, asking each person
+            for their moves. With ansi, the board stays at the top of the
+            terminal and only the spaces that changed are redrawn after
+            each move (see gameboard.BoardRenderer).
+            """
+        self.ask_to_load_game()
+        renderer = BoardRenderer(config.height, config.width,
+                                 config.board_color, config.board_pos_id,
+                                 ansi)
+        print(renderer.update(self.board), end="")
+        while True:
+            player = self.current_player()
+            self.take_turn(player)
+            opponent = self.current_player()
+            print(renderer.update(self.board), end="")
+            # Checkmate is tested before check, since a mated king is also
+            # in check
+            if self.is_victory(player):
+                print(f"Checkmate {opponent.color}. "
+                      f"{player.color.capitalize()} wins! Congratulations!")
+                self.record_game(self.result())
+                break
+            draw_reason = self.is_draw()
+            if draw_reason:
+                print(f"It's a draw by {draw_reason}!")
+                self.record_game("1/2-1/2")
+                break
+            elif self.is_in_check(opponent):
+                print(f"Check, {opponent.color}.")
+
+
+def play_chess(ansi=False):
+    """ Starts a new game at the console. Each call plays a separate
+        game with its own new set of pieces.
+        """
+    Game().play_chess(ansi)
+
+
+# TODO: Cleanup nested for loops, comments of sections, add variables for
+#  simple transformations like " new_col_index = current_col_index + col_vector"
+#  function calls, Combine "current space" stuff into function def current_space(style)
+#   or perhaps find_space(style, piece_choice, move_to) or similar
+#   where style describes what you want to have returned... the current piece
+#   there, the ID (A1) the column ID (A), the row ID (1) the
+#   current_row_index, or the current_col_index,
+if __name__ == "__main__":
+    play_chess(ansi="--ansi" in sys.argv)
@@ -0,0 +1,245 @@
+""" Converts chess.py board dictionaries and Positions into compact numpy
+    arrays, and back, so that many positions can be analysed at once with
+    array operations instead of attribute lookups on Piece objects one
+    position at a time. Needs numpy, which the game itself does not.
+
+    Each board is an int8 array of 64 spaces indexed like
+    config.board_pos_num (0 is A8, 63 is H1). An open space holds 0, a
+    white piece piece_type + 1 and a black piece -(piece_type + 1), with
+    piece types numbered as in chess_position. Boards are stacked into
+    int8[N, 64] arrays to work on N positions at once, and the queries
+    below (material counts, piece locations and attacked spaces) all
+    take such a stack and answer for every board together.
+    """
+import numpy as np
+
+import chess_config as config
+import chess_pieces as pieces
+from chess_position import (WHITE, BLACK, PAWN, KNIGHT, BISHOP, ROOK, QUEEN,
+                            KING, Position, colors, units, mailbox_pieces,
+                            squares)
+
+# Board array code of each Position.mailbox entry
+piece_codes = {None: 0}
+for color_pieces in mailbox_pieces:
+    for piece in color_pieces:
+        piece_codes[piece] = (piece[1] + 1 if piece[0] == WHITE
+                              else -(piece[1] + 1))
+# The same codes as unsigned bytes, so a whole mailbox converts with one
+# bytes() call and the array is read straight from the bytes
+piece_bytes = {piece: code & 0xFF for piece, code in piece_codes.items()}
+
+
+def position_to_array(position):
+    """ Returns the int8[64] board array of a Position."""
+    return np.frombuffer(bytes(map(piece_bytes.__getitem__,
+                                   position.mailbox)),
+                         dtype=np.int8).copy()
+
+
+def positions_to_array(positions):
+    """ Returns the int8[N, 64] array of the boards of N Positions, and the
+        int8[N] array of their sides to move.
+        """
+    positions = list(positions)
+    board_bytes = b"".join(bytes(map(piece_bytes.__getitem__,
+                                     position.mailbox))
+                           for position in positions)
+    boards = np.frombuffer(board_bytes, dtype=np.int8).reshape(
+        len(positions), len(config.board_pos_num)).copy()
+    turns = np.array([position.turn for position in positions],
+                     dtype=np.int8)
+    return boards, turns
+
+
+# Board array code of each Piece.unit, for white pieces
+unit_codes = {unit: piece_type + 1 for piece_type, unit in enumerate(units)}
+# Piece classes of chess_pieces by piece type
+piece_classes = (pieces.Pawn, pieces.Knight, pieces.Bishop, pieces.Rook,
+                 pieces.Queen, pieces.King)
+
+
+def piece_code(piece):
+    """ Returns the board array code of a Piece or OpenSpace object."""
+    if piece.piece_type is None:
+        return 0
+    elif piece.color == "white":
+        return unit_codes[piece.unit]
+    else:
+        return -unit_codes[piece.unit]
+
+
+def board_to_array(board):
+    """ Returns the int8[64] board array of a chess.py board dictionary
+        (space ID keys, Piece/OpenSpace values).
+        """
+    return np.array([piece_code(board[space_id])
+                     for space_id in config.board_pos_id], dtype=np.int8)
+
+
+def boards_to_array(boards):
+    """ Returns the int8[N, 64] array of N board dictionaries."""
+    boards = list(boards)
+    return np.array([[piece_code(board[space_id])
+                      for space_id in config.board_pos_id]
+                     for board in boards],
+                    dtype=np.int8).reshape(len(boards),
+                                           len(config.board_pos_num))
+
+
+def array_to_board(board_array):
+    """ Returns a board dictionary of new Piece objects (and
+        pieces.EMPTY) for an int8[64] board array. Pieces of the same
+        type are numbered by column from the A column, as
+        Position.to_board() labels them. Pieces away from their starting
+        spaces are marked as having moved, so kings and rooks on their
+        starting spaces can castle.
+        """
+    board = {}
+    counts = [[0] * 6, [0] * 6]
+    for col_id in range(config.width):
+        for row_id in reversed(range(config.height)):
+            space_num = row_id * config.width + col_id
+            space_id = config.board_pos_id[space_num]
+            code = int(board_array[space_num])
+            if code == 0:
+                board[space_id] = pieces.EMPTY
+                continue
+            color = WHITE if code > 0 else BLACK
+            piece_type = abs(code) - 1
+            if piece_type == KING:
+                piece = pieces.King(colors[color], config.k_start[color],
+                                    space_id)
+                piece.has_moved = space_id != config.k_start[color]
+            else:
+                counts[color][piece_type] += 1
+                piece = piece_classes[piece_type](
+                    colors[color], counts[color][piece_type], space_id,
+                    space_id)
+                if piece_type == PAWN:
+                    piece.has_moved = row_id != piece.start_row_index
+                elif piece_type == ROOK:
+                    piece.has_moved = space_id not in \
+                        config.r_start[2 * color:2 * color + 2]
+            board[space_id] = piece
+    return board
+
+
+def array_to_position(board_array, turn=WHITE):
+    """ Returns a Position with the pieces of an int8[64] board array and
+        turn to move. Castling rights and en passant are not part of a
+        board array, so the Position has none.
+        """
+    position = Position()
+    for space_num in np.flatnonzero(board_array):
+        code = int(board_array[space_num])
+        position.put_piece(int(space_num), WHITE if code > 0 else BLACK,
+                           abs(code) - 1)
+    position.turn = turn
+    position.key = position.compute_key()
+    return position
+
+
+def material_counts(boards):
+    """ Returns an int[N, 2, 6] array of how many pieces of each color
+        and piece type are on each of an int8[N, 64] stack of boards.
+        """
+    codes = np.array([[piece_type + 1 for piece_type in range(6)],
+                      [-(piece_type + 1) for piece_type in range(6)]],
+                     dtype=np.int8)
+    # Compare every space with every code at once: [N, 64, 1, 1] against
+    # [2, 6] broadcasts to [N, 64, 2, 6], then count down the spaces
+    return (boards[:, :, None, None] == codes).sum(axis=1)
+
+
+def piece_masks(boards, color, piece_type):
+    """ Returns a bool[N, 64] array marking the spaces holding color's
+        pieces of piece_type on each board.
+        """
+    code = piece_type + 1 if color == WHITE else -(piece_type + 1)
+    return boards == code
+
+
+def attack_matrix(attack_bits):
+    """ Returns a float32[64, 64] array with [n, m] set to 1 if a piece on
+        space n attacks space m, from a tuple of attack bitboards such as
+        config.knight_attacks. float32 rather than bool so that products
+        with it are handed to the fast BLAS matrix multiply.
+        """
+    matrix = np.zeros((len(config.board_pos_num),
+                       len(config.board_pos_num)), dtype=np.float32)
+    for space_num, bits in enumerate(attack_bits):
+        for target in squares(bits):
+            matrix[space_num, target] = 1
+    return matrix
+
+
+def step_sources(col_vector, row_vector):
+    """ Returns an int[64] array giving, for each space, the space one
+        step back along (col_vector, row_vector), or 64 if that step
+        would leave the board. Used to move a whole board of marked
+        spaces one step along a ray at once.
+        """
+    sources = np.full(len(config.board_pos_num), len(config.board_pos_num))
+    for space_num in config.board_pos_num:
+        targets = config.ray_targets(space_num, col_vector, row_vector)
+        if targets:
+            sources[targets[0]] = space_num
+    return sources
+
+
+# Made on first use by attacked_masks()
+attack_tables = None
+
+
+def build_attack_tables():
+    return {"pawn": (attack_matrix(config.pawn_attacks[WHITE]),
+                     attack_matrix(config.pawn_attacks[BLACK])),
+            "knight": attack_matrix(config.knight_attacks),
+            "king": attack_matrix(config.king_attacks),
+            "steps": [step_sources(col_vector, row_vector)
+                      for col_vector, row_vector in config.ray_vectors]}
+
+
+def attacked_masks(boards, color):
+    """ Returns a bool[N, 64] array marking every space attacked by
+        color's pieces on each of an int8[N, 64] stack of boards.
+
+        Pawns, knights and kings attack fixed spaces, so their attacks
+        are one matrix product of the spaces they stand on with an
+        attack matrix. Bishops, rooks and queens are traced along each
+        ray for every board at once: the set of ray ends moves one step
+        at a time, and stops once it reaches an occupied space.
+        """
+    global attack_tables
+    if attack_tables is None:
+        attack_tables = build_attack_tables()
+    sign = 1 if color == WHITE else -1
+    board_count = len(boards)
+    attacked = np.zeros((board_count, len(config.board_pos_num)),
+                        dtype=bool)
+    for piece_type, matrix in ((PAWN, attack_tables["pawn"][color]),
+                               (KNIGHT, attack_tables["knight"]),
+                               (KING, attack_tables["king"])):
+        on_spaces = boards == sign * (piece_type + 1)
+        attacked |= on_spaces.astype(np.float32) @ matrix > 0
+    # An extra always-False column (space 64) stands for off the board
+    empty = np.zeros((board_count, len(config.board_pos_num) + 1),
+                     dtype=bool)
+    empty[:, :-1] = boards == 0
+    ray_ends = np.zeros_like(empty)
+    for rays, slider_types in ((config.rook_rays, (ROOK, QUEEN)),
+                               (config.bishop_rays, (BISHOP, QUEEN))):
+        sliders = np.isin(boards, [sign * (piece_type + 1)
+                                   for piece_type in slider_types])
+        for ray in rays:
+            sources = attack_tables["steps"][ray]
+            ray_ends[:, :-1] = sliders
+            for _ in range(max(config.width, config.height) - 1):
+                ray_ends[:, :-1] = ray_ends[:, sources]
+                attacked |= ray_ends[:, :-1]
+                # Rays carry on only through open spaces
+                ray_ends &= empty
+                if not ray_ends.any():
+                    break
+    return attacked
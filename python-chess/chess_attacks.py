@@ -0,0 +1,136 @@
+""" Defines AttackMaps, which keeps count of how many pieces of each color
+    attack every space of a Position and updates those counts after each
+    move by recomputing only the pieces the move could have affected.
+    """
+import chess_config as config
+from chess_position import (WHITE, BLACK, PAWN, KNIGHT, BISHOP, ROOK,
+                            QUEEN, KING, WHITE_KINGSIDE, WHITE_QUEENSIDE,
+                            EN_PASSANT, KINGSIDE_CASTLE, QUEENSIDE_CASTLE,
+                            castling_spaces, squares, rook_attacks,
+                            bishop_attacks, queen_attacks)
+
+
+def piece_attacks(position, space_num):
+    """ Returns the bitboard of spaces attacked by the piece on space_num,
+        including spaces holding friendly pieces, or 0 if it is open.
+        """
+    piece = position.mailbox[space_num]
+    if piece is None:
+        return 0
+    color, piece_type = piece
+    if piece_type == PAWN:
+        return config.pawn_attacks[color][space_num]
+    elif piece_type == KNIGHT:
+        return config.knight_attacks[space_num]
+    elif piece_type == KING:
+        return config.king_attacks[space_num]
+    elif piece_type == BISHOP:
+        return bishop_attacks(space_num, position.all_occupied)
+    elif piece_type == ROOK:
+        return rook_attacks(space_num, position.all_occupied)
+    else:
+        return queen_attacks(space_num, position.all_occupied)
+
+
+def changed_spaces(move, color):
+    """ Returns the bitboard of spaces whose contents an encoded move
+        (played by color) changes: the spaces moved from and to, the
+        space of a pawn taken en passant and the castling rook's spaces.
+        The same spaces change when the move is taken back.
+        """
+    from_num = move & 63
+    to_num = move >> 6 & 63
+    flag = move >> 12
+    spaces = config.board_bits[from_num] | config.board_bits[to_num]
+    if flag == EN_PASSANT:
+        spaces |= config.board_bits[from_num // config.width * config.width
+                                    + to_num % config.width]
+    elif flag == KINGSIDE_CASTLE or flag == QUEENSIDE_CASTLE:
+        castle_flag = (WHITE_KINGSIDE if flag == KINGSIDE_CASTLE
+                       else WHITE_QUEENSIDE) << 2 * color
+        rook_from, rook_to = castling_spaces[castle_flag][2:]
+        spaces |= config.board_bits[rook_from] | config.board_bits[rook_to]
+    return spaces
+
+
+class AttackMaps:
+    """ Attack counts for both colors of a Position. counts[color][n] is
+        the number of color's pieces attacking space n, so testing
+        whether a space is attacked (for check, or castling through
+        check) is a single list lookup. attacks[n] and owners[n] keep
+        the bitboard of spaces attacked by the piece on space n and that
+        piece's color, so its counts can be taken back out when it moves
+        or its rays change.
+        """
+
+    def __init__(self, position):
+        self.counts = [[0] * len(config.board_pos_num),
+                       [0] * len(config.board_pos_num)]
+        self.attacks = [0] * len(config.board_pos_num)
+        self.owners = [None] * len(config.board_pos_num)
+        for space_num in squares(position.all_occupied):
+            self.add_piece(position, space_num)
+
+    def add_piece(self, position, space_num):
+        """ Counts the attacks of the piece now on space_num, if any."""
+        piece = position.mailbox[space_num]
+        if piece is None:
+            return
+        attacks = piece_attacks(position, space_num)
+        color_counts = self.counts[piece[0]]
+        for target in squares(attacks):
+            color_counts[target] += 1
+        self.attacks[space_num] = attacks
+        self.owners[space_num] = piece[0]
+
+    def remove_piece(self, space_num):
+        """ Takes the recorded attacks of the piece on space_num back out
+            of the counts.
+            """
+        color = self.owners[space_num]
+        if color is None:
+            return
+        color_counts = self.counts[color]
+        for target in squares(self.attacks[space_num]):
+            color_counts[target] -= 1
+        self.attacks[space_num] = 0
+        self.owners[space_num] = None
+
+    def update(self, position, spaces):
+        """ Brings the counts up to date after the contents of the spaces
+            in the bitboard spaces have changed (see changed_spaces()),
+            with position already showing the change. Works the same for
+            a move played or taken back.
+
+            Only two groups of pieces can have had their attacks change:
+            1) Pieces moved, taken or placed on the changed spaces.
+            2) Bishops, rooks and queens whose rays reached a changed
+               space. A ray that stopped at a space that has emptied
+               now runs further, and one that passed over a space that
+               has filled now stops there. Either way the changed space
+               was in the slider's recorded attacks.
+            Knights, kings and pawns elsewhere attack the same spaces no
+            matter what moves around them.
+            """
+        for space_num in squares(spaces):
+            self.remove_piece(space_num)
+        sliders = 0
+        for color in (WHITE, BLACK):
+            pieces = position.pieces[color]
+            sliders |= pieces[BISHOP] | pieces[ROOK] | pieces[QUEEN]
+        for space_num in squares(sliders & ~spaces):
+            if self.attacks[space_num] & spaces:
+                self.remove_piece(space_num)
+                self.add_piece(position, space_num)
+        for space_num in squares(spaces):
+            self.add_piece(position, space_num)
+
+    def is_attacked(self, space_num, by_color):
+        return self.counts[by_color][space_num] > 0
+
+    def attacked_spaces(self, color):
+        """ Returns the bitboard of every space attacked by color."""
+        counts = self.counts[color]
+        return sum(config.board_bits[space_num]
+                   for space_num in config.board_pos_num
+                   if counts[space_num])
@@ -0,0 +1,225 @@
+""" An opening book: the moves played from each position near the start
+    of a collection of games, for the computer player to choose from
+    instantly, rather than searching, while the game is still in
+    well-known territory.
+
+    Positions are found by their Zobrist key (see chess_position), so
+    the same position is found however the game got there. The book is
+    a file of (key, move, weight) entries sorted by key, read through
+    mmap and searched by bisection, so a lookup reads a handful of
+    entries of the file whatever its size, and the file is only read
+    from disk as far as lookups need it.
+
+    File layout (all numbers little-endian):
+    header        magic, version, entry count
+    keys          the Zobrist key of every entry, in increasing order
+    moves         the encoded move (see chess_position.encode_move()) and
+                  weight of every entry, in the same order as the keys
+    Keys are kept apart from the moves so that they can be searched in
+    place, as one array of 64-bit numbers.
+
+    Run with: python chess_book.py BOOK ARCHIVE [ARCHIVE ...] [--plies N]
+    to build BOOK from PGN files (.pgn) and game stores (.store).
+    """
+import argparse
+import bisect
+import collections
+import mmap
+import random
+import struct
+import sys
+import time
+from array import array
+
+import chess_config as config
+import chess_pgn
+import chess_store
+from chess_movegen import generate_legal_moves
+from chess_position import Position
+
+magic = b"PYCHBOOK"
+version = 1
+header_format = struct.Struct("<8sII")
+# The move and weight of each entry, after the keys
+entry_format = struct.Struct("<HH")
+max_weight = 0xFFFF
+
+
+def archive_games(file_name, plies):
+    """ Yields the Zobrist key and encoded move of each of the first
+        plies moves of every game of a PGN file or game store, as
+        (key, move) pairs, for as far into each game as its moves could
+        be read.
+        """
+    if file_name.endswith(".store"):
+        # Stores hold the key of every position, so nothing needs to be
+        # played out
+        with chess_store.GameStore(file_name) as store:
+            for game_num in range(len(store)):
+                for ply, move in enumerate(store.moves(game_num)[:plies]):
+                    yield store.key(game_num, ply), move
+    else:
+        for game in chess_pgn.read_pgn_file(file_name):
+            if not game["moves"]:
+                continue
+            position = Position.from_fen(game["start_fen"])
+            for move in game["moves"][:plies]:
+                yield position.key, move
+                position.make_move(move)
+
+
+def count_book_moves(archives, plies=config.book_plies):
+    """ Returns a Counter of how many times each (key, move) pair was
+        played in the first plies moves of the games of archives (a list
+        of file names, see archive_games()).
+        """
+    counts = collections.Counter()
+    for file_name in archives:
+        counts.update(archive_games(file_name, plies))
+    return counts
+
+
+def write_book(file_name, counts, min_count=1):
+    """ Writes a book of the (key, move) pairs of counts played at least
+        min_count times, weighted by the times played (up to max_weight).
+        Returns the number of entries written.
+        """
+    entries = sorted((key, move, min(count, max_weight))
+                     for (key, move), count in counts.items()
+                     if count >= min_count)
+    keys = array("Q", (key for key, move, weight in entries))
+    moves = array("H")
+    for key, move, weight in entries:
+        moves.append(move)
+        moves.append(weight)
+    if sys.byteorder == "big":
+        keys.byteswap()
+        moves.byteswap()
+    with open(file_name, "wb") as book_file:
+        book_file.write(header_format.pack(magic, version, len(entries)))
+        book_file.write(keys.tobytes())
+        book_file.write(moves.tobytes())
+    return len(entries)
+
+
+def build_book(file_name, archives, plies=config.book_plies, min_count=1):
+    """ Builds a book from the first plies moves of the games of
+        archives. Returns the number of entries written.
+        """
+    return write_book(file_name, count_book_moves(archives, plies),
+                      min_count)
+
+
+class OpeningBook:
+    """ Reads a book file written by write_book(). Raises ValueError if
+        the file is not a book. Can be used as a context manager.
+        """
+
+    def __init__(self, file_name):
+        self.book_file = open(file_name, "rb")
+        try:
+            self.data = mmap.mmap(self.book_file.fileno(), 0,
+                                  access=mmap.ACCESS_READ)
+        except ValueError:
+            # mmap can't map an empty file
+            self.book_file.close()
+            raise ValueError(f"{file_name} is not an opening book")
+        file_magic, file_version, self.entry_count = \
+            header_format.unpack_from(self.data)
+        if file_magic != magic or file_version != version:
+            self.data.close()
+            self.book_file.close()
+            raise ValueError(f"{file_name} is not an opening book")
+        keys_start = header_format.size
+        self.moves_start = keys_start + 8 * self.entry_count
+        if sys.byteorder == "little":
+            # A view of the keys straight out of the file, which bisect
+            # searches like a list without anything being copied
+            self.keys = memoryview(self.data)[keys_start:
+                                              self.moves_start].cast("Q")
+        else:
+            self.keys = array("Q", self.data[keys_start:self.moves_start])
+            self.keys.byteswap()
+
+    def __len__(self):
+        return self.entry_count
+
+    def lookup(self, key):
+        """ Returns a list of (move, weight) pairs of the book moves for
+            the position with Zobrist key key, empty if there are none.
+            """
+        first = bisect.bisect_left(self.keys, key)
+        found = []
+        entry_num = first
+        while entry_num < self.entry_count and self.keys[entry_num] == key:
+            found.append(entry_format.unpack_from(
+                self.data, self.moves_start + entry_format.size * entry_num))
+            entry_num += 1
+        return found
+
+    def choose_move(self, position, rng=random):
+        """ Returns a book move for position, picked at random with the
+            moves played more often picked more often, or None if the
+            book has none. Moves that are not legal in position (which
+            can only happen if two positions share a key) are skipped.
+            """
+        found = self.lookup(position.key)
+        if not found:
+            return None
+        legal_moves = set(generate_legal_moves(position))
+        found = [(move, weight) for move, weight in found
+                 if move in legal_moves]
+        if not found:
+            return None
+        moves, weights = zip(*found)
+        return rng.choices(moves, weights)[0]
+
+    def close(self):
+        if isinstance(self.keys, memoryview):
+            # The mmap can't be closed while the view into it is open
+            self.keys.release()
+        if not self.data.closed:
+            self.data.close()
+        self.book_file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+# Opened on first use by default_book()
+default_book_cache = None
+
+
+def default_book():
+    """ Returns the OpeningBook in config.opening_book_file, opened once
+        and shared by every game, or None if there is no book there.
+        """
+    global default_book_cache
+    if default_book_cache is None:
+        try:
+            default_book_cache = OpeningBook(config.opening_book_file)
+        except (OSError, ValueError):
+            # Not looked for again
+            default_book_cache = False
+    return default_book_cache or None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Builds an opening book from PGN files and game "
+                    "stores.")
+    parser.add_argument("book")
+    parser.add_argument("archives", nargs="+")
+    parser.add_argument("--plies", type=int, default=config.book_plies,
+                        help="moves of each game to add to the book")
+    parser.add_argument("--min-count", type=int, default=1,
+                        help="leave out moves played fewer times")
+    args = parser.parse_args()
+    start = time.perf_counter()
+    entry_total = build_book(args.book, args.archives, args.plies,
+                             args.min_count)
+    print(f"Wrote {entry_total} book entries in "
+          f"{time.perf_counter() - start:.3f} s")
@@ -0,0 +1,259 @@
+""" Sends the moves of a game to any number of spectators as they are
+    played, for watching games without a console of their own.
+
+    Each move goes out as a small update rather than the whole board:
+    (MOVE, ply, move), where move is the 16-bit encoded move of
+    chess_position.encode_move(), holding the spaces moved from and to,
+    any special move (castling, en passant, double pawn push) and the
+    piece a pawn promotes to. A spectator plays the moves on its own
+    Position to follow the game. (KEYFRAME, ply, fen) updates give the
+    whole position instead, and (END, ply, result) ends the game.
+
+    Every spectator has its own asyncio.Queue of at most max_queue
+    updates. A spectator that falls that far behind has its queue
+    emptied and replaced with a single keyframe of the current position,
+    so it skips ahead rather than holding up the game or using more and
+    more memory. Publishing a move never waits on spectators.
+
+    Run with: python chess_broadcast.py [SPECTATORS]
+    to play a random game to SPECTATORS watchers (a tenth of them slow)
+    and report what publishing cost the game.
+    """
+import asyncio
+import random
+import sys
+import time
+
+import chess
+import chess_config as config
+from chess_movegen import generate_legal_moves
+from chess_position import Position, PROMOTION, units
+
+MOVE, KEYFRAME, END = 0, 1, 2
+
+
+def position_ply(position):
+    """ Returns the number of plies played before position since the
+        very start of the game (0 before white's first move).
+        """
+    return 2 * (position.fullmove_number - 1) + position.turn
+
+
+class Spectator:
+    """ One watcher of a GameBroadcast, made by GameBroadcast.subscribe().
+        Updates are read with "await spectator.get()" or
+        "async for update in spectator", which stops after the END
+        update.
+        """
+
+    def __init__(self, broadcast, max_queue):
+        # Room for a keyframe and the END update after it
+        if max_queue < 2:
+            raise ValueError("max_queue must be at least 2")
+        self.broadcast = broadcast
+        self.queue = asyncio.Queue(max_queue)
+        # Updates thrown away when the queue was full
+        self.dropped = 0
+        # Times the queue was full and replaced with a keyframe
+        self.keyframes = 0
+        # Set once the END update has been read
+        self.finished = False
+
+    def send(self, update):
+        """ Adds an update to the queue without waiting. If the queue is
+            full, what is in it is replaced with a keyframe of the
+            current position, which covers update unless it is END.
+            """
+        try:
+            self.queue.put_nowait(update)
+            return
+        except asyncio.QueueFull:
+            pass
+        while not self.queue.empty():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.keyframes += 1
+        self.queue.put_nowait(self.broadcast.keyframe())
+        if update[0] == END:
+            self.queue.put_nowait(update)
+        else:
+            self.dropped += 1
+
+    async def get(self):
+        return await self.queue.get()
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if self.finished:
+            raise StopAsyncIteration
+        update = await self.queue.get()
+        # Nothing follows the end of the game
+        self.finished = update[0] == END
+        return update
+
+    def close(self):
+        self.broadcast.unsubscribe(self)
+
+
+class GameBroadcast:
+    """ Sends the updates of one game to its spectators. The game calls
+        publish_move() after each move and publish_keyframe() when the
+        position changes any other way (a move taken back, or a game
+        loaded), passing its Position after the change. chess.Game does
+        this itself when given a broadcast (see Game.broadcast).
+        """
+
+    def __init__(self, position, max_queue=64):
+        # Checked here too, so a bad default fails before any spectator
+        # subscribes
+        if max_queue < 2:
+            raise ValueError("max_queue must be at least 2")
+        self.max_queue = max_queue
+        self.position = position
+        self.spectators = set()
+        # FEN of self.position, made when a keyframe is first needed and
+        # shared by every spectator that needs one until the next update
+        self.fen = None
+        self.ended = None
+        # Time the game has spent in publish_move()/publish_keyframe()
+        self.publishes = 0
+        self.publish_time = 0.0
+
+    def subscribe(self, max_queue=None):
+        """ Returns a new Spectator, whose first update is a keyframe of
+            the game as it stands. Raises ValueError if max_queue is less
+            than 2.
+            """
+        spectator = Spectator(self, self.max_queue if max_queue is None
+                              else max_queue)
+        spectator.send(self.keyframe())
+        if self.ended is not None:
+            spectator.send(self.ended)
+        self.spectators.add(spectator)
+        return spectator
+
+    def unsubscribe(self, spectator):
+        self.spectators.discard(spectator)
+
+    def keyframe(self):
+        if self.fen is None:
+            self.fen = self.position.to_fen()
+        return KEYFRAME, position_ply(self.position), self.fen
+
+    def send(self, update):
+        start = time.perf_counter()
+        for spectator in self.spectators:
+            spectator.send(update)
+        self.publishes += 1
+        self.publish_time += time.perf_counter() - start
+
+    def publish_move(self, position, move):
+        """ Sends move, just played, leaving position. position may be
+            a different object from the last one published, ie. after
+            the game was reloaded.
+            """
+        self.position = position
+        self.fen = None
+        # The ply the move was played at, not the one after it
+        self.send((MOVE, position_ply(position) - 1, move))
+
+    def publish_keyframe(self, position):
+        self.position = position
+        self.fen = None
+        self.send(self.keyframe())
+
+    def close(self, result="*"):
+        """ Ends the broadcast with the game's result. Spectators that
+            subscribe later get the final position and the result.
+            """
+        self.ended = (END, position_ply(self.position), result)
+        self.send(self.ended)
+
+
+async def watch_game(spectator, on_update=None):
+    """ Follows a game from a Spectator's updates until it ends,
+        returning the final Position and the result. on_update, if
+        given, is called with each update and the Position after it, and
+        may be a coroutine function (to show the board, or to act slow).
+        """
+    position = None
+    async for update in spectator:
+        kind, ply, value = update
+        if kind == KEYFRAME:
+            position = Position.from_fen(value)
+        elif kind == MOVE:
+            position.make_move(value)
+        if on_update is not None:
+            shown = on_update(update, position)
+            if asyncio.iscoroutine(shown):
+                await shown
+        if kind == END:
+            return position, value
+
+
+async def play_random_game(game, max_plies=200, seed=None):
+    """ Plays random legal moves in game until it ends or max_plies moves
+        have been played, letting other tasks run after each move as a
+        game served over a network would. Returns the game's result.
+        """
+    rng = random.Random(seed)
+    for _ in range(max_plies):
+        moves = generate_legal_moves(game.position)
+        if not moves:
+            break
+        move = rng.choice(moves)
+        promote_to = units[(move >> 12 & 3) + 1] \
+            if move >> 12 & PROMOTION else None
+        piece = game.board[config.board_pos_id[move & 63]].display
+        problem = game.play_move(piece, config.board_pos_id[move >> 6 & 63],
+                                 promote_to)
+        if problem is not None:
+            raise RuntimeError(problem)
+        await asyncio.sleep(0)
+    return game.result() or "*"
+
+
+async def run_broadcast_benchmark(spectator_total, max_plies=200):
+    """ Plays a random game to spectator_total spectators, one in ten of
+        which take a millisecond over each update, and checks that they
+        all end on the game's final position.
+        """
+    game = chess.Game()
+    broadcast = GameBroadcast(game.position)
+    game.broadcast = broadcast
+
+    async def slow(update, position):
+        await asyncio.sleep(0.001)
+
+    watchers = [asyncio.ensure_future(watch_game(
+        broadcast.subscribe(), slow if watcher % 10 == 0 else None))
+        for watcher in range(spectator_total)]
+    spectators = list(broadcast.spectators)
+    start = time.perf_counter()
+    result = await play_random_game(game, max_plies, seed=1)
+    elapsed = time.perf_counter() - start
+    broadcast.close(result)
+    finals = await asyncio.gather(*watchers)
+    final_fen = game.position.to_fen()
+    behind = sum(position.to_fen() != final_fen for position, _ in finals)
+    plies = len(game.move_history)
+    print(f"{plies} plies to {spectator_total} spectators in "
+          f"{elapsed:.3f} s ({1000 * elapsed / max(plies, 1):.3f} ms a "
+          f"move, other tasks included)")
+    print(f"Publishing took {1000 * broadcast.publish_time:.3f} ms in "
+          f"all, {1e6 * broadcast.publish_time / broadcast.publishes:.1f} "
+          f"us a move")
+    print(f"Keyframes sent to slow spectators: "
+          f"{sum(spectator.keyframes for spectator in spectators)}, "
+          f"updates dropped: "
+          f"{sum(spectator.dropped for spectator in spectators)}")
+    print(f"Spectators not on the final position: {behind}")
+    return behind == 0
+
+
+if __name__ == "__main__":
+    spectator_total = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    sys.exit(0 if asyncio.run(run_broadcast_benchmark(spectator_total))
+             else 1)
@@ -1,51 +1,209 @@
-height = 8
-width = 8
-col = ("A", "B", "C", "D", "E", "F", "G", "H")
-row = ("8", "7", "6", "5", "4", "3", "2", "1")
-# Logic of board color: odd row + odd column = black, even row + even
-# column = black (if "A" was 1, "B" was 2, etc.), rest of the spaces
-# are white. However, since range(n) values start at 0 rather than 1,
-# odd rows/columns use % 2 == 0 and even rows/columns use % 2 != 0 to
-# describe their position. row_id range is reversed due to printing
-# board from top (row 8) to bottom (row 1).
-board_color = tuple(" " if col_id % 2 == 0 and row_id % 2 == 0
-                    or col_id % 2 != 0 and row_id % 2 != 0 else "#"
-                    for col_id in range(width)
-                    for row_id in reversed(range(height)))
-board_pos_id = tuple([(col[col_id] + row[row_id])
-                      for row_id in range(height)
-                      for col_id in range(width)])
-board_pos_num = tuple(range(len(board_pos_id)))
-board_pos = dict(zip(board_pos_id, board_pos_num))
-open_space_start = tuple(col[col_id] + row[row_id]
-                         for col_id in range(width)
-                         for row_id in range(2, 6))
-# Start and name variables: initial letter is the piece unit ID
-# start == the spaces those pieces begin a game at
-# names == keys for pieces dictionary
-p_start = ("A2", "B2", "C2", "D2", "E2", "F2", "G2", "H2",
-           "A7", "B7", "C7", "D7", "E7", "F7", "G7", "H7"
-           )
-r_start = ("A1", "H1", "A8", "H8")
-n_start = ("B1", "G1", "B8", "G8")
-s_start = ("C1", "F1", "C8", "F8")
-q_start = ("D1", "D8")
-k_start = ("E1", "E8")
-p_names = ("WP1", "WP2", "WP3", "WP4", "WP5", "WP6", "WP7", "WP8",
-           "BP1", "BP2", "BP3", "BP4", "BP5", "BP6", "BP7", "BP8"
-           )
-r_names = ("WR1", "WR2", "BR1", "BR2")
-n_names = ("WN1", "WN2", "BN1", "BN2")
-s_names = ("WS1", "WS2", "BS1", "BS2")
-q_names = ("WQ1", "BQ1")
-k_names = ("WKG", "BKG")
-white_attacked_spaces = {"WP1": ["B3"], "WP8": ["G3"],
-                         "WP2": ["A3", "C3"], "WP3": ["B3", "D3"],
-                         "WP4": ["C3", "E3"], "WP5": ["D3", "F3"],
-                         "WP6": ["E3", "G3"], "WP7": ["F3", "H3"],
-                         "WN1": ["A3", "C3"], "WN2": ["F3", "H3"]}
-black_attacked_spaces = {"BP1": ["B6"], "BP8": ["G6"],
-                         "BP2": ["A6", "C6"], "BP3": ["B6", "D6"],
-                         "BP4": ["C6", "E6"], "BP5": ["D6", "F6"],
-                         "BP6": ["E6", "G6"], "BP7": ["F6", "H6"],
-                         "BN1": ["A6", "C6"], "BN2": ["F6", "H6"]}
\ No newline at end of file
+height = 8
+width = 8
+col = ("A", "B", "C", "D", "E", "F", "G", "H")
+row = ("8", "7", "6", "5", "4", "3", "2", "1")
+# Logic of board color: odd row + odd column = black, even row + even
+# column = black (if "A" was 1, "B" was 2, etc.), rest of the spaces
+# are white. However, since range(n) values start at 0 rather than 1,
+# odd rows/columns use % 2 == 0 and even rows/columns use % 2 != 0 to
+# describe their position. row_id range is reversed due to printing
+# board from top (row 8) to bottom (row 1).
+board_color = tuple(" " if col_id % 2 == 0 and row_id % 2 == 0
+                    or col_id % 2 != 0 and row_id % 2 != 0 else "#"
+                    for col_id in range(width)
+                    for row_id in reversed(range(height)))
+board_pos_id = tuple([(col[col_id] + row[row_id])
+                      for row_id in range(height)
+                      for col_id in range(width)])
+board_pos_num = tuple(range(len(board_pos_id)))
+board_pos = dict(zip(board_pos_id, board_pos_num))
+# Bitboards: a 64-bit integer in which bit n stands for the space
+# board_pos_id[n] (bit 0 is A8, bit 63 is H1). A set bit means the
+# space belongs to the set being described, ie. "spaces holding white
+# pawns" or "spaces a rook attacks". col_bits[n] and row_bits[n] cover
+# every space of column col[n] and row row[n] respectively.
+all_board_bits = (1 << len(board_pos_num)) - 1
+board_bits = tuple(1 << pos_num for pos_num in board_pos_num)
+col_bits = tuple(sum(board_bits[row_id * width + col_id]
+                     for row_id in range(height))
+                 for col_id in range(width))
+row_bits = tuple(sum(board_bits[row_id * width + col_id]
+                     for col_id in range(width))
+                 for row_id in range(height))
+# Light spaces (A8, B7, ... H1), for telling apart bishops that can
+# never meet
+light_bits = sum(board_bits[row_id * width + col_id]
+                 for row_id in range(height)
+                 for col_id in range(width)
+                 if (row_id + col_id) % 2 == 0)
+# Attack tables for pieces that jump to fixed offsets (knights, kings
+# and pawn captures). Each table is indexed by space number, as given
+# by board_pos, and is built once here rather than on every
+# legal_move() call. *_attacks tables hold bitboards of the reachable
+# spaces, *_spaces tables hold the same spaces as tuples of space IDs.
+# Vectors are (col_vector, row_vector) pairs, and since rows are
+# indexed from row 8 downward a row_vector of -1 moves toward row 8.
+knight_vectors = ((1, -2), (2, -1), (2, 1), (1, 2),
+                  (-1, 2), (-2, 1), (-2, -1), (-1, -2))
+king_vectors = ((0, -1), (1, 0), (0, 1), (-1, 0),
+                (1, -1), (1, 1), (-1, 1), (-1, -1))
+# Index 0 holds white pawns (moving toward row 8), index 1 black pawns
+pawn_row_vectors = (-1, 1)
+
+
+def space_ids_of(bits):
+    """ Returns the space IDs of the set bits of a bitboard, in
+        board_pos_id order.
+        """
+    return tuple(pos_id for pos_id, bit in zip(board_pos_id, board_bits)
+                 if bits & bit)
+
+
+def vector_targets(pos_num, vectors):
+    """ Returns the space numbers reached from pos_num by each vector,
+        skipping any that would leave the board.
+        """
+    col_id, row_id = pos_num % width, pos_num // width
+    return tuple((row_id + row_vector) * width + col_id + col_vector
+                 for col_vector, row_vector in vectors
+                 if 0 <= col_id + col_vector < width
+                 and 0 <= row_id + row_vector < height)
+
+
+def pawn_push_vectors(pos_num, row_vector):
+    """ Pawns move one space forward, or two from their starting row."""
+    if pos_num // width == (1 if row_vector == 1 else height - 2):
+        return (0, row_vector), (0, 2 * row_vector)
+    return ((0, row_vector),)
+
+
+knight_targets = tuple(vector_targets(pos_num, knight_vectors)
+                       for pos_num in board_pos_num)
+king_targets = tuple(vector_targets(pos_num, king_vectors)
+                     for pos_num in board_pos_num)
+pawn_attack_targets = tuple(
+    tuple(vector_targets(pos_num, ((-1, row_vector), (1, row_vector)))
+          for pos_num in board_pos_num)
+    for row_vector in pawn_row_vectors)
+pawn_push_targets = tuple(
+    tuple(vector_targets(pos_num, pawn_push_vectors(pos_num, row_vector))
+          for pos_num in board_pos_num)
+    for row_vector in pawn_row_vectors)
+knight_attacks = tuple(sum(board_bits[target] for target in targets)
+                       for targets in knight_targets)
+king_attacks = tuple(sum(board_bits[target] for target in targets)
+                     for targets in king_targets)
+pawn_attacks = tuple(tuple(sum(board_bits[target] for target in targets)
+                           for targets in color_targets)
+                     for color_targets in pawn_attack_targets)
+knight_spaces = tuple(tuple(board_pos_id[target] for target in targets)
+                      for targets in knight_targets)
+king_spaces = tuple(tuple(board_pos_id[target] for target in targets)
+                    for targets in king_targets)
+pawn_attack_spaces = tuple(tuple(tuple(board_pos_id[target]
+                                       for target in targets)
+                                 for targets in color_targets)
+                           for color_targets in pawn_attack_targets)
+pawn_push_spaces = tuple(tuple(tuple(board_pos_id[target]
+                                     for target in targets)
+                               for targets in color_targets)
+                         for color_targets in pawn_push_targets)
+# Ray tables for sliding pieces (rooks, bishops and queens). The first
+# four ray_vectors point toward higher space numbers and the last four
+# toward lower ones, with each direction's opposite 4 places away.
+# ray_attacks[direction][n] holds every space from space n to the edge
+# of the board in that direction. Blocked rays are found from these in
+# chess_position by cutting each ray at its first occupied space.
+ray_vectors = ((1, 0), (0, 1), (1, 1), (-1, 1),
+               (-1, 0), (0, -1), (-1, -1), (1, -1))
+rook_rays = (0, 1, 4, 5)
+bishop_rays = (2, 3, 6, 7)
+
+
+def ray_targets(pos_num, col_vector, row_vector):
+    """ Returns the space numbers from pos_num to the edge of the board
+        in the direction of (col_vector, row_vector), nearest first.
+        """
+    col_id, row_id = pos_num % width, pos_num // width
+    targets = []
+    while 0 <= col_id + col_vector < width \
+            and 0 <= row_id + row_vector < height:
+        col_id += col_vector
+        row_id += row_vector
+        targets.append(row_id * width + col_id)
+    return tuple(targets)
+
+
+ray_attacks = tuple(tuple(sum(board_bits[target]
+                              for target in ray_targets(pos_num,
+                                                        col_vector,
+                                                        row_vector))
+                          for pos_num in board_pos_num)
+                    for col_vector, row_vector in ray_vectors)
+rook_spaces = tuple(space_ids_of(sum(ray_attacks[ray][pos_num]
+                                     for ray in rook_rays))
+                    for pos_num in board_pos_num)
+bishop_spaces = tuple(space_ids_of(sum(ray_attacks[ray][pos_num]
+                                       for ray in bishop_rays))
+                      for pos_num in board_pos_num)
+queen_spaces = tuple(rook_spaces[pos_num] + bishop_spaces[pos_num]
+                     for pos_num in board_pos_num)
+
+
+def build_between_bits():
+    """ Builds between_bits by walking each ray out from every space
+        once, adding up the spaces passed on the way, rather than
+        searching the rays again for each of the 4096 pairs of spaces
+        (which took most of the time of importing this module).
+        """
+    table = [[0] * len(board_pos_num) for _ in board_pos_num]
+    for from_num in board_pos_num:
+        for col_vector, row_vector in ray_vectors:
+            path = 0
+            for target in ray_targets(from_num, col_vector, row_vector):
+                table[from_num][target] = path
+                path |= board_bits[target]
+    return tuple(tuple(to_bits) for to_bits in table)
+
+
+# between_bits[a][b] is every space strictly between spaces a and b (0
+# for spaces not in line). Pins, blocking a check and castling paths
+# all need this, so it is looked up rather than traced along a ray.
+between_bits = build_between_bits()
+open_space_start = tuple(col[col_id] + row[row_id]
+                         for col_id in range(width)
+                         for row_id in range(2, 6))
+# Megabytes of memory given to the computer player's transposition
+# table (see chess_tt.py)
+transposition_table_mb = 16
+# Processes the computer player searches with. More than one searches
+# on that many cores at once, sharing one transposition table (see
+# chess_smp.py)
+search_workers = 1
+# Opening book the computer player takes its first moves from, if the
+# file exists (see chess_book.py), and how many moves into each game
+# the book is built from and used for
+opening_book_file = "opening.book"
+book_plies = 20
+# Directory of the endgame tablebases the computer player uses once few
+# enough pieces are left, if it exists (see chess_tablebase.py)
+tablebase_dir = "tablebases"
+# Start and name variables: initial letter is the piece unit ID
+# start == the spaces those pieces begin a game at
+# names == keys for pieces dictionary
+p_start = ("A2", "B2", "C2", "D2", "E2", "F2", "G2", "H2",
+           "A7", "B7", "C7", "D7", "E7", "F7", "G7", "H7"
+           )
+r_start = ("A1", "H1", "A8", "H8")
+n_start = ("B1", "G1", "B8", "G8")
+s_start = ("C1", "F1", "C8", "F8")
+q_start = ("D1", "D8")
+k_start = ("E1", "E8")
+p_names = ("WP1", "WP2", "WP3", "WP4", "WP5", "WP6", "WP7", "WP8",
+           "BP1", "BP2", "BP3", "BP4", "BP5", "BP6", "BP7", "BP8"
+           )
+r_names = ("WR1", "WR2", "BR1", "BR2")
+n_names = ("WN1", "WN2", "BN1", "BN2")
+s_names = ("WS1", "WS2", "BS1", "BS2")
+q_names = ("WQ1", "BQ1")
+k_names = ("WKG", "BKG")
@@ -0,0 +1,216 @@
+""" Scores chess positions for the computer player. The score is material
+    plus a bonus or penalty for the space each piece stands on, blended
+    between middlegame and endgame values by how much material is left
+    (a "tapered" evaluation), so that the king, for example, hides in
+    the corner early on and walks to the center once the queens are off.
+
+    evaluate() scores a single Position for chess_search. evaluate_many()
+    scores a large set of positions at once with numpy array operations,
+    for offline analysis, and gives exactly the same scores.
+    """
+import chess_config as config
+from chess_position import WHITE, BLACK, units, squares
+
+# (middlegame, endgame) centipawn value of each piece, keyed by the
+# Piece.unit codes in chess_pieces.py
+piece_values = {"P": (82, 94), "N": (337, 281), "S": (365, 297),
+                "R": (477, 512), "Q": (1025, 936), "KG": (0, 0)}
+# How much each piece counts toward the game being in the middlegame.
+# All the starting pieces add up to max_phase; with none left the
+# endgame values are used alone.
+phase_weights = {"P": 0, "N": 1, "S": 1, "R": 2, "Q": 4, "KG": 0}
+max_phase = 24
+
+# Piece-square tables: (middlegame, endgame) bonuses for a white piece
+# on each space, laid out as the board is printed (A8 first, H1 last)
+# so each table's index is the space number. Black pieces use the space
+# mirrored across the middle of the board (space_num ^ 56).
+pawn_table = (0, 0, 0, 0, 0, 0, 0, 0,
+              50, 50, 50, 50, 50, 50, 50, 50,
+              10, 10, 20, 30, 30, 20, 10, 10,
+              5, 5, 10, 25, 25, 10, 5, 5,
+              0, 0, 0, 20, 20, 0, 0, 0,
+              5, -5, -10, 0, 0, -10, -5, 5,
+              5, 10, 10, -20, -20, 10, 10, 5,
+              0, 0, 0, 0, 0, 0, 0, 0)
+# Passed pawns matter more in the endgame, the closer to promotion the
+# better
+pawn_endgame_table = (0, 0, 0, 0, 0, 0, 0, 0,
+                      80, 80, 80, 80, 80, 80, 80, 80,
+                      50, 50, 50, 50, 50, 50, 50, 50,
+                      30, 30, 30, 30, 30, 30, 30, 30,
+                      20, 20, 20, 20, 20, 20, 20, 20,
+                      10, 10, 10, 10, 10, 10, 10, 10,
+                      0, 0, 0, 0, 0, 0, 0, 0,
+                      0, 0, 0, 0, 0, 0, 0, 0)
+knight_table = (-50, -40, -30, -30, -30, -30, -40, -50,
+                -40, -20, 0, 0, 0, 0, -20, -40,
+                -30, 0, 10, 15, 15, 10, 0, -30,
+                -30, 5, 15, 20, 20, 15, 5, -30,
+                -30, 0, 15, 20, 20, 15, 0, -30,
+                -30, 5, 10, 15, 15, 10, 5, -30,
+                -40, -20, 0, 5, 5, 0, -20, -40,
+                -50, -40, -30, -30, -30, -30, -40, -50)
+bishop_table = (-20, -10, -10, -10, -10, -10, -10, -20,
+                -10, 0, 0, 0, 0, 0, 0, -10,
+                -10, 0, 5, 10, 10, 5, 0, -10,
+                -10, 5, 5, 10, 10, 5, 5, -10,
+                -10, 0, 10, 10, 10, 10, 0, -10,
+                -10, 10, 10, 10, 10, 10, 10, -10,
+                -10, 5, 0, 0, 0, 0, 5, -10,
+                -20, -10, -10, -10, -10, -10, -10, -20)
+rook_table = (0, 0, 0, 0, 0, 0, 0, 0,
+              5, 10, 10, 10, 10, 10, 10, 5,
+              -5, 0, 0, 0, 0, 0, 0, -5,
+              -5, 0, 0, 0, 0, 0, 0, -5,
+              -5, 0, 0, 0, 0, 0, 0, -5,
+              -5, 0, 0, 0, 0, 0, 0, -5,
+              -5, 0, 0, 0, 0, 0, 0, -5,
+              0, 0, 0, 5, 5, 0, 0, 0)
+queen_table = (-20, -10, -10, -5, -5, -10, -10, -20,
+               -10, 0, 0, 0, 0, 0, 0, -10,
+               -10, 0, 5, 5, 5, 5, 0, -10,
+               -5, 0, 5, 5, 5, 5, 0, -5,
+               0, 0, 5, 5, 5, 5, 0, -5,
+               -10, 5, 5, 5, 5, 5, 0, -10,
+               -10, 0, 5, 0, 0, 0, 0, -10,
+               -20, -10, -10, -5, -5, -10, -10, -20)
+# The king shelters behind its pawns in the middlegame...
+king_table = (-30, -40, -40, -50, -50, -40, -40, -30,
+              -30, -40, -40, -50, -50, -40, -40, -30,
+              -30, -40, -40, -50, -50, -40, -40, -30,
+              -30, -40, -40, -50, -50, -40, -40, -30,
+              -20, -30, -30, -40, -40, -30, -30, -20,
+              -10, -20, -20, -20, -20, -20, -20, -10,
+              20, 20, 0, 0, 0, 0, 20, 20,
+              20, 30, 10, 0, 0, 10, 30, 20)
+# ...and joins in from the center in the endgame
+king_endgame_table = (-50, -40, -30, -20, -20, -30, -40, -50,
+                      -30, -20, -10, 0, 0, -10, -20, -30,
+                      -30, -10, 20, 30, 30, 20, -10, -30,
+                      -30, -10, 30, 40, 40, 30, -10, -30,
+                      -30, -10, 30, 40, 40, 30, -10, -30,
+                      -30, -10, 20, 30, 30, 20, -10, -30,
+                      -30, -30, 0, 0, 0, 0, -30, -30,
+                      -50, -30, -30, -30, -30, -30, -30, -50)
+piece_square_tables = {"P": (pawn_table, pawn_endgame_table),
+                       "N": (knight_table, knight_table),
+                       "S": (bishop_table, bishop_table),
+                       "R": (rook_table, rook_table),
+                       "Q": (queen_table, queen_table),
+                       "KG": (king_table, king_endgame_table)}
+
+
+def build_score_tables(stage):
+    """ Returns score_tables[color][piece_type][space_num]: the piece's
+        value plus its piece-square bonus for the middlegame (stage 0)
+        or endgame (stage 1), negated for black so that scores add up
+        from white's point of view.
+        """
+    score_tables = ([], [])
+    for color, sign, mirror in ((WHITE, 1, 0), (BLACK, -1, 56)):
+        for unit in units:
+            value = piece_values[unit][stage]
+            table = piece_square_tables[unit][stage]
+            score_tables[color].append(
+                tuple(sign * (value + table[space_num ^ mirror])
+                      for space_num in config.board_pos_num))
+    return score_tables
+
+
+middlegame_scores = build_score_tables(0)
+endgame_scores = build_score_tables(1)
+phase_values = tuple(phase_weights[unit] for unit in units)
+
+
+def evaluate(position):
+    """ Returns the score of position in centipawns from the point of
+        view of the side to move.
+        """
+    middlegame = 0
+    endgame = 0
+    phase = 0
+    for color in (WHITE, BLACK):
+        color_middlegame = middlegame_scores[color]
+        color_endgame = endgame_scores[color]
+        for piece_type, bits in enumerate(position.pieces[color]):
+            type_middlegame = color_middlegame[piece_type]
+            type_endgame = color_endgame[piece_type]
+            for space_num in squares(bits):
+                middlegame += type_middlegame[space_num]
+                endgame += type_endgame[space_num]
+                phase += phase_values[piece_type]
+    # Promotions can take the phase past its starting value
+    phase = min(phase, max_phase)
+    score = (middlegame * phase
+             + endgame * (max_phase - phase)) // max_phase
+    return -score if position.turn else score
+
+
+def build_code_tables():
+    """ Returns the middlegame and endgame scores and phase weights as
+        numpy arrays indexed by [code + 6, space_num], where code is a
+        chess_array board code (so row 6 is the open space, all zeros).
+        """
+    import numpy as np
+    codes = range(-6, 7)
+    middlegame = np.zeros((len(codes), len(config.board_pos_num)),
+                          dtype=np.int32)
+    endgame = np.zeros_like(middlegame)
+    phase = np.zeros(len(codes), dtype=np.int32)
+    for row, code in enumerate(codes):
+        if code == 0:
+            continue
+        color = WHITE if code > 0 else BLACK
+        piece_type = abs(code) - 1
+        middlegame[row] = middlegame_scores[color][piece_type]
+        endgame[row] = endgame_scores[color][piece_type]
+        phase[row] = phase_values[piece_type]
+    return middlegame, endgame, phase
+
+
+# Made on first use by evaluate_boards()
+code_tables = None
+
+
+def evaluate_boards(boards, turns=None):
+    """ Scores an int8[N, 64] array of chess_array boards at once,
+        returning an int32[N] array of centipawn scores. Scores are from
+        the point of view of the side to move given by the int8[N] turns
+        array, or from white's point of view if turns is None.
+        """
+    # numpy is imported here rather than at the top, since importing it
+    # takes several times longer than the rest of the game's start-up
+    # and only evaluate_many() and evaluate_boards() need it
+    try:
+        import numpy as np
+    except ImportError as err:
+        raise ImportError("evaluate_boards() needs numpy") from err
+    global code_tables
+    if code_tables is None:
+        code_tables = build_code_tables()
+    middlegame_table, endgame_table, phase_table = code_tables
+    rows = boards.astype(np.intp) + 6
+    space_nums = np.arange(boards.shape[1])
+    # Fancy indexing picks out table[code + 6, space_num] for every
+    # space of every board, giving [N, 64] arrays to sum along each row
+    middlegame = middlegame_table[rows, space_nums].sum(axis=1)
+    endgame = endgame_table[rows, space_nums].sum(axis=1)
+    phase = np.minimum(phase_table[rows].sum(axis=1), max_phase)
+    scores = (middlegame * phase
+              + endgame * (max_phase - phase)) // max_phase
+    if turns is not None:
+        scores = np.where(turns == BLACK, -scores, scores)
+    return scores.astype(np.int32)
+
+
+def evaluate_many(positions):
+    """ Returns an int32 numpy array of the evaluate() score of each of
+        positions, computed with array operations over all of them at
+        once rather than one position at a time.
+        """
+    # Imported here since chess_array needs numpy, which evaluate() does
+    # not
+    import chess_array
+    boards, turns = chess_array.positions_to_array(positions)
+    return evaluate_boards(boards, turns)
@@ -0,0 +1,179 @@
+""" Converts between FEN (Forsyth-Edwards Notation) strings and the board
+    dictionary of chess.py, so games can be saved and loaded, and started
+    from any position rather than only from the starting spaces in
+    chess_config.
+
+    The FEN fields themselves are read and written by
+    chess_position.Position. This module maps a Position to new Piece
+    objects, carrying castling rights and en passant over into the
+    has_moved, two_space_move and last_turn_moved attributes chess.py
+    uses, and the side to move and move number into turn_count.
+    """
+import chess_config as config
+import chess_pieces as pieces
+from chess_position import (WHITE, BLACK, PAWN, ROOK, KING, WHITE_KINGSIDE,
+                            WHITE_QUEENSIDE, BLACK_KINGSIDE, Position,
+                            castling_spaces, colors, fen_letters)
+
+# Piece classes of chess_pieces by piece type
+piece_classes = (pieces.Pawn, pieces.Knight, pieces.Bishop, pieces.Rook,
+                 pieces.Queen, pieces.King)
+# Bitboard of the spaces of rows 8 and 1, where no pawn can stand
+end_rows = 0xFF | 0xFF << 56
+# Every castling field a FEN can have: "-", or the letters of the rights
+# in the order KQkq
+castling_fields = {"-"} | {"".join(letter for bit, letter
+                                   in enumerate("KQkq") if rights >> bit & 1)
+                           for rights in range(1, 16)}
+# Move counters are plain digits, with no sign or spaces as int() allows
+counter_digits = set("0123456789")
+
+
+def position_to_board(position):
+    """ Returns a board dictionary of new Piece objects (and pieces.EMPTY)
+        for a Position, along with the matching turn_count.
+
+        Pieces of the same type are numbered by column from the A
+        column, which gives the usual labels (WP1 on A2, WR2 on H1, ...)
+        in the starting position. A king or rook only counts as unmoved
+        if the Position still has the castling right that needs it, and
+        a pawn if it is on its starting row. A pawn that can be taken en
+        passant is marked as having just made its two-space move.
+        """
+    turn_count = 2 * (position.fullmove_number - 1) + position.turn
+    board = {}
+    counts = [[0] * 6, [0] * 6]
+    for col_id in range(config.width):
+        for row_id in reversed(range(config.height)):
+            space_num = row_id * config.width + col_id
+            space_id = config.board_pos_id[space_num]
+            piece = position.mailbox[space_num]
+            if piece is None:
+                board[space_id] = pieces.EMPTY
+                continue
+            color, piece_type = piece
+            color_rights = (WHITE_KINGSIDE | WHITE_QUEENSIDE) << 2 * color
+            if piece_type == KING:
+                piece_obj = pieces.King(colors[color],
+                                        config.k_start[color], space_id)
+                piece_obj.has_moved = not (
+                    space_id == config.k_start[color]
+                    and position.castling & color_rights)
+            else:
+                counts[color][piece_type] += 1
+                piece_obj = piece_classes[piece_type](
+                    colors[color], counts[color][piece_type], space_id,
+                    space_id)
+            if piece_type == ROOK:
+                # r_start lists each color's queenside rook first
+                queenside, kingside = config.r_start[2 * color:
+                                                     2 * color + 2]
+                flag = (WHITE_QUEENSIDE if space_id == queenside
+                        else WHITE_KINGSIDE if space_id == kingside
+                        else 0) << 2 * color
+                piece_obj.has_moved = not position.castling & flag
+            elif piece_type == PAWN:
+                piece_obj.has_moved = row_id != piece_obj.start_row_index
+                if position.ep_space is not None and space_num \
+                        == position.ep_space + piece_obj.row_vector \
+                        * config.width:
+                    piece_obj.two_space_move = True
+                    piece_obj.last_turn_moved = turn_count
+            board[space_id] = piece_obj
+    return board, turn_count
+
+
+def fen_fields_readable(fields):
+    """ Returns True if the fields of a FEN (split on spaces) are all
+        well formed: eight rows of eight spaces, "w" or "b" to move,
+        castling rights of "-" or some of "KQkq" in that order, an en
+        passant space or "-", and, if given, a halfmove clock of 0 or
+        more and a move number of 1 or more. Position.from_fen() fills
+        in anything missing without complaint, so this is checked
+        first.
+        """
+    if len(fields) not in (4, 6):
+        return False
+    rows = fields[0].split("/")
+    if len(rows) != config.height:
+        return False
+    for row_text in rows:
+        spaces = 0
+        for char in row_text:
+            if char in "12345678":
+                spaces += int(char)
+            elif char.lower() in fen_letters:
+                spaces += 1
+            else:
+                return False
+        if spaces != config.width:
+            return False
+    if fields[1] not in ("w", "b"):
+        return False
+    if fields[2] not in castling_fields:
+        return False
+    if fields[3] != "-" and fields[3].upper() not in config.board_pos:
+        return False
+    if len(fields) == 6 and not (counter_digits.issuperset(fields[4])
+                                 and counter_digits.issuperset(fields[5])
+                                 and int(fields[5]) >= 1):
+        return False
+    return True
+
+
+def fen_to_board(fen):
+    """ Parses a FEN string into a dictionary of "board" (see
+        position_to_board()), "turn_count", "halfmove_clock" (moves
+        since the last pawn move or capture, for the fifty-move rule)
+        and "position", the Position read from the FEN.
+        Raises ValueError if the FEN cannot be read, or describes a
+        position that can't come up in a game: a side without exactly
+        one king, castling rights for a king or rook that isn't on its
+        starting space, the side not to move in check, a pawn on the
+        first or last row, or an en passant space with no pawn to take.
+        """
+    if not fen_fields_readable(fen.split()):
+        raise ValueError(f"Not a valid FEN: {fen!r}")
+    position = Position.from_fen(fen)
+    if bin(position.pieces[WHITE][KING]).count("1") != 1 \
+            or bin(position.pieces[BLACK][KING]).count("1") != 1:
+        raise ValueError(f"Each side needs exactly one king: {fen!r}")
+    # Castling needs the king and the rook on their starting spaces
+    for flag, (king_num, _, rook_num, _) in castling_spaces.items():
+        color = WHITE if flag < BLACK_KINGSIDE else BLACK
+        if position.castling & flag \
+                and (position.mailbox[king_num] != (color, KING)
+                     or position.mailbox[rook_num] != (color, ROOK)):
+            raise ValueError(f"Castling rights without the king and rook "
+                             f"on their starting spaces: {fen!r}")
+    # The side that just moved can't have left its own king in check
+    if position.is_in_check(position.turn ^ 1):
+        raise ValueError(f"The side not to move is in check: {fen!r}")
+    if (position.pieces[WHITE][PAWN] | position.pieces[BLACK][PAWN]) \
+            & end_rows:
+        raise ValueError(f"Pawns can't stand on the first or last row: "
+                         f"{fen!r}")
+    # The en passant space is the one the last move's pawn passed over,
+    # on row 6 for white to move and row 3 for black, and the pawn
+    # stands one space past it as seen by the side to move
+    if position.ep_space is not None:
+        ep_row = 2 if position.turn == WHITE else 5
+        pawn_num = position.ep_space + (config.width
+                                        if position.turn == WHITE
+                                        else -config.width)
+        if position.ep_space // config.width != ep_row \
+                or position.mailbox[pawn_num] != (position.turn ^ 1, PAWN):
+            raise ValueError(f"No pawn can be taken en passant: {fen!r}")
+    board, turn_count = position_to_board(position)
+    return {"board": board, "turn_count": turn_count,
+            "halfmove_clock": position.halfmove_clock,
+            "position": position}
+
+
+def board_to_fen(board, turn_count, halfmove_clock=0):
+    """ Returns the FEN string of a chess.py board dictionary, with the
+        side to move and move number taken from turn_count.
+        """
+    position = Position.from_board(board, turn_count)
+    position.halfmove_clock = halfmove_clock
+    return position.to_fen()
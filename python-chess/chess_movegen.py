@@ -0,0 +1,221 @@
+""" Generates every legal move in a Position, including castling, en
+    passant and promotion, as encoded move integers (see
+    chess_position.encode_move()). Also provides perft(), which counts
+    the positions reachable in a given number of moves and is used by
+    chess_perft.py to check the generator and measure its speed.
+    """
+import chess_config as config
+from chess_position import (WHITE, PAWN, KNIGHT, BISHOP, ROOK, QUEEN,
+                            WHITE_KINGSIDE, WHITE_QUEENSIDE, QUIET,
+                            DOUBLE_PUSH, KINGSIDE_CASTLE, QUEENSIDE_CASTLE,
+                            CAPTURE, EN_PASSANT, PROMOTION,
+                            CAPTURE_PROMOTION, castling_spaces, squares,
+                            rook_attacks, bishop_attacks)
+
+# Pieces a pawn can promote to, queen first since it is nearly always
+# the best choice
+promotion_types = (QUEEN, KNIGHT, ROOK, BISHOP)
+# Results of game_state()
+ONGOING, CHECKMATE, STALEMATE = range(3)
+
+
+def find_pins(position, color):
+    """ Returns a dictionary of the space numbers of color's pieces that
+        are pinned to their king, each mapped to the bitboard of spaces
+        the piece can still move to (the spaces between the king and
+        the pinning piece, plus the pinning piece itself).
+        """
+    king_num = position.king_space(color)
+    enemy = position.pieces[color ^ 1]
+    own = position.occupied[color]
+    # Enemy sliders that would attack the king on an empty board are
+    # the only pieces that could pin something.
+    snipers = (rook_attacks(king_num, 0) & (enemy[ROOK] | enemy[QUEEN])
+               | bishop_attacks(king_num, 0)
+               & (enemy[BISHOP] | enemy[QUEEN]))
+    pins = {}
+    for sniper_num in squares(snipers):
+        path = config.between_bits[king_num][sniper_num]
+        blockers = path & position.all_occupied
+        # Pinned if exactly one piece is in the way, and it is ours
+        if blockers and not blockers & (blockers - 1) and blockers & own:
+            pins[blockers.bit_length() - 1] = \
+                path | config.board_bits[sniper_num]
+    return pins
+
+
+def add_pawn_moves(moves, from_num, to_num, flag, promotion_row):
+    """ Adds a pawn move, or one move per promotion piece if the pawn
+        reaches the last row.
+        """
+    if to_num // config.width == promotion_row:
+        base_flag = CAPTURE_PROMOTION if flag == CAPTURE else PROMOTION
+        for piece_type in promotion_types:
+            moves.append(from_num | to_num << 6
+                         | (base_flag | piece_type - 1) << 12)
+    else:
+        moves.append(from_num | to_num << 6 | flag << 12)
+
+
+def generate_legal_moves(position):
+    """ Returns a list of every legal move for the side to move.
+
+        Rather than trying each move and undoing it if the king is left
+        in check, moves are filtered as they are generated:
+        1) The king may only move to spaces the enemy does not attack,
+           found with the king lifted off the board so that it cannot
+           hide behind itself from a sliding piece.
+        2) In double check only the king can move.
+        3) In single check other pieces must take the checking piece
+           or block the line between it and the king.
+        4) Pinned pieces may only move along the line of the pin.
+        En passant, which removes two pieces from one row at once, is
+        checked directly against the enemy sliders.
+        """
+    color = position.turn
+    enemy_color = color ^ 1
+    own_pieces = position.pieces[color]
+    own = position.occupied[color]
+    enemy = position.occupied[enemy_color]
+    occupied = position.all_occupied
+    king_num = position.king_space(color)
+    king_bit = config.board_bits[king_num]
+    moves = []
+
+    # Spaces the enemy attacks with our king removed from the board
+    occupied_without_king = occupied ^ king_bit
+    danger = 0
+    enemy_pieces = position.pieces[enemy_color]
+    for space_num in squares(enemy_pieces[PAWN]):
+        danger |= config.pawn_attacks[enemy_color][space_num]
+    for space_num in squares(enemy_pieces[KNIGHT]):
+        danger |= config.knight_attacks[space_num]
+    for space_num in squares(enemy_pieces[BISHOP] | enemy_pieces[QUEEN]):
+        danger |= bishop_attacks(space_num, occupied_without_king)
+    for space_num in squares(enemy_pieces[ROOK] | enemy_pieces[QUEEN]):
+        danger |= rook_attacks(space_num, occupied_without_king)
+    danger |= config.king_attacks[position.king_space(enemy_color)]
+
+    for to_num in squares(config.king_attacks[king_num] & ~own & ~danger):
+        flag = CAPTURE if enemy & config.board_bits[to_num] else QUIET
+        moves.append(king_num | to_num << 6 | flag << 12)
+
+    checkers = position.attackers_to(king_num, enemy_color)
+    if checkers & (checkers - 1):
+        return moves
+    if checkers:
+        checker_num = checkers.bit_length() - 1
+        target_mask = checkers \
+            | config.between_bits[king_num][checker_num]
+    else:
+        target_mask = config.all_board_bits
+        # Castling: not out of, through or into check, with the spaces
+        # between the king and rook open
+        for castle_flag, flag in ((WHITE_KINGSIDE, KINGSIDE_CASTLE),
+                                  (WHITE_QUEENSIDE, QUEENSIDE_CASTLE)):
+            castle_flag <<= 2 * color
+            if not position.castling & castle_flag:
+                continue
+            king_from, king_to, rook_from, _ = castling_spaces[castle_flag]
+            king_path = config.between_bits[king_from][king_to] \
+                | config.board_bits[king_to]
+            if not config.between_bits[king_from][rook_from] & occupied \
+                    and not king_path & danger:
+                moves.append(king_from | king_to << 6 | flag << 12)
+
+    pins = find_pins(position, color)
+    available = ~own & target_mask
+
+    for piece_type, attacks in ((KNIGHT, None), (BISHOP, bishop_attacks),
+                                (ROOK, rook_attacks), (QUEEN, None)):
+        for from_num in squares(own_pieces[piece_type]):
+            if piece_type == KNIGHT:
+                targets = config.knight_attacks[from_num]
+            elif piece_type == QUEEN:
+                targets = rook_attacks(from_num, occupied) \
+                    | bishop_attacks(from_num, occupied)
+            else:
+                targets = attacks(from_num, occupied)
+            targets &= available
+            if from_num in pins:
+                targets &= pins[from_num]
+            for to_num in squares(targets):
+                flag = CAPTURE if enemy & config.board_bits[to_num] \
+                    else QUIET
+                moves.append(from_num | to_num << 6 | flag << 12)
+
+    # Pawns: white pawns move toward row 8 (lower space numbers)
+    forward = -config.width if color == WHITE else config.width
+    promotion_row = 0 if color == WHITE else config.height - 1
+    start_row = config.height - 2 if color == WHITE else 1
+    ep_space = position.ep_space
+    for from_num in squares(own_pieces[PAWN]):
+        pin_mask = pins.get(from_num, config.all_board_bits)
+        # Forward moves
+        to_num = from_num + forward
+        to_bit = config.board_bits[to_num]
+        if not occupied & to_bit:
+            if to_bit & target_mask & pin_mask:
+                add_pawn_moves(moves, from_num, to_num, QUIET,
+                               promotion_row)
+            if from_num // config.width == start_row:
+                to_num += forward
+                to_bit = config.board_bits[to_num]
+                if not occupied & to_bit and to_bit & target_mask \
+                        & pin_mask:
+                    moves.append(from_num | to_num << 6
+                                 | DOUBLE_PUSH << 12)
+        # Diagonal captures
+        attacks = config.pawn_attacks[color][from_num]
+        for to_num in squares(attacks & enemy & target_mask & pin_mask):
+            add_pawn_moves(moves, from_num, to_num, CAPTURE, promotion_row)
+        # En passant: the pawn taken is beside ours rather than on
+        # ep_space, so test the board as it would be after the move
+        # for sliders attacking the king.
+        if ep_space is not None and attacks & config.board_bits[ep_space]:
+            taken_num = ep_space - forward
+            after = occupied ^ config.board_bits[from_num] \
+                ^ config.board_bits[taken_num] \
+                ^ config.board_bits[ep_space]
+            if checkers and not checkers & config.board_bits[taken_num] \
+                    and not target_mask & config.board_bits[ep_space]:
+                continue
+            if rook_attacks(king_num, after) \
+                    & (enemy_pieces[ROOK] | enemy_pieces[QUEEN]) \
+                    or bishop_attacks(king_num, after) \
+                    & (enemy_pieces[BISHOP] | enemy_pieces[QUEEN]):
+                continue
+            moves.append(from_num | ep_space << 6 | EN_PASSANT << 12)
+    return moves
+
+
+def game_state(position):
+    """ Returns the legal moves for the side to move along with ONGOING,
+        CHECKMATE or STALEMATE. Mate and stalemate are both just an
+        empty move list, told apart by whether the king is in check, so
+        this costs one attack query on the king's space on top of the
+        move generation the caller needs anyway.
+        """
+    moves = generate_legal_moves(position)
+    if moves:
+        return moves, ONGOING
+    elif position.is_in_check():
+        return moves, CHECKMATE
+    else:
+        return moves, STALEMATE
+
+
+def perft(position, depth):
+    """ Counts the move sequences of length depth from position. The
+        last level is counted from the length of the move list rather
+        than by playing each move.
+        """
+    moves = generate_legal_moves(position)
+    if depth <= 1:
+        return len(moves) if depth == 1 else 1
+    nodes = 0
+    for move in moves:
+        undo = position.make_move(move)
+        nodes += perft(position, depth - 1)
+        position.unmake_move(move, undo)
+    return nodes
@@ -0,0 +1,69 @@
+""" Perft benchmark for chess_movegen. Counts the positions reachable from
+    a set of standard reference positions and compares them with the
+    published counts, reporting nodes per second for each so
+    move-generation speed can be tracked between releases.
+
+    Run with: python chess_perft.py [max_depth]
+    """
+import sys
+import time
+
+from chess_movegen import perft
+from chess_position import Position, start_fen
+
+# (name, FEN, {depth: expected node count}). The counts come from the
+# Chess Programming Wiki's perft results page, and together these
+# positions cover castling, en passant, promotion, pins and checks.
+reference_positions = (
+    ("start", start_fen,
+     {1: 20, 2: 400, 3: 8902, 4: 197281, 5: 4865609}),
+    ("kiwipete",
+     "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1",
+     {1: 48, 2: 2039, 3: 97862, 4: 4085603}),
+    ("position 3", "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1",
+     {1: 14, 2: 191, 3: 2812, 4: 43238, 5: 674624}),
+    ("position 4",
+     "r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1",
+     {1: 6, 2: 264, 3: 9467, 4: 422333}),
+    ("position 5",
+     "rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8",
+     {1: 44, 2: 1486, 3: 62379, 4: 2103487}),
+    ("position 6",
+     "r4rk1/1pp1qppp/p1np1n2/2b1p1B1/2B1P1b1/P1NP1N2/1PP1QPPP/R4RK1 w - - "
+     "0 10",
+     {1: 46, 2: 2079, 3: 89890, 4: 3894594}),
+)
+
+
+def run_perft_suite(max_depth=3):
+    """ Runs perft on every reference position up to max_depth, printing
+        the node count, time and nodes per second of each run. Returns
+        True if every count matched.
+        """
+    all_passed = True
+    total_nodes = 0
+    total_time = 0.0
+    for name, fen, expected in reference_positions:
+        position = Position.from_fen(fen)
+        for depth in sorted(expected):
+            if depth > max_depth:
+                break
+            start = time.perf_counter()
+            nodes = perft(position, depth)
+            elapsed = time.perf_counter() - start
+            total_nodes += nodes
+            total_time += elapsed
+            passed = nodes == expected[depth]
+            all_passed = all_passed and passed
+            print(f"{name:<12} depth {depth}: {nodes:>9} nodes "
+                  f"{elapsed:8.3f} s {nodes / max(elapsed, 1e-9):>10.0f} "
+                  f"nodes/s {'ok' if passed else 'FAIL'} "
+                  f"(expected {expected[depth]})")
+    print(f"Total: {total_nodes} nodes in {total_time:.3f} s, "
+          f"{total_nodes / max(total_time, 1e-9):.0f} nodes/s")
+    return all_passed
+
+
+if __name__ == "__main__":
+    depth = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+    sys.exit(0 if run_perft_suite(depth) else 1)
@@ -0,0 +1,273 @@
+""" Reads and writes games in PGN (Portable Game Notation), the standard
+    format of chess game archives. Moves are written in SAN (Standard
+    Algebraic Notation, ie. "Nf3", "exd5", "O-O", "e8=Q+"), which only
+    names the piece and the space it moves to, so each move is worked
+    out by matching it against the legal moves from chess_movegen.
+
+    read_games() is a generator: it reads a file one line at a time and
+    hands back one game at a time, so only the game being read is ever
+    held in memory and archives of any size can be worked through.
+    write_game() appends one game at a time in the same way.
+    """
+import re
+
+import chess_config as config
+from chess_movegen import generate_legal_moves
+from chess_position import (PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING,
+                            CAPTURE, PROMOTION, KINGSIDE_CASTLE,
+                            QUEENSIDE_CASTLE, Position, start_fen)
+
+# SAN letter of each piece type (pawns have none)
+san_letters = ("", "N", "B", "R", "Q", "K")
+# Piece type of each SAN letter
+san_piece_types = {"N": KNIGHT, "B": BISHOP, "R": ROOK, "Q": QUEEN,
+                   "K": KING}
+# SAN for a piece move: piece letter (none for pawns), the column and/or
+# row moved from when needed to tell two pieces apart, "x" for a
+# capture, the space moved to and the piece a pawn promotes to
+san_pattern = re.compile(r"([NBRQK])?([a-h])?([1-8])?x?([a-h][1-8])"
+                         r"(?:=?([NBRQ]))?$")
+header_pattern = re.compile(r'\[(\w+)\s+"(.*)"\]')
+# A backslash in a tag value escapes the next character (\" or \\)
+escape_pattern = re.compile(r"\\(.)")
+# Movetext that is not a move: comments, NAGs ("$1", move annotation
+# codes) and move numbers ("12." or "12...")
+comment_pattern = re.compile(r"\{[^}]*\}|;[^\n]*")
+variation_pattern = re.compile(r"\([^()]*\)")
+number_pattern = re.compile(r"\$\d+|\d+\.(?:\.\.)?")
+results = ("1-0", "0-1", "1/2-1/2", "*")
+# The Seven Tag Roster, written in this order at the top of every game
+roster = ("Event", "Site", "Date", "Round", "White", "Black", "Result")
+
+
+def space_name(space_num):
+    """ Returns the SAN name of a space, ie. "e4"."""
+    return config.board_pos_id[space_num].lower()
+
+
+def move_to_san(position, move, legal_moves=None):
+    """ Returns the SAN of an encoded move, which must be legal in
+        position. legal_moves, the legal moves of position, can be
+        passed in if already known.
+        """
+    if legal_moves is None:
+        legal_moves = generate_legal_moves(position)
+    from_num = move & 63
+    to_num = move >> 6 & 63
+    flag = move >> 12
+    if flag == KINGSIDE_CASTLE:
+        san = "O-O"
+    elif flag == QUEENSIDE_CASTLE:
+        san = "O-O-O"
+    else:
+        piece_type = position.mailbox[from_num][1]
+        capture = "x" if flag & CAPTURE else ""
+        if piece_type == PAWN:
+            san = (space_name(from_num)[0] if capture else "") \
+                + capture + space_name(to_num)
+            if flag & PROMOTION:
+                san += "=" + san_letters[(flag & 3) + 1]
+        else:
+            # Other pieces of the same type that could also move to
+            # to_num decide how much of the from space has to be given
+            others = [other & 63 for other in legal_moves
+                      if other >> 6 & 63 == to_num and other != move
+                      and position.mailbox[other & 63][1] == piece_type]
+            from_name = space_name(from_num)
+            if not others:
+                disambiguation = ""
+            elif all(other % config.width != from_num % config.width
+                     for other in others):
+                disambiguation = from_name[0]
+            elif all(other // config.width != from_num // config.width
+                     for other in others):
+                disambiguation = from_name[1]
+            else:
+                disambiguation = from_name
+            san = san_letters[piece_type] + disambiguation + capture \
+                + space_name(to_num)
+    undo = position.make_move(move)
+    if position.is_in_check():
+        san += "+" if generate_legal_moves(position) else "#"
+    position.unmake_move(move, undo)
+    return san
+
+
+def san_to_move(position, san, legal_moves=None):
+    """ Returns the encoded move given by a SAN string in position.
+        Raises ValueError if it does not name exactly one legal move.
+        """
+    if legal_moves is None:
+        legal_moves = generate_legal_moves(position)
+    text = san.rstrip("+#!?")
+    if text in ("O-O", "0-0", "O-O-O", "0-0-0"):
+        flag = KINGSIDE_CASTLE if len(text) == 3 else QUEENSIDE_CASTLE
+        for move in legal_moves:
+            if move >> 12 == flag:
+                return move
+        raise ValueError(f"Illegal move {san}")
+    match = san_pattern.match(text)
+    if match is None:
+        raise ValueError(f"Not a move: {san}")
+    letter, from_col, from_row, to_name, promotion = match.groups()
+    to_num = config.board_pos[to_name.upper()]
+    piece_type = san_piece_types[letter] if letter else PAWN
+    promotion_type = san_piece_types[promotion] if promotion else None
+    found = None
+    for move in legal_moves:
+        from_num = move & 63
+        if move >> 6 & 63 != to_num \
+                or position.mailbox[from_num][1] != piece_type:
+            continue
+        from_name = space_name(from_num)
+        if from_col and from_name[0] != from_col \
+                or from_row and from_name[1] != from_row:
+            continue
+        flag = move >> 12
+        if flag & PROMOTION:
+            if (flag & 3) + 1 != promotion_type:
+                continue
+        elif promotion_type is not None:
+            continue
+        if found is not None:
+            raise ValueError(f"Ambiguous move {san}")
+        found = move
+    if found is None:
+        raise ValueError(f"Illegal move {san}")
+    return found
+
+
+def movetext_tokens(movetext):
+    """ Returns the moves and result of a game's movetext as a list of
+        strings, dropping comments, variations, NAGs and move numbers.
+        """
+    movetext = comment_pattern.sub(" ", movetext)
+    # Variations can be nested, so take out the innermost ones until
+    # none are left
+    while "(" in movetext:
+        stripped = variation_pattern.sub(" ", movetext)
+        if stripped == movetext:
+            break
+        movetext = stripped
+    return number_pattern.sub(" ", movetext).split()
+
+
+def make_game(headers, movetext_lines, resolve):
+    """ Builds the dictionary read_games() yields for one game."""
+    tokens = movetext_tokens("\n".join(movetext_lines))
+    if tokens and tokens[-1] in results:
+        result = tokens.pop()
+    else:
+        result = headers.get("Result", "*")
+    game = {"headers": headers, "san": tokens, "moves": [],
+            "result": result, "error": None,
+            "start_fen": headers.get("FEN", start_fen)}
+    if not resolve:
+        return game
+    try:
+        position = Position.from_fen(game["start_fen"])
+    except (IndexError, KeyError, ValueError):
+        game["error"] = f"Bad FEN {game['start_fen']!r}"
+        return game
+    moves = game["moves"]
+    for ply, san in enumerate(tokens):
+        try:
+            move = san_to_move(position, san)
+        except ValueError as error:
+            game["error"] = f"Move {ply // 2 + 1}: {error}"
+            break
+        position.make_move(move)
+        moves.append(move)
+    return game
+
+
+def read_games(pgn_lines, resolve=True):
+    """ Yields each game in pgn_lines (an open PGN file, or any iterable
+        of its lines) as a dictionary of:
+        "headers"    tag pairs, ie. {"White": "Morphy, Paul", ...}
+        "san"        the moves as written, in SAN
+        "moves"      the moves encoded for Position.make_move(), up to
+                     the first move that is not legal
+        "result"     "1-0", "0-1", "1/2-1/2" or "*"
+        "error"      None, or why a move could not be played
+        "start_fen"  the position the game starts from
+        With resolve=False moves are not checked or encoded, which is
+        much faster when only the headers or SAN are wanted.
+        """
+    headers = {}
+    movetext_lines = []
+    in_comment = False
+    for line in pgn_lines:
+        line = line.strip()
+        # A tag pair after movetext starts the next game. Lines inside
+        # a {comment} running over several lines are never tag pairs.
+        if line.startswith("[") and not in_comment:
+            if movetext_lines:
+                yield make_game(headers, movetext_lines, resolve)
+                headers = {}
+                movetext_lines = []
+            match = header_pattern.match(line)
+            if match is not None:
+                headers[match.group(1)] = \
+                    escape_pattern.sub(r"\1", match.group(2))
+        elif line and not line.startswith("%"):
+            movetext_lines.append(line)
+            if "{" in line or "}" in line:
+                in_comment = line.rfind("{") > line.rfind("}")
+    if movetext_lines or headers:
+        yield make_game(headers, movetext_lines, resolve)
+
+
+def read_pgn_file(file_name, resolve=True):
+    """ Yields the games of a PGN file (see read_games()). Files from
+        other programs are not always UTF-8, so unreadable characters
+        are replaced rather than stopping the read.
+        """
+    with open(file_name, encoding="utf-8", errors="replace") as pgn_file:
+        yield from read_games(pgn_file, resolve)
+
+
+def game_movetext(moves, result, fen=start_fen):
+    """ Returns the SAN movetext of a list of encoded moves played from
+        fen, with move numbers and the result, split into lines of at
+        most 79 characters.
+        """
+    position = Position.from_fen(fen)
+    words = []
+    for move in moves:
+        if position.turn == 0:
+            words.append(f"{position.fullmove_number}.")
+        elif not words:
+            words.append(f"{position.fullmove_number}...")
+        words.append(move_to_san(position, move))
+        position.make_move(move)
+    words.append(result)
+    lines = []
+    line = ""
+    for word in words:
+        if line and len(line) + 1 + len(word) > 79:
+            lines.append(line)
+            line = word
+        else:
+            line = f"{line} {word}" if line else word
+    lines.append(line)
+    return "\n".join(lines)
+
+
+def write_game(pgn_file, moves, result="*", headers=None, fen=start_fen):
+    """ Writes one game to an open PGN file: the Seven Tag Roster (with
+        "?" for any tags not in headers), any other headers, then the
+        moves. Games are written one at a time as they finish, so an
+        archive is built up without holding more than one game.
+        """
+    tags = dict.fromkeys(roster, "?")
+    tags.update(headers or {})
+    tags["Result"] = result
+    if fen != start_fen:
+        tags["SetUp"] = "1"
+        tags["FEN"] = fen
+    for name, value in tags.items():
+        escaped = value.replace("\\", "\\\\").replace('"', '\\"')
+        pgn_file.write(f'[{name} "{escaped}"]\n')
+    pgn_file.write("\n" + game_movetext(moves, result, fen) + "\n\n")
+    pgn_file.flush()
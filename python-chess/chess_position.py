@@ -0,0 +1,615 @@
+""" Defines the Position class, a bitboard representation of a chess game
+    state, along with the bitwise attack queries used by chess.py to
+    check for blocked moves and attacked spaces.
+    """
+import random
+
+import chess_config as config
+
+# Color and piece type numbers used to index Position.pieces. The unit
+# codes match the Piece.unit attributes in chess_pieces.py.
+WHITE, BLACK = 0, 1
+PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING = range(6)
+colors = ("white", "black")
+color_ids = ("W", "B")
+color_nums = {"white": WHITE, "black": BLACK}
+piece_types = ("pawn", "knight", "bishop", "rook", "queen", "king")
+piece_type_nums = dict(zip(piece_types, range(6)))
+units = ("P", "N", "S", "R", "Q", "KG")
+
+# Castling rights are kept as bit flags, one per king and side.
+WHITE_KINGSIDE, WHITE_QUEENSIDE = 1, 2
+BLACK_KINGSIDE, BLACK_QUEENSIDE = 4, 8
+# (king from, king to, rook from, rook to) space numbers for each right
+castling_spaces = {
+    flag: tuple(config.board_pos[space_id] for space_id in spaces)
+    for flag, spaces in ((WHITE_KINGSIDE, ("E1", "G1", "H1", "F1")),
+                         (WHITE_QUEENSIDE, ("E1", "C1", "A1", "D1")),
+                         (BLACK_KINGSIDE, ("E8", "G8", "H8", "F8")),
+                         (BLACK_QUEENSIDE, ("E8", "C8", "A8", "D8")))}
+# Rights kept when a move starts or ends on each space. Moving a king or
+# rook off its starting space, or taking a rook on it, loses the right.
+castling_masks = [15] * len(config.board_pos_num)
+for flag, (king_from, _, rook_from, _) in castling_spaces.items():
+    castling_masks[king_from] &= ~flag
+    castling_masks[rook_from] &= ~flag
+
+# Moves are packed into 16-bit integers: bits 0-5 hold the space number
+# moved from, bits 6-11 the space moved to and bits 12-15 a flag for
+# special moves. Promotion flags add the promoted piece type - 1 to
+# PROMOTION, or to CAPTURE_PROMOTION when a piece is also taken, so
+# (flag & 3) + 1 gives the new piece type.
+QUIET, DOUBLE_PUSH, KINGSIDE_CASTLE, QUEENSIDE_CASTLE = 0, 1, 2, 3
+CAPTURE, EN_PASSANT = 4, 5
+PROMOTION, CAPTURE_PROMOTION = 8, 12
+
+# Forsyth-Edwards Notation letters for each piece type (upper case for
+# white), and the standard starting position.
+fen_letters = ("p", "n", "b", "r", "q", "k")
+fen_castling = ((WHITE_KINGSIDE, "K"), (WHITE_QUEENSIDE, "Q"),
+                (BLACK_KINGSIDE, "k"), (BLACK_QUEENSIDE, "q"))
+start_fen = "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1"
+
+# Zobrist keys: a random 64-bit number for each piece type and color on
+# each space, for black to move, for each set of castling rights and
+# for each column an en passant space can be in. A position's key is
+# the XOR of the numbers for everything in it, so a move can update the
+# key by XORing out what it removes and XORing in what it adds. The
+# generator is seeded so that keys are the same in every process and
+# can be stored on disk.
+zobrist_random = random.Random(0x5EED)
+zobrist_pieces = tuple(tuple(tuple(zobrist_random.getrandbits(64)
+                                   for _ in config.board_pos_num)
+                             for piece_type in range(6))
+                       for color in (WHITE, BLACK))
+zobrist_turn = zobrist_random.getrandbits(64)
+zobrist_castling = tuple(zobrist_random.getrandbits(64) for _ in range(16))
+zobrist_ep_col = tuple(zobrist_random.getrandbits(64)
+                       for _ in range(config.width))
+
+# Shared (color, piece_type) tuples stored in Position.mailbox
+mailbox_pieces = tuple(tuple((color, piece_type) for piece_type in range(6))
+                       for color in (WHITE, BLACK))
+
+def sliding_attacks(space_num, occupied, rays):
+    """ Spaces reached by sliding from space_num along each of the rays
+        (indexes into config.ray_attacks) until the edge of the board or
+        the first occupied space, which is included as it may hold an
+        enemy piece. Each ray is cut at its first blocker by removing
+        the blocker's own ray in the same direction, so every direction
+        costs a lookup and a few bit operations rather than a walk.
+        """
+    attacks = 0
+    for ray in rays:
+        ray_bits = config.ray_attacks[ray][space_num]
+        blockers = ray_bits & occupied
+        if blockers:
+            # Rays 0-3 run toward higher space numbers, so the nearest
+            # blocker is the lowest set bit, otherwise it is the highest
+            if ray < 4:
+                blocker = (blockers & -blockers).bit_length() - 1
+            else:
+                blocker = blockers.bit_length() - 1
+            ray_bits ^= config.ray_attacks[ray][blocker]
+        attacks |= ray_bits
+    return attacks
+
+
+def rook_attacks(space_num, occupied):
+    return sliding_attacks(space_num, occupied, config.rook_rays)
+
+
+def bishop_attacks(space_num, occupied):
+    return sliding_attacks(space_num, occupied, config.bishop_rays)
+
+
+def queen_attacks(space_num, occupied):
+    return sliding_attacks(space_num, occupied,
+                           config.rook_rays + config.bishop_rays)
+
+
+def squares(bits):
+    """ Yields the space number of every set bit, lowest first."""
+    while bits:
+        low_bit = bits & -bits
+        yield low_bit.bit_length() - 1
+        bits ^= low_bit
+
+
+def encode_move(from_num, to_num, flag=QUIET):
+    return from_num | to_num << 6 | flag << 12
+
+
+def move_name(move):
+    """ Returns a move as the space IDs moved from and to, ex. "E2E4",
+        followed by the unit of the new piece for promotions, ex.
+        "E7E8Q".
+        """
+    name = config.board_pos_id[move & 63] + config.board_pos_id[move >> 6
+                                                                & 63]
+    if move >> 12 & PROMOTION:
+        name += units[(move >> 12 & 3) + 1]
+    return name
+
+
+def piece_label(color, piece_type, num_id=""):
+    """ Builds the 3-character display label used by the Piece classes."""
+    return color_ids[color] + units[piece_type] + str(num_id)
+
+
+class Position:
+    """ A chess position stored as one 64-bit bitboard per color and
+        piece type, plus occupancy masks for each color and the whole
+        board. mailbox mirrors the bitboards as a 64-element list of
+        (color, piece_type) tuples (None for an open space) so the piece
+        on a given space can be found without testing twelve bitboards.
+        """
+
+    def __init__(self):
+        self.pieces = [[0] * 6, [0] * 6]
+        self.occupied = [0, 0]
+        self.all_occupied = 0
+        self.mailbox = [None] * len(config.board_pos_num)
+        self.turn = WHITE
+        self.castling = 0
+        self.ep_space = None
+        self.halfmove_clock = 0
+        self.fullmove_number = 1
+        self.key = 0
+
+    @classmethod
+    def from_board(cls, board, turn_count=0):
+        """ Builds a Position from the board dictionary of chess.py (space
+            ID keys, Piece/OpenSpace values). Castling rights and the en
+            passant space are taken from the has_moved, two_space_move
+            and last_turn_moved attributes of the pieces.
+            """
+        position = cls()
+        for space_id, piece in board.items():
+            if piece.piece_type is None:
+                continue
+            color = color_nums[piece.color]
+            piece_type = piece_type_nums[piece.piece_type]
+            space_num = config.board_pos[space_id]
+            position.put_piece(space_num, color, piece_type)
+            # A pawn that made its two-space move on the last turn can
+            # be taken en passant on the space it moved through, as long
+            # as it is still standing where that move left it (a pawn
+            # that has moved on since keeps two_space_move set).
+            if piece_type == PAWN and piece.two_space_move \
+                    and piece.last_turn_moved == turn_count \
+                    and space_num // config.width \
+                    == piece.start_row_index + 2 * piece.row_vector:
+                position.ep_space = space_num - piece.row_vector \
+                    * config.width
+        position.turn = turn_count % 2
+        position.fullmove_number = turn_count // 2 + 1
+        for color, flags in ((WHITE, (WHITE_KINGSIDE, WHITE_QUEENSIDE)),
+                             (BLACK, (BLACK_KINGSIDE, BLACK_QUEENSIDE))):
+            king = board[config.k_start[color]]
+            if king.piece_type != "king" or king.has_moved \
+                    or king.color != colors[color]:
+                continue
+            # r_start lists the queenside rook before the kingside one
+            for flag, rook_start in zip(reversed(flags),
+                                        config.r_start[2 * color:
+                                                       2 * color + 2]):
+                rook = board[rook_start]
+                if rook.piece_type == "rook" and not rook.has_moved \
+                        and rook.color == colors[color]:
+                    position.castling |= flag
+        position.drop_unusable_ep_space()
+        position.key = position.compute_key()
+        return position
+
+    @classmethod
+    def from_fen(cls, fen=start_fen):
+        """ Builds a Position from a FEN string. The row fields run from
+            row 8 down to row 1, which matches the space numbering of
+            board_pos, so spaces are filled in order.
+            """
+        fields = fen.split()
+        position = cls()
+        space_num = 0
+        for char in fields[0]:
+            if char == "/":
+                continue
+            elif char.isdigit():
+                space_num += int(char)
+            else:
+                position.put_piece(space_num,
+                                   WHITE if char.isupper() else BLACK,
+                                   fen_letters.index(char.lower()))
+                space_num += 1
+        position.turn = WHITE if fields[1] == "w" else BLACK
+        for flag, letter in fen_castling:
+            if letter in fields[2]:
+                position.castling |= flag
+        if fields[3] != "-":
+            position.ep_space = config.board_pos[fields[3].upper()]
+        if len(fields) > 4:
+            position.halfmove_clock = int(fields[4])
+            position.fullmove_number = int(fields[5])
+        position.drop_unusable_ep_space()
+        position.key = position.compute_key()
+        return position
+
+    def drop_unusable_ep_space(self):
+        """ Clears ep_space unless a pawn of the side to move could take
+            en passant there. make_move() only sets ep_space in that
+            case too, so positions that differ only by an unusable en
+            passant space are treated (and hashed) as the same position.
+            """
+        if self.ep_space is not None \
+                and not config.pawn_attacks[self.turn ^ 1][self.ep_space] \
+                & self.pieces[self.turn][PAWN]:
+            self.ep_space = None
+
+    def compute_key(self):
+        """ Builds the Zobrist key of the position from scratch.
+            make_move() and unmake_move() keep self.key up to date
+            without this.
+            """
+        key = zobrist_castling[self.castling]
+        for space_num, piece in enumerate(self.mailbox):
+            if piece is not None:
+                key ^= zobrist_pieces[piece[0]][piece[1]][space_num]
+        if self.turn == BLACK:
+            key ^= zobrist_turn
+        if self.ep_space is not None:
+            key ^= zobrist_ep_col[self.ep_space % config.width]
+        return key
+
+    def to_fen(self):
+        """ Returns the position as a FEN string."""
+        rows = []
+        for row_id in range(config.height):
+            row_fen = ""
+            open_count = 0
+            for space_num in range(row_id * config.width,
+                                   (row_id + 1) * config.width):
+                piece = self.mailbox[space_num]
+                if piece is None:
+                    open_count += 1
+                    continue
+                if open_count:
+                    row_fen += str(open_count)
+                    open_count = 0
+                letter = fen_letters[piece[1]]
+                row_fen += letter.upper() if piece[0] == WHITE else letter
+            if open_count:
+                row_fen += str(open_count)
+            rows.append(row_fen)
+        castling = "".join(letter for flag, letter in fen_castling
+                           if self.castling & flag) or "-"
+        ep_space = "-" if self.ep_space is None \
+            else config.board_pos_id[self.ep_space].lower()
+        return f"{'/'.join(rows)} {'wb'[self.turn]} {castling} {ep_space} " \
+               f"{self.halfmove_clock} {self.fullmove_number}"
+
+    def copy(self):
+        position = Position.__new__(Position)
+        position.pieces = [self.pieces[WHITE][:], self.pieces[BLACK][:]]
+        position.occupied = self.occupied[:]
+        position.all_occupied = self.all_occupied
+        position.mailbox = self.mailbox[:]
+        position.turn = self.turn
+        position.castling = self.castling
+        position.ep_space = self.ep_space
+        position.halfmove_clock = self.halfmove_clock
+        position.fullmove_number = self.fullmove_number
+        position.key = self.key
+        return position
+
+    def to_board(self):
+        """ Returns a dictionary of space IDs and 3-character labels that
+            can be passed to gameboard.print_board(). Pieces of the same
+            type are numbered by column from the A column, as they are
+            at the start of a game.
+            """
+        board = {}
+        counts = [[0] * 6, [0] * 6]
+        for col_id in range(config.width):
+            for row_id in reversed(range(config.height)):
+                space_num = row_id * config.width + col_id
+                piece = self.mailbox[space_num]
+                if piece is None:
+                    label = "   "
+                else:
+                    color, piece_type = piece
+                    if piece_type == KING:
+                        label = piece_label(color, piece_type)
+                    else:
+                        counts[color][piece_type] += 1
+                        label = piece_label(color, piece_type,
+                                            counts[color][piece_type])
+                board[config.board_pos_id[space_num]] = label
+        return board
+
+    def put_piece(self, space_num, color, piece_type):
+        """ Places a piece on an open space."""
+        bit = config.board_bits[space_num]
+        self.pieces[color][piece_type] |= bit
+        self.occupied[color] |= bit
+        self.all_occupied |= bit
+        self.mailbox[space_num] = mailbox_pieces[color][piece_type]
+        self.key ^= zobrist_pieces[color][piece_type][space_num]
+
+    def remove_piece(self, space_num):
+        """ Removes and returns the (color, piece_type) on a space, or None
+            if the space is open.
+            """
+        piece = self.mailbox[space_num]
+        if piece is not None:
+            color, piece_type = piece
+            bit = config.board_bits[space_num]
+            self.pieces[color][piece_type] ^= bit
+            self.occupied[color] ^= bit
+            self.all_occupied ^= bit
+            self.mailbox[space_num] = None
+            self.key ^= zobrist_pieces[color][piece_type][space_num]
+        return piece
+
+    def move_piece(self, from_num, to_num):
+        """ Moves a piece between spaces, removing any piece already on
+            to_num. Returns the removed piece, or None.
+            """
+        taken = self.remove_piece(to_num)
+        color, piece_type = self.remove_piece(from_num)
+        self.put_piece(to_num, color, piece_type)
+        return taken
+
+    def make_move(self, move):
+        """ Plays an encoded move (see encode_move()) for the side to move,
+            updating the castling rights, en passant space, halfmove
+            clock and turn. The move is assumed to be legal, as given by
+            chess_movegen.
+
+            Returns an undo record for unmake_move(), packed into one
+            integer rather than an object so that playing and taking
+            back moves allocates nothing but the integer itself:
+            bits 0-3   piece taken, as color * 6 + piece_type + 1 (0 if
+                       nothing was taken)
+            bits 4-7   castling rights before the move
+            bits 8-14  en passant space before the move (64 if none)
+            bits 15-31 halfmove clock before the move
+            bits 32+   Zobrist key before the move
+            """
+        from_num = move & 63
+        to_num = move >> 6 & 63
+        flag = move >> 12
+        color = self.turn
+        board_bits = config.board_bits
+        mailbox = self.mailbox
+        own_pieces = self.pieces[color]
+        occupied = self.occupied
+        piece_type = mailbox[from_num][1]
+        key = self.key
+        undo = self.castling << 4 | self.halfmove_clock << 15 \
+            | (64 if self.ep_space is None else self.ep_space) << 8 \
+            | key << 32
+        # Remove the old castling rights, en passant column and side to
+        # move from the key. The new ones are added back below.
+        key ^= zobrist_castling[self.castling] ^ zobrist_turn
+        if self.ep_space is not None:
+            key ^= zobrist_ep_col[self.ep_space % config.width]
+        # Take the enemy piece first. Every capturing flag has the
+        # CAPTURE bit set. For en passant the pawn taken sits one row
+        # behind to_num, from the moving player's perspective.
+        if flag & CAPTURE:
+            if flag == EN_PASSANT:
+                taken_num = to_num + (config.width if color == WHITE
+                                      else -config.width)
+            else:
+                taken_num = to_num
+            taken_type = mailbox[taken_num][1]
+            taken_bit = board_bits[taken_num]
+            self.pieces[color ^ 1][taken_type] ^= taken_bit
+            occupied[color ^ 1] ^= taken_bit
+            self.all_occupied ^= taken_bit
+            mailbox[taken_num] = None
+            undo |= (color ^ 1) * 6 + taken_type + 1
+            key ^= zobrist_pieces[color ^ 1][taken_type][taken_num]
+            self.halfmove_clock = 0
+        elif piece_type == PAWN:
+            self.halfmove_clock = 0
+        else:
+            self.halfmove_clock += 1
+        new_type = (flag & 3) + 1 if flag & PROMOTION else piece_type
+        move_bits = board_bits[from_num] | board_bits[to_num]
+        own_pieces[piece_type] ^= board_bits[from_num]
+        own_pieces[new_type] ^= board_bits[to_num]
+        occupied[color] ^= move_bits
+        self.all_occupied ^= move_bits
+        mailbox[from_num] = None
+        mailbox[to_num] = mailbox_pieces[color][new_type]
+        key ^= zobrist_pieces[color][piece_type][from_num] \
+            ^ zobrist_pieces[color][new_type][to_num]
+        if flag == KINGSIDE_CASTLE or flag == QUEENSIDE_CASTLE:
+            key ^= self.shift_castle_rook(color, flag, False)
+        self.castling &= castling_masks[from_num] & castling_masks[to_num]
+        key ^= zobrist_castling[self.castling]
+        # The en passant space is only kept if an enemy pawn is beside
+        # the pawn that moved two spaces and could take it
+        self.ep_space = None
+        if flag == DOUBLE_PUSH:
+            ep_space = (from_num + to_num) // 2
+            if config.pawn_attacks[color][ep_space] \
+                    & self.pieces[color ^ 1][PAWN]:
+                self.ep_space = ep_space
+                key ^= zobrist_ep_col[ep_space % config.width]
+        if color == BLACK:
+            self.fullmove_number += 1
+        self.turn = color ^ 1
+        self.key = key
+        return undo
+
+    def unmake_move(self, move, undo):
+        """ Takes back a move played by make_move(), given the undo record
+            it returned, restoring the position exactly.
+            """
+        from_num = move & 63
+        to_num = move >> 6 & 63
+        flag = move >> 12
+        color = self.turn ^ 1
+        board_bits = config.board_bits
+        mailbox = self.mailbox
+        own_pieces = self.pieces[color]
+        occupied = self.occupied
+        new_type = mailbox[to_num][1]
+        piece_type = PAWN if flag & PROMOTION else new_type
+        move_bits = board_bits[from_num] | board_bits[to_num]
+        own_pieces[new_type] ^= board_bits[to_num]
+        own_pieces[piece_type] ^= board_bits[from_num]
+        occupied[color] ^= move_bits
+        self.all_occupied ^= move_bits
+        mailbox[to_num] = None
+        mailbox[from_num] = mailbox_pieces[color][piece_type]
+        if flag == KINGSIDE_CASTLE or flag == QUEENSIDE_CASTLE:
+            self.shift_castle_rook(color, flag, True)
+        taken_code = undo & 15
+        if taken_code:
+            taken_color, taken_type = divmod(taken_code - 1, 6)
+            if flag == EN_PASSANT:
+                taken_num = to_num + (config.width if color == WHITE
+                                      else -config.width)
+            else:
+                taken_num = to_num
+            taken_bit = board_bits[taken_num]
+            self.pieces[taken_color][taken_type] |= taken_bit
+            occupied[taken_color] |= taken_bit
+            self.all_occupied |= taken_bit
+            mailbox[taken_num] = mailbox_pieces[taken_color][taken_type]
+        self.castling = undo >> 4 & 15
+        ep_space = undo >> 8 & 127
+        self.ep_space = None if ep_space == 64 else ep_space
+        self.halfmove_clock = undo >> 15 & 0x1FFFF
+        self.key = undo >> 32
+        if color == BLACK:
+            self.fullmove_number -= 1
+        self.turn = color
+
+    def shift_castle_rook(self, color, flag, undo):
+        """ Moves the castling rook beside the king, or back to its
+            starting space if undo is True. Returns the change to the
+            Zobrist key.
+            """
+        castle_flag = (WHITE_KINGSIDE if flag == KINGSIDE_CASTLE
+                       else WHITE_QUEENSIDE) << 2 * color
+        rook_from, rook_to = castling_spaces[castle_flag][2:]
+        if undo:
+            rook_from, rook_to = rook_to, rook_from
+        rook_bits = config.board_bits[rook_from] | config.board_bits[rook_to]
+        self.pieces[color][ROOK] ^= rook_bits
+        self.occupied[color] ^= rook_bits
+        self.all_occupied ^= rook_bits
+        self.mailbox[rook_from] = None
+        self.mailbox[rook_to] = mailbox_pieces[color][ROOK]
+        return zobrist_pieces[color][ROOK][rook_from] \
+            ^ zobrist_pieces[color][ROOK][rook_to]
+
+    def king_space(self, color):
+        return self.pieces[color][KING].bit_length() - 1
+
+    def attacks_from(self, space_num):
+        """ Returns the bitboard of spaces attacked by the piece on
+            space_num. Spaces holding friendly pieces are included, since
+            they are defended by the piece.
+            """
+        color, piece_type = self.mailbox[space_num]
+        if piece_type == PAWN:
+            return config.pawn_attacks[color][space_num]
+        elif piece_type == KNIGHT:
+            return config.knight_attacks[space_num]
+        elif piece_type == KING:
+            return config.king_attacks[space_num]
+        elif piece_type == ROOK:
+            return rook_attacks(space_num, self.all_occupied)
+        elif piece_type == BISHOP:
+            return bishop_attacks(space_num, self.all_occupied)
+        else:
+            return queen_attacks(space_num, self.all_occupied)
+
+    def attacked_spaces(self, color):
+        """ Returns the bitboard of every space attacked by color."""
+        attacks = 0
+        for space_num in squares(self.occupied[color]):
+            attacks |= self.attacks_from(space_num)
+        return attacks
+
+    def attackers_to(self, space_num, by_color, occupied=None):
+        """ Returns the bitboard of pieces of by_color attacking
+            space_num. Each piece type's attack pattern is traced
+            outward from space_num, since a piece attacks a space exactly
+            when the same piece on that space would attack it back (with
+            pawns using the other color's pattern). occupied can be given
+            to test a board with pieces added or removed.
+            """
+        if occupied is None:
+            occupied = self.all_occupied
+        pieces = self.pieces[by_color]
+        return (config.pawn_attacks[by_color ^ 1][space_num] & pieces[PAWN]
+                | config.knight_attacks[space_num] & pieces[KNIGHT]
+                | config.king_attacks[space_num] & pieces[KING]
+                | rook_attacks(space_num, occupied)
+                & (pieces[ROOK] | pieces[QUEEN])
+                | bishop_attacks(space_num, occupied)
+                & (pieces[BISHOP] | pieces[QUEEN]))
+
+    def is_attacked(self, space_num, by_color):
+        """ Returns True if any piece of by_color attacks space_num."""
+        return bool(self.attackers_to(space_num, by_color))
+
+    def checkers(self, color=None):
+        """ Returns the bitboard of enemy pieces giving check to color's
+            king (the side to move by default).
+            """
+        if color is None:
+            color = self.turn
+        return self.attackers_to(self.king_space(color), color ^ 1)
+
+    def is_in_check(self, color=None):
+        """ Returns True if color's king (the side to move by default)
+            is attacked.
+            """
+        return bool(self.checkers(color))
+
+    def is_insufficient_material(self):
+        """ Returns True if neither side has enough pieces left to
+            checkmate: kings alone, or kings with one knight or bishop,
+            or with only bishops all on spaces of one color.
+            """
+        white, black = self.pieces
+        if white[PAWN] | black[PAWN] | white[ROOK] | black[ROOK] \
+                | white[QUEEN] | black[QUEEN]:
+            return False
+        knights = white[KNIGHT] | black[KNIGHT]
+        bishops = white[BISHOP] | black[BISHOP]
+        minors = knights | bishops
+        if not minors & (minors - 1):
+            return True
+        return not knights and (not bishops & config.light_bits
+                                or not bishops & ~config.light_bits)
+
+    def path_clear(self, from_num, to_num):
+        """ Returns True if no pieces sit on the spaces strictly between
+            from_num and to_num. Spaces that do not share a row, column
+            or diagonal have nothing between them.
+            """
+        return not config.between_bits[from_num][to_num] \
+            & self.all_occupied
+
+
+# Made on first use by start_position()
+start_position_cache = None
+
+
+def start_position():
+    """ Returns a new Position at the start of a game. The FEN is only
+        read the first time; every later game gets a copy of that
+        Position, which is much quicker than reading it again.
+        """
+    global start_position_cache
+    if start_position_cache is None:
+        start_position_cache = Position.from_fen(start_fen)
+    return start_position_cache.copy()
@@ -0,0 +1,361 @@
+""" Computer player for chess.py. search() picks a move for a Position
+    with a negamax alpha-beta search, deepening one ply at a time until
+    its time budget runs out, so that it always has the best move of the
+    last depth it finished.
+
+    Run with: python chess_search.py [seconds_per_position]
+    to report the depth reached and nodes per second on the perft
+    reference positions.
+    """
+import sys
+import time
+
+import chess_config as config
+from chess_eval import evaluate
+from chess_movegen import generate_legal_moves
+from chess_position import PAWN, CAPTURE, EN_PASSANT, PROMOTION, move_name
+from chess_tt import EXACT, LOWER, UPPER, TranspositionTable
+
+# Checkmate scores count down by one per ply from the root, so that a
+# quicker mate scores higher. Any score within max_ply of MATE_SCORE is
+# a mate.
+MATE_SCORE = 100000
+INFINITY = MATE_SCORE + 1
+max_ply = 64
+mate_bound = MATE_SCORE - max_ply
+# Centipawns either side of the last depth's score searched by the
+# next depth. A score outside this window is searched again with the
+# window opened on that side.
+aspiration_window = 50
+# Nodes searched between looks at the clock (a power of 2)
+check_interval = 2048
+# Move ordering, best first: the best move from an earlier search of
+# the position (kept in the transposition table), then captures and
+# promotions by most valuable victim / least valuable attacker
+# (MVV-LVA), then the two killer moves of the ply, then quiet moves by
+# their history score.
+best_move_order = 1 << 30
+capture_order = 1 << 20
+killer_order = 1 << 19
+
+
+class SearchTimeout(Exception):
+    """ Raised inside the search when the time budget runs out, to drop
+        straight back out to search().
+        """
+    pass
+
+
+def score_to_table(score, ply):
+    """ Converts a mate score counted from the root into one counted
+        from the current position for the transposition table, since
+        the same position can be reached at different plies.
+        """
+    if score >= mate_bound:
+        return score + ply
+    elif score <= -mate_bound:
+        return score - ply
+    else:
+        return score
+
+
+def score_from_table(score, ply):
+    """ Undoes score_to_table() for a position reached at ply."""
+    if score >= mate_bound:
+        return score - ply
+    elif score <= -mate_bound:
+        return score + ply
+    else:
+        return score
+
+
+class Searcher:
+    """ State kept for one call to search(): the position being searched
+        (a copy, so a search stopped partway never has to be unwound),
+        the transposition table, the node count and deadline (and stop,
+        a function asked along with the clock whether to stop early),
+        and the killer moves and history scores used to order quiet moves.
+
+        killers[ply] holds the last two quiet moves that caused a beta
+        cutoff at that ply, since a move refuting one line often refutes
+        its neighbors. history[color << 12 | from | to << 6] adds up
+        depth * depth for every cutoff a quiet move caused anywhere in
+        the tree.
+        """
+
+    def __init__(self, position, deadline, table, history_keys=(),
+                 stop=None):
+        self.position = position
+        self.table = table
+        self.deadline = deadline
+        self.stop = stop
+        self.nodes = 0
+        self.killers = [[0, 0] for _ in range(max_ply + 1)]
+        self.history = [0] * (2 << 12)
+        # Keys of the positions played before the current one, in the
+        # game and then down the line being searched, for spotting
+        # repetitions
+        self.keys = list(history_keys)
+        self.root_move = None
+
+    def count_node(self):
+        self.nodes += 1
+        if not self.nodes & (check_interval - 1) \
+                and (time.perf_counter() > self.deadline
+                     or self.stop is not None and self.stop()):
+            raise SearchTimeout
+
+    def is_repetition(self):
+        """ Returns True if the current position has been seen before
+            since the last pawn move or capture. A single repetition is
+            scored as a draw, since if it was worth repeating once it
+            is worth repeating again.
+            """
+        keys = self.keys
+        start = max(0, len(keys) - self.position.halfmove_clock)
+        return self.position.key in keys[start:]
+
+    def order_moves(self, moves, ply, best_move=None):
+        """ Sorts moves in place, most promising first."""
+        mailbox = self.position.mailbox
+        killer_1, killer_2 = self.killers[ply]
+        history = self.history
+        color_bits = self.position.turn << 12
+
+        def move_order(move):
+            if move == best_move:
+                return best_move_order
+            flag = move >> 12
+            if flag & (CAPTURE | PROMOTION):
+                order = capture_order
+                if flag & CAPTURE:
+                    victim = PAWN if flag == EN_PASSANT \
+                        else mailbox[move >> 6 & 63][1]
+                    order += 16 * victim - mailbox[move & 63][1]
+                if flag & PROMOTION:
+                    order += 16 * ((flag & 3) + 1)
+                return order
+            elif move == killer_1:
+                return killer_order
+            elif move == killer_2:
+                return killer_order - 1
+            else:
+                return min(history[color_bits | move & 0xFFF],
+                           killer_order - 2)
+
+        moves.sort(key=move_order, reverse=True)
+
+    def quiesce(self, alpha, beta, ply):
+        """ Searches only captures and promotions until the position is
+            quiet, so that the evaluation is never taken halfway through
+            an exchange of pieces. The side to move may also "stand pat"
+            on the evaluation rather than take anything.
+            """
+        self.count_node()
+        position = self.position
+        best_score = evaluate(position)
+        if best_score >= beta or ply >= max_ply:
+            return best_score
+        if best_score > alpha:
+            alpha = best_score
+        moves = [move for move in generate_legal_moves(position)
+                 if move >> 12 & (CAPTURE | PROMOTION)]
+        self.order_moves(moves, ply)
+        for move in moves:
+            undo = position.make_move(move)
+            score = -self.quiesce(-beta, -alpha, ply + 1)
+            position.unmake_move(move, undo)
+            if score > best_score:
+                best_score = score
+                if score > alpha:
+                    alpha = score
+                    if score >= beta:
+                        break
+        return best_score
+
+    def negamax(self, depth, alpha, beta, ply):
+        """ Returns the score of the position, from the point of view of
+            the side to move, searched depth plies deep. Scores at or
+            below alpha, or at or above beta, are only bounds on the true
+            score, since the search stops as soon as it knows the score
+            falls outside the window.
+            """
+        if depth <= 0:
+            return self.quiesce(alpha, beta, ply)
+        self.count_node()
+        position = self.position
+        if ply and (position.halfmove_clock >= 100
+                    or self.is_repetition()):
+            return 0
+        # A result stored from a search at least as deep can be used
+        # as it is if its bound settles the score for this window.
+        # Otherwise its best move is still worth trying first.
+        entry = self.table.probe(position.key)
+        if entry is None:
+            table_move = None
+        else:
+            table_depth, bound, table_score, table_move = entry
+            if ply and table_depth >= depth:
+                table_score = score_from_table(table_score, ply)
+                if bound == EXACT \
+                        or bound == LOWER and table_score >= beta \
+                        or bound == UPPER and table_score <= alpha:
+                    return table_score
+        moves = generate_legal_moves(position)
+        in_check = position.is_in_check()
+        if not moves:
+            return -MATE_SCORE + ply if in_check else 0
+        if ply >= max_ply:
+            return evaluate(position)
+        # Look one ply further while in check, since there are few
+        # replies and skipping past them can miss a mate
+        if in_check:
+            depth += 1
+        self.order_moves(moves, ply,
+                         table_move if ply or self.root_move is None
+                         else self.root_move)
+        original_alpha = alpha
+        best_score = -INFINITY
+        best_move = moves[0]
+        self.keys.append(position.key)
+        for move in moves:
+            undo = position.make_move(move)
+            score = -self.negamax(depth - 1, -beta, -alpha, ply + 1)
+            position.unmake_move(move, undo)
+            if score > best_score:
+                best_score = score
+                best_move = move
+                if score > alpha:
+                    alpha = score
+                    if score >= beta:
+                        if not move >> 12 & (CAPTURE | PROMOTION):
+                            self.add_cutoff(move, depth, ply)
+                        break
+        self.keys.pop()
+        if best_score <= original_alpha:
+            # No move reached alpha, so none is known to be best
+            self.table.store(position.key, depth, UPPER,
+                             score_to_table(best_score, ply), None)
+        else:
+            self.table.store(position.key, depth,
+                             LOWER if best_score >= beta else EXACT,
+                             score_to_table(best_score, ply), best_move)
+        if not ply:
+            self.root_move = best_move
+        return best_score
+
+    def add_cutoff(self, move, depth, ply):
+        """ Records a quiet move that caused a beta cutoff as a killer
+            move of the ply and in the history scores.
+            """
+        killers = self.killers[ply]
+        if killers[0] != move:
+            killers[1] = killers[0]
+            killers[0] = move
+        self.history[self.position.turn << 12 | move & 0xFFF] += \
+            depth * depth
+
+
+def search(position, time_budget, max_depth=max_ply, history_keys=(),
+           table=None, report=None, first_depth=1,
+           window=aspiration_window, stop=None):
+    """ Searches for the best move for the side to move in position,
+        taking about time_budget seconds (less if the search runs out of
+        depth or finds a forced mate). position itself is left
+        unchanged. history_keys are the Zobrist keys of the positions
+        played earlier in the game, so the search can steer toward or
+        away from repeating them. table is the TranspositionTable to use,
+        which can be kept from one move to the next; a new one of
+        config.transposition_table_mb megabytes is made if none is given.
+
+        Returns a dictionary with:
+        "move"   the encoded move, or None if there are no legal moves
+        "score"  in centipawns for the side to move
+        "depth"  the last depth searched in full
+        "nodes"  positions searched
+        "time"   seconds taken
+        report, if given, is called with the dictionary after each depth.
+
+        first_depth and window change where the deepening starts and the
+        aspiration window, so that searches of the same position sharing
+        a table go different ways (see chess_smp.py). stop, if given, is
+        called every few thousand positions, and ends the search early
+        like the time budget running out if it returns True.
+        """
+    start = time.perf_counter()
+    if table is None:
+        table = TranspositionTable(config.transposition_table_mb)
+    table.new_search()
+    searcher = Searcher(position.copy(), start + time_budget, table,
+                        history_keys, stop)
+    moves = generate_legal_moves(position)
+    result = {"move": moves[0] if moves else None, "score": 0, "depth": 0,
+              "nodes": 0, "time": 0.0}
+    # Nothing to choose between
+    if len(moves) <= 1:
+        return result
+    score = 0
+    first_depth = min(first_depth, max_depth)
+    for depth in range(first_depth, max_depth + 1):
+        if depth == first_depth:
+            alpha, beta = -INFINITY, INFINITY
+        else:
+            alpha = score - window
+            beta = score + window
+        try:
+            while True:
+                score = searcher.negamax(depth, alpha, beta, 0)
+                if score <= alpha:
+                    alpha = -INFINITY
+                elif score >= beta:
+                    beta = INFINITY
+                else:
+                    break
+        except SearchTimeout:
+            break
+        elapsed = time.perf_counter() - start
+        result.update(move=searcher.root_move, score=score, depth=depth,
+                      nodes=searcher.nodes, time=elapsed)
+        if report is not None:
+            report(result)
+        if abs(score) >= MATE_SCORE - max_ply:
+            break
+        # Each depth takes several times longer than the last, so one
+        # started past half the budget would only be thrown away
+        elif elapsed > time_budget / 2:
+            break
+    result["nodes"] = searcher.nodes
+    result["time"] = time.perf_counter() - start
+    return result
+
+
+def run_search_benchmark(time_budget=5.0):
+    """ Searches each perft reference position for time_budget seconds,
+        printing the depth reached, the move chosen, nodes per second,
+        the share of transposition table probes that found an entry and
+        how full the table got.
+        """
+    # Imported here so that chess_search does not need chess_perft
+    # otherwise
+    from chess_perft import reference_positions
+    from chess_position import Position
+    total_nodes = 0
+    total_time = 0.0
+    for name, fen, _ in reference_positions:
+        table = TranspositionTable(config.transposition_table_mb)
+        result = search(Position.from_fen(fen), time_budget, table=table)
+        total_nodes += result["nodes"]
+        total_time += result["time"]
+        print(f"{name:<12} depth {result['depth']:>2} "
+              f"{move_name(result['move']):<6} score {result['score']:>6} "
+              f"{result['nodes']:>8} nodes {result['time']:7.3f} s "
+              f"{result['nodes'] / max(result['time'], 1e-9):>8.0f} nodes/s "
+              f"table hits "
+              f"{table.hits / max(table.hits + table.misses, 1):.0%} "
+              f"full {table.usage():.1%}")
+    print(f"Total: {total_nodes} nodes in {total_time:.3f} s, "
+          f"{total_nodes / max(total_time, 1e-9):.0f} nodes/s")
+
+
+if __name__ == "__main__":
+    run_search_benchmark(float(sys.argv[1]) if len(sys.argv) > 1 else 5.0)
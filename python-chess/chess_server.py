@@ -0,0 +1,225 @@
+""" Serves games of chess over TCP with asyncio, so one process can host
+    many games at once instead of one console game blocked on input().
+    Each connection gets its own chess.Game, and moves go through the
+    same checks as the console game (see Game.play_move()).
+
+    The protocol is one line of text per command, answered by one line
+    starting with "OK" or "ERROR":
+    MOVE piece space [promotion]   piece is a label ("WN1", "N1") or the
+                                   space the piece is on ("G1"), and
+                                   promotion the unit a pawn becomes
+                                   (Q/N/R/S)
+    BOARD                          the position as a FEN
+    UNDO / REDO                    take back or replay a move
+    NEW [fen]                      start a new game
+    STATS                          the server's game and latency counts
+    QUIT                           close the connection
+    After a move, "OK" is followed by the FEN, then "; check" or
+    "; <result> <reason>" once the game is over.
+
+    Run with: python chess_server.py [--port N]
+    or: python chess_server.py --benchmark GAMES
+    to play GAMES random games at once against a local server and report
+    the move latency.
+    """
+import argparse
+import asyncio
+import random
+import time
+
+import chess
+import chess_config as config
+from chess_movegen import generate_legal_moves
+from chess_position import Position, PROMOTION, units
+
+
+class GameServer:
+    """ Hosts one chess.Game per connection and keeps count of games
+        being played and how long moves take to answer.
+        """
+
+    def __init__(self):
+        self.games = 0
+        self.peak_games = 0
+        self.moves = 0
+        self.move_time = 0.0
+        self.max_move_time = 0.0
+
+    def stats(self):
+        return (f"games {self.games} peak {self.peak_games} moves "
+                f"{self.moves} mean_ms "
+                f"{1000 * self.move_time / max(self.moves, 1):.3f} max_ms "
+                f"{1000 * self.max_move_time:.3f}")
+
+    def move(self, game, words):
+        """ Answers a MOVE command."""
+        if len(words) not in (3, 4):
+            return "ERROR Use: MOVE piece space [promotion]"
+        piece_choice = words[1].upper()
+        # A space ID names whatever piece stands there
+        if piece_choice in game.board \
+                and game.board[piece_choice].piece_type is not None:
+            piece_choice = game.board[piece_choice].display
+        promote_to = words[3].upper() if len(words) == 4 else None
+        start = time.perf_counter()
+        problem = game.play_move(piece_choice, words[2], promote_to)
+        move_time = time.perf_counter() - start
+        if problem is not None:
+            return f"ERROR {problem}"
+        self.moves += 1
+        self.move_time += move_time
+        self.max_move_time = max(self.max_move_time, move_time)
+        reply = f"OK {game.position.to_fen()}"
+        result = game.result()
+        if result is not None:
+            reason = game.is_draw() if result == "1/2-1/2" else "checkmate"
+            reply += f"; {result} {reason}"
+        elif game.is_in_check(game.current_player()):
+            reply += "; check"
+        return reply
+
+    def answer(self, game, line):
+        """ Returns the game played on the connection (NEW replaces it),
+            and the reply to one command line.
+            """
+        words = line.split()
+        command = words[0].upper() if words else ""
+        if command == "MOVE":
+            return game, self.move(game, words)
+        elif command == "BOARD":
+            return game, f"OK {game.position.to_fen()}"
+        elif command == "UNDO":
+            if game.undo_last_move():
+                return game, f"OK {game.position.to_fen()}"
+            return game, "ERROR There is no move to take back."
+        elif command == "REDO":
+            if game.redo_last_move():
+                return game, f"OK {game.position.to_fen()}"
+            return game, "ERROR There is no move to replay."
+        elif command == "NEW":
+            fen = " ".join(words[1:]) or None
+            # Game() would take anything without a "/" as a file name
+            if fen is not None and "/" not in fen:
+                return game, f"ERROR Not a valid FEN: {fen!r}"
+            try:
+                game = chess.Game(fen=fen)
+            except ValueError as error:
+                return game, f"ERROR {error}"
+            return game, f"OK {game.position.to_fen()}"
+        elif command == "STATS":
+            return game, f"OK {self.stats()}"
+        else:
+            return game, f"ERROR Unknown command {command!r}"
+
+    async def handle_connection(self, reader, writer):
+        game = chess.Game()
+        self.games += 1
+        self.peak_games = max(self.peak_games, self.games)
+        try:
+            writer.write(f"OK {game.position.to_fen()}\n".encode())
+            while True:
+                line = await reader.readline()
+                if not line or line.strip().upper() == b"QUIT":
+                    break
+                game, reply = self.answer(game, line.decode(errors="replace"))
+                writer.write(reply.encode() + b"\n")
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self.games -= 1
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def start(self, host="127.0.0.1", port=0):
+        """ Starts listening, returning the asyncio Server. port 0 picks
+            any free port (see server.sockets[0].getsockname()).
+            """
+        return await asyncio.start_server(self.handle_connection, host,
+                                          port)
+
+
+async def random_game_client(host, port, max_plies=200, seed=None):
+    """ Connects to a server and plays random legal moves for both sides
+        until the game ends or max_plies moves have been played. Returns
+        the round trip time of each move in seconds.
+        """
+    rng = random.Random(seed)
+    reader, writer = await asyncio.open_connection(host, port)
+    fen = (await reader.readline()).decode()[3:].strip()
+    round_trips = []
+    for _ in range(max_plies):
+        moves = generate_legal_moves(Position.from_fen(fen))
+        if not moves:
+            break
+        move = rng.choice(moves)
+        command = (f"MOVE {config.board_pos_id[move & 63]} "
+                   f"{config.board_pos_id[move >> 6 & 63]}")
+        if move >> 12 & PROMOTION:
+            command += " " + units[(move >> 12 & 3) + 1]
+        start = time.perf_counter()
+        writer.write(command.encode() + b"\n")
+        reply = (await reader.readline()).decode().strip()
+        round_trips.append(time.perf_counter() - start)
+        if not reply.startswith("OK"):
+            raise RuntimeError(f"{command} was refused: {reply}")
+        fen, _, status = reply[3:].partition("; ")
+        if status and status != "check":
+            break
+    writer.write(b"QUIT\n")
+    await writer.drain()
+    writer.close()
+    return round_trips
+
+
+async def run_benchmark(game_total, max_plies=200):
+    """ Plays game_total random games at once against a local server,
+        printing the move round trip times and the server's counts.
+        """
+    server = GameServer()
+    listener = await server.start()
+    host, port = listener.sockets[0].getsockname()[:2]
+    start = time.perf_counter()
+    results = await asyncio.gather(*(random_game_client(host, port,
+                                                        max_plies, seed)
+                                     for seed in range(game_total)))
+    elapsed = time.perf_counter() - start
+    # The clients are done, but the server may still be closing their
+    # connections, so its counts wait until every game has ended
+    while server.games:
+        await asyncio.sleep(0.001)
+    listener.close()
+    await listener.wait_closed()
+    round_trips = sorted(move_time for game_times in results
+                         for move_time in game_times)
+    print(f"{game_total} games at once, {len(round_trips)} moves in "
+          f"{elapsed:.3f} s ({len(round_trips) / elapsed:.0f} moves/s)")
+    print(f"Round trip ms: median "
+          f"{1000 * round_trips[len(round_trips) // 2]:.2f} 99th "
+          f"{1000 * round_trips[int(len(round_trips) * 0.99)]:.2f} max "
+          f"{1000 * round_trips[-1]:.2f}")
+    print(f"Server: {server.stats()}")
+
+
+async def serve(port):
+    listener = await GameServer().start("127.0.0.1", port)
+    print(f"Serving chess on port {listener.sockets[0].getsockname()[1]}")
+    async with listener:
+        await listener.serve_forever()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Serves games of chess over a line protocol.")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--benchmark", type=int, metavar="GAMES",
+                        help="play GAMES random games at once against a "
+                             "local server instead")
+    args = parser.parse_args()
+    if args.benchmark:
+        asyncio.run(run_benchmark(args.benchmark))
+    else:
+        asyncio.run(serve(args.port))
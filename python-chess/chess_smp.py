@@ -0,0 +1,200 @@
+""" Searches a position in several processes at once ("lazy SMP"), for
+    the computer player to use more than one core. One Python process
+    only ever searches on one core, so each worker process runs its own
+    chess_search.search() of the same position, and they help each
+    other only through one transposition table kept in shared memory
+    (see chess_tt.TranspositionTable): a position one worker has already
+    searched is found in the table by the others, so each depth goes
+    quicker than it would alone. The workers start slightly differently
+    (see worker_settings()) so that they don't all search the same moves
+    in the same order at the same time.
+
+    Once the first worker finishes, the others are told to stop, and the
+    move of the worker that completed the deepest search is played.
+
+    Run with: python chess_smp.py [DEPTH] [--workers N]
+    to search the perft reference positions to DEPTH with 1 to N worker
+    processes and report the speedup and scaling efficiency (speedup
+    divided by the number of workers).
+    """
+import argparse
+import concurrent.futures
+import os
+import time
+from multiprocessing import shared_memory
+
+import chess_config as config
+import chess_search
+from chess_position import Position, move_name
+from chess_tt import TranspositionTable, table_bytes
+
+# Set up in each worker process by attach_worker(), and kept between
+# searches
+worker_memory = None
+worker_table = None
+worker_stop_at = None
+
+
+def worker_settings(worker_num):
+    """ Returns the first depth and aspiration window searched by worker
+        worker_num. Worker 0 searches like a single process would. Every
+        other worker starts a depth deeper, so it is always a depth ahead
+        or behind its neighbours, and the window widens every second
+        worker so that they search different scores around the root.
+        """
+    return (1 + worker_num % 2,
+            chess_search.aspiration_window * (1 + worker_num // 2))
+
+
+def attach_worker(memory_name, size_mb):
+    """ Opens the shared transposition table in a new worker process."""
+    global worker_memory, worker_table, worker_stop_at
+    worker_memory = shared_memory.SharedMemory(memory_name)
+    worker_table = TranspositionTable(size_mb, worker_memory.buf)
+    worker_stop_at = table_bytes(size_mb)
+
+
+def stop_requested():
+    return worker_memory.buf[worker_stop_at] != 0
+
+
+def search_worker(worker_num, fen, history_keys, time_budget, max_depth,
+                  generation):
+    """ Runs one worker's search of the position fen, returning
+        chess_search.search()'s result with the worker's number added.
+        """
+    worker_table.generation = generation
+    worker_table.hits = worker_table.misses = 0
+    first_depth, window = worker_settings(worker_num)
+    result = chess_search.search(Position.from_fen(fen), time_budget,
+                                 max_depth, history_keys, worker_table,
+                                 first_depth=first_depth, window=window,
+                                 stop=stop_requested)
+    result["worker"] = worker_num
+    return result
+
+
+class ParallelSearch:
+    """ A pool of workers worker processes (one per core if workers is
+        None) sharing a transposition table of size_mb megabytes, kept
+        from one search to the next. The workers start on the first
+        search. Must be closed (or used as a context manager) to free the
+        shared memory.
+        """
+
+    def __init__(self, workers=None, size_mb=config.transposition_table_mb):
+        self.worker_count = workers or os.cpu_count() or 1
+        # The table, then one byte the workers watch for being told to
+        # stop
+        self.stop_at = table_bytes(size_mb)
+        self.memory = shared_memory.SharedMemory(create=True,
+                                                 size=self.stop_at + 1)
+        self.table = TranspositionTable(size_mb, self.memory.buf)
+        self.executor = concurrent.futures.ProcessPoolExecutor(
+            self.worker_count, initializer=attach_worker,
+            initargs=(self.memory.name, size_mb))
+
+    def search(self, position, time_budget, max_depth=chess_search.max_ply,
+               history_keys=()):
+        """ Searches position like chess_search.search(), in every worker
+            at once. Returns the result of the worker that completed the
+            deepest search (the first worker on a tie), with "nodes"
+            counting the positions searched by all of them, and "worker"
+            and "workers" added.
+            """
+        start = time.perf_counter()
+        self.memory.buf[self.stop_at] = 0
+        fen = position.to_fen()
+        history_keys = list(history_keys)
+        futures = [self.executor.submit(search_worker, worker_num, fen,
+                                        history_keys, time_budget, max_depth,
+                                        self.table.generation)
+                   for worker_num in range(self.worker_count)]
+        concurrent.futures.wait(
+            futures, return_when=concurrent.futures.FIRST_COMPLETED)
+        self.memory.buf[self.stop_at] = 1
+        results = [future.result() for future in futures]
+        # Each worker's search started a new generation of the table
+        self.table.new_search()
+        best = dict(max(results, key=lambda result: result["depth"]))
+        best.update(nodes=sum(result["nodes"] for result in results),
+                    time=time.perf_counter() - start,
+                    workers=self.worker_count)
+        return best
+
+    def close(self):
+        self.executor.shutdown()
+        self.table.close()
+        self.memory.close()
+        self.memory.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+# Started on first use by default_parallel_search()
+default_parallel_search_cache = None
+
+
+def default_parallel_search():
+    """ Returns a ParallelSearch of config.search_workers workers, started
+        once and shared by every game, and closed when Python exits.
+        """
+    global default_parallel_search_cache
+    if default_parallel_search_cache is None:
+        # Imported here, as only the process using the pool needs it
+        import atexit
+        default_parallel_search_cache = ParallelSearch(config.search_workers)
+        atexit.register(default_parallel_search_cache.close)
+    return default_parallel_search_cache
+
+
+def run_smp_benchmark(depth=5, max_workers=None):
+    """ Searches each perft reference position to depth with 1 to
+        max_workers worker processes (one per core if None), printing
+        the time taken, the speedup over one worker and the scaling
+        efficiency. Each count of workers starts with an empty table, and
+        its processes are started before the clock is.
+        """
+    # Imported here so that chess_smp does not need chess_perft
+    # otherwise
+    from chess_perft import reference_positions
+    max_workers = max_workers or os.cpu_count() or 1
+    print(f"{os.cpu_count()} cores, searching to depth {depth}")
+    single_time = None
+    for worker_count in range(1, max_workers + 1):
+        total_time = 0.0
+        total_nodes = 0
+        moves = []
+        with ParallelSearch(worker_count) as searcher:
+            searcher.search(Position(), 1.0, max_depth=1)
+            searcher.table.clear()
+            for name, fen, _ in reference_positions:
+                result = searcher.search(Position.from_fen(fen), 1e9,
+                                         max_depth=depth)
+                total_time += result["time"]
+                total_nodes += result["nodes"]
+                moves.append(move_name(result["move"]))
+        if single_time is None:
+            single_time = total_time
+        speedup = single_time / total_time
+        print(f"{worker_count:>2} workers {total_time:8.3f} s "
+              f"{total_nodes:>9} nodes "
+              f"{total_nodes / max(total_time, 1e-9):>8.0f} nodes/s "
+              f"speedup {speedup:5.2f} "
+              f"efficiency {speedup / worker_count:4.0%} "
+              f"moves {' '.join(moves)}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Measures how lazy SMP search scales with workers.")
+    parser.add_argument("depth", type=int, nargs="?", default=5)
+    parser.add_argument("--workers", type=int, default=None,
+                        help="most worker processes to try (default: one "
+                             "per core)")
+    args = parser.parse_args()
+    run_smp_benchmark(args.depth, args.workers)
@@ -0,0 +1,61 @@
+""" Measures how long each module of the game takes to import, so that
+    start-up time can be kept track of as the game grows. Every import
+    is timed in a new Python process, since a module is only really
+    imported once per process, and the best of several runs is kept to
+    leave out noise from whatever else the computer is doing.
+
+    Run with: python chess_startup.py [RUNS] [--limit MS]
+    With --limit, exits with status 1 if any module takes longer than
+    MS milliseconds to import.
+    """
+import argparse
+import os
+import subprocess
+import sys
+
+# Modules timed, roughly in the order they import each other
+startup_modules = ("chess_config", "chess_position", "chess_movegen",
+                   "chess_pieces", "chess_eval", "chess_search", "chess",
+                   "chess_pgn", "chess_store", "chess_server")
+timing_script = ("import time\n"
+                 "start = time.perf_counter()\n"
+                 "import {module}\n"
+                 "print(time.perf_counter() - start)\n")
+
+
+def import_time(module, runs=5):
+    """ Returns the shortest time, in seconds, that importing module
+        took in runs new processes.
+        """
+    folder = os.path.dirname(os.path.abspath(__file__))
+    times = []
+    for _ in range(runs):
+        # -B so that every run finds the same .pyc files already there
+        output = subprocess.run(
+            [sys.executable, "-B", "-c", timing_script.format(module=module)],
+            cwd=folder, capture_output=True, text=True, check=True).stdout
+        times.append(float(output))
+    return min(times)
+
+
+def run_startup_benchmark(runs=5, limit_ms=None):
+    """ Prints the import time of each module, returning False if any
+        took longer than limit_ms.
+        """
+    within_limit = True
+    for module in startup_modules:
+        ms = 1000 * import_time(module, runs)
+        over = limit_ms is not None and ms > limit_ms
+        within_limit = within_limit and not over
+        print(f"{module:<15} {ms:7.1f} ms{'  OVER LIMIT' if over else ''}")
+    return within_limit
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Times the import of each module of the game.")
+    parser.add_argument("runs", type=int, nargs="?", default=5)
+    parser.add_argument("--limit", type=float, metavar="MS",
+                        help="fail if any import takes longer than MS")
+    args = parser.parse_args()
+    sys.exit(0 if run_startup_benchmark(args.runs, args.limit) else 1)
@@ -0,0 +1,303 @@
+""" A compact binary file of games, read through mmap, for going over the
+    same archive many times without parsing PGN again each time.
+
+    Every position of every game is stored as a fixed-width record, and
+    every move as a 16-bit encoded move (see
+    chess_position.encode_move()), so any game, and any ply of it, is
+    found with a lookup in the index and a multiplication rather than by
+    reading through the games before it. Only the pages of the file that
+    are actually read are loaded, however large the archive.
+
+    File layout (all numbers little-endian):
+    header        magic, version, game count, offset of the index
+    games         for each game: its ply count and result, then a
+                  position record for the start and after every ply,
+                  then its moves
+    index         the offset of each game, then the end of the last game
+
+    Run with: python chess_store.py games.pgn games.store
+    to convert a PGN file (see chess_pgn.py) into a store.
+    """
+import mmap
+import struct
+import sys
+import time
+from array import array
+
+import chess_fen
+import chess_pgn
+from chess_position import Position, mailbox_pieces, start_fen
+
+magic = b"PYCHSTOR"
+version = 1
+header_format = struct.Struct("<8sIIQ")
+# Ply count and result code of each game
+game_format = struct.Struct("<IB3x")
+# Each position is its 64 spaces packed two to a byte (the piece code of
+# the lower space number in the high four bits), then the castling
+# rights (bits 0-3) and side to move (bit 4), the en passant space (64
+# for none), the halfmove clock, the fullmove number and the Zobrist
+# key, so that positions can be matched by key without unpacking them
+position_format = struct.Struct("<32sBBHHQ")
+position_bytes = position_format.size
+no_ep_space = 64
+# Largest halfmove clock or fullmove number a record can hold
+max_counter = 0xFFFF
+result_codes = {result: code for code, result in enumerate(chess_pgn.results)}
+
+# Piece code of each Position.mailbox entry: 0 for an open space, then
+# 1-6 for white's pieces and 7-12 for black's, by piece type
+piece_nibbles = {None: 0}
+for color_pieces in mailbox_pieces:
+    for piece in color_pieces:
+        piece_nibbles[piece] = piece[0] * 6 + piece[1] + 1
+# The (color, piece_type) of each piece code, and the two piece codes
+# packed into each byte value
+nibble_pieces = [None] * 16
+for piece, nibble in piece_nibbles.items():
+    nibble_pieces[nibble] = piece
+byte_nibbles = tuple((byte >> 4, byte & 15) for byte in range(256))
+
+
+def pack_position(position):
+    """ Returns the fixed-width record of a Position. Raises ValueError
+        if its halfmove clock or fullmove number doesn't fit in the
+        record's 16 bits.
+        """
+    if not (0 <= position.halfmove_clock <= max_counter
+            and 0 <= position.fullmove_number <= max_counter):
+        raise ValueError(f"Move counters {position.halfmove_clock} and "
+                         f"{position.fullmove_number} are out of range")
+    codes = [piece_nibbles[piece] for piece in position.mailbox]
+    board_bytes = bytes(codes[space_num] << 4 | codes[space_num + 1]
+                        for space_num in range(0, len(codes), 2))
+    return position_format.pack(
+        board_bytes, position.castling | position.turn << 4,
+        no_ep_space if position.ep_space is None else position.ep_space,
+        position.halfmove_clock, position.fullmove_number, position.key)
+
+
+def unpack_position(record, offset=0):
+    """ Returns the Position of the record starting at offset in record
+        (any bytes-like object, such as an mmap).
+        """
+    board_bytes, flags, ep_space, halfmove_clock, fullmove_number, key = \
+        position_format.unpack_from(record, offset)
+    position = Position()
+    space_num = 0
+    for byte in board_bytes:
+        for nibble in byte_nibbles[byte]:
+            if nibble:
+                color, piece_type = nibble_pieces[nibble]
+                position.put_piece(space_num, color, piece_type)
+            space_num += 1
+    position.castling = flags & 15
+    position.turn = flags >> 4 & 1
+    position.ep_space = None if ep_space == no_ep_space else ep_space
+    position.halfmove_clock = halfmove_clock
+    position.fullmove_number = fullmove_number
+    position.key = key
+    return position
+
+
+def pack_board(board, turn_count, halfmove_clock=0):
+    """ Returns the record of a chess.py board dictionary, with the side
+        to move and move number taken from turn_count.
+        """
+    position = Position.from_board(board, turn_count)
+    position.halfmove_clock = halfmove_clock
+    return pack_position(position)
+
+
+def unpack_board(record, offset=0):
+    """ Returns a board dictionary of new Piece objects, and the matching
+        turn_count, for a record (see chess_fen.position_to_board()).
+        """
+    return chess_fen.position_to_board(unpack_position(record, offset))
+
+
+def read_moves(data, start, count):
+    """ Returns the count 16-bit moves starting at offset start in data
+        as an array.
+        """
+    moves = array("H", data[start:start + 2 * count])
+    if sys.byteorder == "big":
+        moves.byteswap()
+    return moves
+
+
+class GameStoreWriter:
+    """ Writes games one at a time to a new store file. The index is
+        kept in memory (eight bytes a game) and written by close(), so
+        the file can't be read until it is closed. Can be used as a
+        context manager.
+        """
+
+    def __init__(self, file_name):
+        self.store_file = open(file_name, "wb")
+        self.offsets = array("Q")
+        # Filled in by close() once the game count is known
+        self.store_file.write(bytes(header_format.size))
+
+    def add_game(self, moves, result="*", fen=start_fen):
+        """ Adds a game of encoded moves played from fen. The moves must
+            be legal, as they are played out to store every position. A
+            result other than those of chess_pgn.results is stored as
+            "*", the PGN result of a game whose result is unknown.
+            Returns the game's number in the store.
+            """
+        position = Position.from_fen(fen)
+        records = [game_format.pack(len(moves),
+                                    result_codes.get(result,
+                                                     result_codes["*"])),
+                   pack_position(position)]
+        for move in moves:
+            position.make_move(move)
+            records.append(pack_position(position))
+        move_array = array("H", moves)
+        if sys.byteorder == "big":
+            move_array.byteswap()
+        records.append(move_array.tobytes())
+        # Only indexed once every record is packed, so a game that fails
+        # partway leaves nothing behind in the store
+        self.offsets.append(self.store_file.tell())
+        self.store_file.write(b"".join(records))
+        return len(self.offsets) - 1
+
+    def close(self):
+        if self.store_file.closed:
+            return
+        index_offset = self.store_file.tell()
+        self.offsets.append(index_offset)
+        if sys.byteorder == "big":
+            self.offsets.byteswap()
+        self.store_file.write(self.offsets.tobytes())
+        self.store_file.seek(0)
+        self.store_file.write(header_format.pack(
+            magic, version, len(self.offsets) - 1, index_offset))
+        self.store_file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class GameStore:
+    """ Reads a store file written by GameStoreWriter. Games are numbered
+        from 0 in the order they were added. Raises ValueError if the
+        file is not a store. Can be used as a context manager.
+        """
+
+    def __init__(self, file_name):
+        self.store_file = open(file_name, "rb")
+        try:
+            self.data = mmap.mmap(self.store_file.fileno(), 0,
+                                  access=mmap.ACCESS_READ)
+        except ValueError:
+            # mmap can't map an empty file
+            self.store_file.close()
+            raise ValueError(f"{file_name} is not a game store")
+        file_magic, file_version, self.game_count, index_offset = \
+            header_format.unpack_from(self.data)
+        if file_magic != magic or file_version != version:
+            self.close()
+            raise ValueError(f"{file_name} is not a game store")
+        self.offsets = array("Q", self.data[index_offset:index_offset + 8
+                                            * (self.game_count + 1)])
+        if sys.byteorder == "big":
+            self.offsets.byteswap()
+
+    def __len__(self):
+        return self.game_count
+
+    def game_offset(self, game_num):
+        """ Returns where a game starts in the file. Raises IndexError
+            if there is no game game_num (negative numbers included, as
+            the last offset is the index's and not a game's).
+            """
+        if not 0 <= game_num < self.game_count:
+            raise IndexError(f"The store has {self.game_count} games")
+        return self.offsets[game_num]
+
+    def ply_count(self, game_num):
+        return game_format.unpack_from(self.data,
+                                       self.game_offset(game_num))[0]
+
+    def result(self, game_num):
+        return chess_pgn.results[game_format.unpack_from(
+            self.data, self.game_offset(game_num))[1]]
+
+    def moves(self, game_num):
+        """ Returns the encoded moves of a game as an array."""
+        start = self.game_offset(game_num)
+        ply_count = game_format.unpack_from(self.data, start)[0]
+        return read_moves(self.data, start + game_format.size
+                          + (ply_count + 1) * position_bytes, ply_count)
+
+    def record_offset(self, game_num, ply):
+        """ Returns where the position after ply moves of a game (0 for
+            its start) is stored. Raises IndexError if the game does not
+            have that many moves.
+            """
+        start = self.game_offset(game_num)
+        ply_count = game_format.unpack_from(self.data, start)[0]
+        if not 0 <= ply <= ply_count:
+            raise IndexError(f"Game {game_num} has {ply_count} plies")
+        return start + game_format.size + ply * position_bytes
+
+    def position(self, game_num, ply=0):
+        """ Returns the Position after ply moves of a game."""
+        return unpack_position(self.data, self.record_offset(game_num, ply))
+
+    def board(self, game_num, ply=0):
+        """ Returns the chess.py board dictionary and turn_count after ply
+            moves of a game.
+            """
+        return unpack_board(self.data, self.record_offset(game_num, ply))
+
+    def key(self, game_num, ply=0):
+        """ Returns the Zobrist key after ply moves of a game, without
+            unpacking the position.
+            """
+        return position_format.unpack_from(
+            self.data, self.record_offset(game_num, ply))[-1]
+
+    def start_fen(self, game_num):
+        return self.position(game_num).to_fen()
+
+    def close(self):
+        if not self.data.closed:
+            self.data.close()
+        self.store_file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def pgn_to_store(pgn_file_name, store_file_name):
+    """ Converts a PGN file into a store, one game at a time. Games with
+        a move that could not be read are stored up to that move, and
+        games starting from a FEN that could not be read, or with move
+        counters too large for a record, are left out.
+        Returns the number of games stored.
+        """
+    with GameStoreWriter(store_file_name) as writer:
+        for game in chess_pgn.read_pgn_file(pgn_file_name):
+            try:
+                writer.add_game(game["moves"], game["result"],
+                                game["start_fen"])
+            except (IndexError, KeyError, ValueError):
+                continue
+        return len(writer.offsets)
+
+
+if __name__ == "__main__":
+    start = time.perf_counter()
+    game_total = pgn_to_store(sys.argv[1], sys.argv[2])
+    print(f"Stored {game_total} games in "
+          f"{time.perf_counter() - start:.3f} s")
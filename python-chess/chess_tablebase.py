@@ -0,0 +1,667 @@
+""" Endgame tablebases: for every position of an ending with few pieces
+    (ie. king and queen against king, "KQK"), whether the side to move
+    wins, draws or loses with best play, and in how many moves the game
+    ends in checkmate. The computer player uses them to play such
+    endings perfectly, and probe() tells whether any such position is
+    won.
+
+    Tables are generated offline by retrograde analysis: starting from
+    every checkmate, moves are taken back one ply at a time. A position
+    from which some move reaches a position lost for the opponent is
+    won, one ply further from mate. A position all of whose moves reach
+    positions won for the opponent is lost. Whatever is left at the end
+    is a draw. Captures and promotions change the pieces on the board,
+    so they are looked up in the tables of the smaller endings, which
+    are generated first.
+
+    Each table holds one byte per position: 0 for a draw, 255 for a
+    position that can't happen (two pieces on one space, the side not
+    to move in check, ...) and otherwise the number of plies to mate
+    plus one, odd numbers of plies being wins for the side to move and
+    even numbers losses. Positions are numbered by the side to move and
+    the space of each piece (see TableLayout), so a probe is one lookup
+    in a memory-mapped file, and processes probing the same table share
+    one copy of it in memory.
+
+    Only endings with no castling, and with pawns on one side only (so
+    there is never an en passant capture) are covered, and the fifty
+    move rule is not taken into account.
+
+    Run with: python chess_tablebase.py [SIGNATURE ...] [--pieces N]
+    [--workers N] [--dir DIRECTORY]
+    to generate the tables for the given endings (ie. KRK KQKR), or for
+    every ending of up to N pieces (3 by default), along with the
+    smaller tables they need. The three piece tables take seconds, four
+    piece ones a few minutes each on one core (KQKR took about two).
+    """
+import itertools
+import mmap
+import os
+import struct
+import time
+from array import array
+
+import chess_config as config
+from chess_movegen import generate_legal_moves
+from chess_position import (WHITE, BLACK, PAWN, KNIGHT, BISHOP, ROOK, QUEEN,
+                            KING, CAPTURE, PROMOTION, Position, squares,
+                            rook_attacks, bishop_attacks, queen_attacks)
+
+magic = b"PYCHTBAS"
+version = 1
+# Magic, version and signature of the table, then one byte per position
+header_format = struct.Struct("<8sI8s")
+DRAW_VALUE, INVALID_VALUE = 0, 255
+# Results of a probe, from the point of view of the side to move
+WIN, DRAW, LOSS = 1, 0, -1
+# Letters of the pieces besides the kings in a signature, strongest
+# first. A signature names the white pieces, then the black ones, ie.
+# "KRKP" is king and rook against king and pawn.
+signature_letters = "QRBNP"
+letter_types = {"Q": QUEEN, "R": ROOK, "B": BISHOP, "N": KNIGHT,
+                "P": PAWN}
+type_letters = {piece_type: letter
+                for letter, piece_type in letter_types.items()}
+# Move counts of positions that can never be lost, since a capture or
+# promotion reaches a draw or a win (see generate_table())
+NO_LOSS = 255
+# Positions given to a worker at a time
+chunk_size = 1 << 14
+
+
+def side_strength(letters):
+    """ Orders the two sides of an ending, more pieces first, then
+        stronger pieces first.
+        """
+    return len(letters), [-signature_letters.index(letter)
+                          for letter in letters]
+
+
+def make_signature(white_letters, black_letters):
+    """ Returns the signature of the table holding an ending, which has
+        the stronger side as white, and whether the colors have to be
+        swapped to look the ending up in it.
+        """
+    white_letters = "".join(sorted(white_letters,
+                                   key=signature_letters.index))
+    black_letters = "".join(sorted(black_letters,
+                                   key=signature_letters.index))
+    if side_strength(black_letters) > side_strength(white_letters):
+        return "K" + black_letters + "K" + white_letters, True
+    return "K" + white_letters + "K" + black_letters, False
+
+
+def split_signature(signature):
+    """ Returns the white and black letters of a signature, kings left
+        out.
+        """
+    black_king = signature.index("K", 1)
+    return signature[1:black_king], signature[black_king + 1:]
+
+
+def is_covered(signature):
+    """ Returns True if signature is an ending tables can be made for:
+        some piece besides the kings, and pawns on one side at most (see
+        the top of this module).
+        """
+    white, black = split_signature(signature)
+    return bool(white or black) and not ("P" in white and "P" in black)
+
+
+def position_letters(position, color):
+    return "".join(type_letters[piece_type]
+                   * bin(position.pieces[color][piece_type]).count("1")
+                   for piece_type in (QUEEN, ROOK, BISHOP, KNIGHT, PAWN))
+
+
+def sub_signatures(signature):
+    """ Returns the signatures of the endings a capture or promotion can
+        lead to from signature, other than the bare kings.
+        """
+    white, black = split_signature(signature)
+    found = set()
+    for side, other, swap in ((white, black, False), (black, white, True)):
+        for num, letter in enumerate(side):
+            rest = side[:num] + side[num + 1:]
+            endings = [(rest, other)]
+            if letter == "P":
+                endings += [(rest + promoted, other)
+                            for promoted in "QRBN"]
+            for new_side, new_other in endings:
+                if swap:
+                    new_side, new_other = new_other, new_side
+                if new_side or new_other:
+                    found.add(make_signature(new_side, new_other)[0])
+    return found
+
+
+def required_signatures(signatures):
+    """ Returns signatures and every table they need, directly or not,
+        in an order in which each table comes after the ones it needs.
+        """
+    found = set()
+    waiting = list(signatures)
+    while waiting:
+        signature = waiting.pop()
+        if signature not in found:
+            found.add(signature)
+            waiting.extend(sub_signatures(signature))
+    # Captures lower the piece count and promotions the pawn count
+    return sorted(found, key=lambda signature: (len(signature),
+                                                signature.count("P"),
+                                                signature))
+
+
+def all_signatures(piece_total):
+    """ Returns the signature of every ending covered with up to
+        piece_total pieces, kings included.
+        """
+    found = set()
+    for extra in range(1, piece_total - 1):
+        for letters in itertools.product(signature_letters, repeat=extra):
+            for split in range(extra + 1):
+                signature = make_signature(letters[:split],
+                                           letters[split:])[0]
+                if is_covered(signature):
+                    found.add(signature)
+    return required_signatures(found)
+
+
+class TableLayout:
+    """ How the positions of one ending are numbered. The pieces are the
+        white king, the black king, then the other white and black
+        pieces in signature order, and a position's number is made of
+        the side to move and the space of each piece, 64 spaces to a
+        piece.
+
+        Flipping the board left to right doesn't change who wins, so
+        only positions with the white king on the A-D columns are
+        stored, the rest being looked up flipped. Without pawns the
+        board can also be flipped top to bottom, and the white king is
+        kept to rows 1-4 as well. No position is the same as one of its
+        own flips (no space stays put), which keeps every position's
+        moves distinct in the generator.
+        """
+
+    def __init__(self, signature):
+        self.signature = signature
+        white, black = split_signature(signature)
+        self.pieces = ((WHITE, KING), (BLACK, KING)) \
+            + tuple((WHITE, letter_types[letter]) for letter in white) \
+            + tuple((BLACK, letter_types[letter]) for letter in black)
+        self.has_pawns = "P" in signature
+        self.king_spaces = tuple(
+            space_num for space_num in config.board_pos_num
+            if space_num % config.width < config.width // 2
+            and (self.has_pawns or space_num // config.width >= 4))
+        self.king_index = {space_num: num for num, space_num
+                           in enumerate(self.king_spaces)}
+        self.side_size = len(self.king_spaces) * 64 ** (len(self.pieces)
+                                                         - 1)
+        self.size = 2 * self.side_size
+
+    def index(self, turn, spaces):
+        """ Returns the number of the position with turn to move and the
+            pieces on spaces (in self.pieces order).
+            """
+        white_king = spaces[0]
+        # XOR with 7 flips a space number left to right, with 56 top to
+        # bottom
+        flip = 7 if white_king % config.width >= config.width // 2 else 0
+        if not self.has_pawns and white_king // config.width < 4:
+            flip |= 56
+        index = turn * len(self.king_spaces) \
+            + self.king_index[white_king ^ flip]
+        for space_num in spaces[1:]:
+            index = index * 64 + (space_num ^ flip)
+        return index
+
+    def spaces(self, index):
+        """ Returns the side to move and the spaces of the pieces of a
+            position number.
+            """
+        spaces = []
+        for _ in range(len(self.pieces) - 1):
+            index, space_num = divmod(index, 64)
+            spaces.append(space_num)
+        turn, king_num = divmod(index, len(self.king_spaces))
+        spaces.append(self.king_spaces[king_num])
+        spaces.reverse()
+        return turn, spaces
+
+    def position(self, turn, spaces):
+        position = Position()
+        for (color, piece_type), space_num in zip(self.pieces, spaces):
+            position.put_piece(space_num, color, piece_type)
+        position.turn = turn
+        return position
+
+    def is_possible(self, turn, spaces):
+        """ Returns False for spaces that don't make a legal position:
+            two pieces on one space, a pawn on the first or last row,
+            kings side by side, or the side not to move in check.
+            """
+        if len(set(spaces)) < len(spaces) \
+                or config.king_attacks[spaces[0]] \
+                & config.board_bits[spaces[1]]:
+            return False
+        for (color, piece_type), space_num in zip(self.pieces, spaces):
+            if piece_type == PAWN \
+                    and space_num // config.width in (0, config.height - 1):
+                return False
+        return True
+
+
+class Tablebase:
+    """ Probes the tables in a directory, each mapped into memory the
+        first time it is needed.
+        """
+
+    def __init__(self, directory=config.tablebase_dir):
+        self.directory = directory
+        # Signature: (TableLayout, mmap) of each table opened so far
+        self.tables = {}
+
+    def table(self, signature):
+        """ Returns the layout and data of a table. Raises OSError if the
+            table file is missing, and ValueError if it isn't that table.
+            """
+        if signature not in self.tables:
+            path = os.path.join(self.directory, signature + ".tb")
+            with open(path, "rb") as table_file:
+                # The map stays open after the file is closed
+                data = mmap.mmap(table_file.fileno(), 0,
+                                 access=mmap.ACCESS_READ)
+            file_magic, file_version, file_signature = \
+                header_format.unpack_from(data)
+            if file_magic != magic or file_version != version \
+                    or file_signature.rstrip(b"\0") != signature.encode():
+                data.close()
+                raise ValueError(f"{path} is not a {signature} table")
+            self.tables[signature] = (TableLayout(signature), data)
+        return self.tables[signature]
+
+    def has_table(self, signature):
+        try:
+            self.table(signature)
+        except (OSError, ValueError):
+            return False
+        return True
+
+    def probe(self, position):
+        """ Returns (WIN, DRAW or LOSS for the side to move, plies to
+            mate) for a position, or None if it isn't covered: more than
+            four pieces, castling rights or an en passant space left, or
+            no table for its pieces. Plies to mate are 0 for a draw.
+            """
+        if position.castling or position.ep_space is not None \
+                or bin(position.all_occupied).count("1") > 4:
+            return None
+        signature, swap = make_signature(position_letters(position, WHITE),
+                                         position_letters(position, BLACK))
+        if signature == "KK":
+            return DRAW, 0
+        # A table made for such an ending anyway would not know about
+        # en passant
+        if not is_covered(signature):
+            return None
+        try:
+            layout, data = self.table(signature)
+        except (OSError, ValueError):
+            return None
+        # With the colors swapped, white's pieces are looked up as black
+        # ones on the board flipped top to bottom
+        flip = 56 if swap else 0
+        piece_spaces = {}
+        spaces = []
+        for color, piece_type in layout.pieces:
+            if (color, piece_type) not in piece_spaces:
+                piece_spaces[color, piece_type] = squares(
+                    position.pieces[color ^ swap][piece_type])
+            spaces.append(next(piece_spaces[color, piece_type]) ^ flip)
+        value = data[header_format.size
+                     + layout.index(position.turn ^ swap, spaces)]
+        if value == DRAW_VALUE:
+            return DRAW, 0
+        if value == INVALID_VALUE:
+            return None
+        plies = value - 1
+        return (WIN if plies % 2 else LOSS), plies
+
+    def best_move(self, position):
+        """ Returns the best move of a covered position (the quickest mate
+            when winning, the longest defense when losing) and its probe
+            result, or None if the position isn't covered.
+            """
+        outcome = self.probe(position)
+        if outcome is None:
+            return None
+        best = None
+        for move in generate_legal_moves(position):
+            undo = position.make_move(move)
+            reply = self.probe(position)
+            position.unmake_move(move, undo)
+            if reply is None:
+                continue
+            result, plies = reply
+            # Lower ranks are better for the side moving: the opponent
+            # lost soonest, then drawn, then winning latest
+            rank = (result, plies if result == LOSS else -plies)
+            if best is None or rank < best[0]:
+                best = (rank, move)
+        return None if best is None else (best[1], outcome)
+
+    def close(self):
+        for layout, data in self.tables.values():
+            data.close()
+        self.tables = {}
+
+
+# Opened on first use by default_tablebase()
+default_tablebase_cache = None
+
+
+def default_tablebase():
+    """ Returns the Tablebase of config.tablebase_dir, made once and
+        shared by every game, or None if there is no such directory.
+        """
+    global default_tablebase_cache
+    if default_tablebase_cache is None:
+        if not os.path.isdir(config.tablebase_dir):
+            return None
+        default_tablebase_cache = Tablebase(config.tablebase_dir)
+    return default_tablebase_cache
+
+
+# Kept by each worker process between tasks
+worker_tablebases = {}
+worker_layouts = {}
+
+
+def worker_layout(signature):
+    if signature not in worker_layouts:
+        worker_layouts[signature] = TableLayout(signature)
+    return worker_layouts[signature]
+
+
+def worker_tablebase(directory):
+    if directory not in worker_tablebases:
+        worker_tablebases[directory] = Tablebase(directory)
+    return worker_tablebases[directory]
+
+
+def count_moves(signature, directory, first, last):
+    """ Worker task: looks at the moves of positions first up to (not
+        including) last of a table. Returns their starting values
+        (INVALID_VALUE, 1 for checkmated, otherwise DRAW_VALUE), their
+        move counts (see generate_table()), the checkmated positions,
+        and the (plies, position) of each capture or promotion reaching
+        a lost and a won position of a smaller table.
+        """
+    layout = worker_layout(signature)
+    tablebase = worker_tablebase(directory)
+    values = bytearray(last - first)
+    counts = bytearray(last - first)
+    mates = array("L")
+    exit_losses = array("L")
+    exit_wins = array("L")
+    for index in range(first, last):
+        turn, spaces = layout.spaces(index)
+        if not layout.is_possible(turn, spaces):
+            values[index - first] = INVALID_VALUE
+            continue
+        position = layout.position(turn, spaces)
+        if position.is_in_check(turn ^ 1):
+            values[index - first] = INVALID_VALUE
+            continue
+        moves = generate_legal_moves(position)
+        if not moves:
+            if position.is_in_check():
+                values[index - first] = 1
+                mates.append(index)
+            else:
+                counts[index - first] = NO_LOSS
+            continue
+        count = 0
+        no_loss = False
+        for move in moves:
+            if not move >> 12 & (CAPTURE | PROMOTION):
+                count += 1
+                continue
+            undo = position.make_move(move)
+            reply = tablebase.probe(position)
+            position.unmake_move(move, undo)
+            if reply is None:
+                raise ValueError(f"{signature} needs the table of "
+                                 f"{position.to_fen()}")
+            result, plies = reply
+            if result == DRAW:
+                no_loss = True
+            elif result == LOSS:
+                # Won once this exit's ply comes round, if not sooner,
+                # so it must not be counted as lost before then
+                no_loss = True
+                exit_losses.extend((plies, index))
+            else:
+                count += 1
+                exit_wins.extend((plies, index))
+        counts[index - first] = NO_LOSS if no_loss else count
+    return values, counts, mates, exit_losses, exit_wins
+
+
+def unmove_spaces(layout, occupied, piece_num, turn, spaces):
+    """ Returns the bitboard of spaces the piece piece_num could have
+        moved from to reach spaces, without capturing or promoting.
+        """
+    color, piece_type = layout.pieces[piece_num]
+    space_num = spaces[piece_num]
+    if piece_type == KING:
+        return config.king_attacks[space_num] & ~occupied
+    elif piece_type == KNIGHT:
+        return config.knight_attacks[space_num] & ~occupied
+    elif piece_type == BISHOP:
+        return bishop_attacks(space_num, occupied) & ~occupied
+    elif piece_type == ROOK:
+        return rook_attacks(space_num, occupied) & ~occupied
+    elif piece_type == QUEEN:
+        return queen_attacks(space_num, occupied) & ~occupied
+    # Pawns move back the way they came: white ones toward row 1
+    # (higher space numbers), black ones toward row 8
+    step = config.width if color == WHITE else -config.width
+    from_num = space_num + step
+    if occupied & config.board_bits[from_num] \
+            or from_num // config.width in (0, config.height - 1):
+        return 0
+    from_bits = config.board_bits[from_num]
+    # A pawn on its fourth row may have come two spaces at once
+    if space_num // config.width == (4 if color == WHITE else 3) \
+            and not occupied & config.board_bits[from_num + step]:
+        from_bits |= config.board_bits[from_num + step]
+    return from_bits
+
+
+def find_predecessors(signature, indexes):
+    """ Worker task: returns the number of every position of a table
+        with a move to each of indexes (which are positions of the same
+        table), once for every such move.
+        """
+    layout = worker_layout(signature)
+    found = array("L")
+    for index in indexes:
+        turn, spaces = layout.spaces(index)
+        mover = turn ^ 1
+        occupied = 0
+        for space_num in spaces:
+            occupied |= config.board_bits[space_num]
+        for piece_num, (color, piece_type) in enumerate(layout.pieces):
+            if color != mover:
+                continue
+            space_num = spaces[piece_num]
+            for from_num in squares(unmove_spaces(layout, occupied,
+                                                  piece_num, turn, spaces)):
+                spaces[piece_num] = from_num
+                found.append(layout.index(mover, spaces))
+            spaces[piece_num] = space_num
+    return found
+
+
+def run_tasks(executor, task, argument_lists):
+    """ Runs task on each list of arguments, over the executor's worker
+        processes if there is one, returning the results in order.
+        """
+    if executor is None or not argument_lists:
+        return [task(*arguments) for arguments in argument_lists]
+    return list(executor.map(task, *zip(*argument_lists)))
+
+
+def generate_table(signature, directory, executor=None):
+    """ Generates the table of an ending into directory, which must hold
+        the tables it needs (see required_signatures()). Returns the
+        number of won, drawn and lost positions and the longest mate in
+        plies.
+
+        Every position starts with a count of its moves. Positions are
+        then resolved a ply at a time: at ply n, every position lost in
+        n plies makes the positions with a move to it won in n + 1, and
+        every position won in n plies takes one off the counts of the
+        positions with a move to it, those left with no count being lost
+        in n + 1 (every move reaches a win for the opponent, the last of
+        them at n plies). Moves into smaller tables are resolved at the
+        ply the smaller table gives them.
+        """
+    layout = TableLayout(signature)
+    values = bytearray(layout.size)
+    counts = bytearray(layout.size)
+    # Positions (and moves into smaller tables) resolved at each ply
+    resolved = {0: array("L")}
+    exit_losses = {}
+    exit_wins = {}
+    results = run_tasks(executor, count_moves,
+                        [(signature, directory, first,
+                          min(first + chunk_size, layout.size))
+                         for first in range(0, layout.size, chunk_size)])
+    for first, (chunk_values, chunk_counts, mates, losses, wins) in zip(
+            range(0, layout.size, chunk_size), results):
+        values[first:first + len(chunk_values)] = chunk_values
+        counts[first:first + len(chunk_counts)] = chunk_counts
+        resolved[0].extend(mates)
+        for exits, events in ((exit_losses, losses), (exit_wins, wins)):
+            for plies, index in zip(events[::2], events[1::2]):
+                exits.setdefault(plies, array("L")).append(index)
+    plies = 0
+    last_ply = max(itertools.chain(exit_losses, exit_wins), default=0)
+    while resolved.get(plies) or plies <= last_ply:
+        indexes = resolved.pop(plies, array("L"))
+        predecessors = itertools.chain(
+            *run_tasks(executor, find_predecessors,
+                       [(signature, indexes[first:first + chunk_size])
+                        for first in range(0, len(indexes), chunk_size)]))
+        found = array("L")
+        new_value = plies + 2
+        if new_value >= INVALID_VALUE:
+            raise ValueError(f"{signature} has mates too long to store")
+        if plies % 2 == 0:
+            # Lost positions: whoever can move to one wins
+            for index in itertools.chain(predecessors,
+                                         exit_losses.pop(plies, ())):
+                if values[index] == DRAW_VALUE:
+                    values[index] = new_value
+                    found.append(index)
+        else:
+            # Won positions: whoever has no other moves loses
+            for index in itertools.chain(predecessors,
+                                         exit_wins.pop(plies, ())):
+                if values[index] == DRAW_VALUE \
+                        and counts[index] != NO_LOSS:
+                    counts[index] -= 1
+                    if not counts[index]:
+                        values[index] = new_value
+                        found.append(index)
+        if found:
+            resolved[plies + 1] = found
+        plies += 1
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, signature + ".tb")
+    # Written under another name first, so a table that is being written
+    # is never probed
+    with open(path + ".part", "wb") as table_file:
+        table_file.write(header_format.pack(magic, version,
+                                            signature.encode()))
+        table_file.write(values)
+    os.replace(path + ".part", path)
+    wins = losses = draws = longest = 0
+    for value in set(values):
+        total = values.count(value)
+        if value == DRAW_VALUE:
+            draws += total
+        elif value != INVALID_VALUE:
+            longest = max(longest, value - 1)
+            if (value - 1) % 2:
+                wins += total
+            else:
+                losses += total
+    return wins, draws, losses, longest
+
+
+def generate_tables(signatures, directory=config.tablebase_dir,
+                    workers=None):
+    """ Generates the tables of signatures, and those they need, that
+        are not in directory yet, spreading the work of each over a pool
+        of worker processes (one per core if workers is None). Raises
+        ValueError for a signature that is not covered (see
+        is_covered()).
+        """
+    for signature in signatures:
+        if not is_covered(signature):
+            raise ValueError(f"{signature} is not a covered ending")
+    # Imported here, as chess.py imports this module only to probe, and
+    # shouldn't spend its start-up time on generating
+    import concurrent.futures
+    worker_count = workers or os.cpu_count() or 1
+    tablebase = Tablebase(directory)
+    waiting = [signature for signature in required_signatures(signatures)
+               if not tablebase.has_table(signature)]
+    tablebase.close()
+    if worker_count == 1:
+        executor = None
+    else:
+        executor = concurrent.futures.ProcessPoolExecutor(worker_count)
+    try:
+        for signature in waiting:
+            start = time.perf_counter()
+            wins, draws, losses, longest = generate_table(
+                signature, directory, executor)
+            print(f"{signature}: {wins} won, {draws} drawn, {losses} lost "
+                  f"(for the side to move), longest mate {longest} "
+                  f"plies, {time.perf_counter() - start:.1f} s")
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(
+        description="Generates endgame tablebases.")
+    parser.add_argument("signatures", nargs="*",
+                        help="endings to generate, ie. KRK KQKR")
+    parser.add_argument("--pieces", type=int, default=3,
+                        help="with no endings given, generate every "
+                             "ending of up to this many pieces")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="worker processes (default: one per core)")
+    parser.add_argument("--dir", default=config.tablebase_dir)
+    args = parser.parse_args()
+    signatures = []
+    for text in args.signatures:
+        text = text.upper()
+        if text.count("K") != 2 or not text.startswith("K") \
+                or set(text) - set("K" + signature_letters):
+            parser.error(f"{text} is not an ending, ie. KRK or KQKR")
+        signature = make_signature(*split_signature(text))[0]
+        if not is_covered(signature):
+            parser.error(f"{text} is not covered: endings need a piece "
+                         f"besides the kings, and pawns on one side only")
+        signatures.append(signature)
+    signatures = signatures or all_signatures(args.pieces)
+    generate_tables(signatures, args.dir, args.workers)
@@ -0,0 +1,149 @@
+""" Defines TranspositionTable, a fixed-size store of search results keyed
+    by Position.key, so that chess_search can reuse the result of a
+    position it reaches again by a different order of moves. A table can
+    be kept in memory shared between processes, for several searches of
+    the same position at once (see chess_smp.py).
+    """
+from array import array
+
+# Bound types: whether a stored score is the exact score of the
+# position, or only a lower bound (the search stopped early after
+# finding a move at least this good) or an upper bound (no move
+# reached alpha). 0 marks an empty entry.
+EXACT, LOWER, UPPER = 1, 2, 3
+
+# Each entry is two unsigned 64-bit words: the position's key XORed with
+# its data, and the data packed as
+# bits 0-15   best move (encoded, see chess_position.encode_move())
+# bits 16-23  depth searched
+# bits 24-25  bound type
+# bits 26-33  generation (which search stored it)
+# bits 34-54  score + score_offset, so that it is never negative
+# Processes sharing a table write the two words of an entry without a
+# lock, so one process can read an entry halfway through another
+# writing it. XORing the key with the data means such a torn entry no
+# longer matches the key it would be found by, and is missed rather
+# than misread.
+score_offset = 1 << 20
+# Entries are kept in pairs, a bucket of four words. The first entry
+# of a bucket is only replaced by a result searched at least as deep,
+# or left over from an earlier search, so that expensive results
+# survive. The second is always replaced, so that recent results are
+# never lost for want of space.
+bucket_words = 4
+bucket_bytes = bucket_words * 8
+
+
+def table_bytes(size_mb):
+    """ Returns the bytes of memory taken by the entries of a table of
+        at most size_mb megabytes. The number of buckets is rounded down
+        to a power of two so the bucket of a key is found by masking off
+        its low bits.
+        """
+    bucket_count = 1
+    while bucket_count * 2 * bucket_bytes <= size_mb * (1 << 20):
+        bucket_count *= 2
+    return bucket_count * bucket_bytes
+
+
+class TranspositionTable:
+    """ A transposition table taking at most size_mb megabytes. The
+        entries live in one preallocated array of 64-bit words rather
+        than as Python objects, so the table's memory is fixed when it
+        is made and storing a result allocates nothing.
+
+        buffer, if given, is memory to keep the entries in instead, of
+        at least table_bytes(size_mb) bytes, such as the buf of a
+        multiprocessing.shared_memory.SharedMemory. Tables made on the
+        same shared memory in different processes see each other's
+        entries. The table is not cleared first, so a process joining
+        others finds what they have stored already.
+
+        hits and misses count probe() calls that did and did not find
+        the position, and are reset by clear().
+        """
+
+    def __init__(self, size_mb=16, buffer=None):
+        size = table_bytes(size_mb)
+        self.mask = size // bucket_bytes - 1
+        if buffer is None:
+            self.words = array("Q", bytes(size))
+        else:
+            self.words = memoryview(buffer)[:size].cast("Q")
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+
+    def clear(self):
+        """ Empties the table and resets its counters."""
+        # In place, as other processes may share the memory
+        self.words[:] = array("Q", bytes(len(self.words) * 8))
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+
+    def new_search(self):
+        """ Marks entries stored so far as old, so that the depth-
+            preferred entries left from earlier searches can be
+            replaced.
+            """
+        self.generation = (self.generation + 1) & 0xFF
+
+    def probe(self, key):
+        """ Returns (depth, bound, score, move) stored for key, or None if
+            the position is not in the table.
+            """
+        words = self.words
+        index = (key & self.mask) * bucket_words
+        data = words[index + 1]
+        if words[index] ^ data != key:
+            data = words[index + 3]
+            if words[index + 2] ^ data != key:
+                self.misses += 1
+                return None
+        if not data >> 24 & 3:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return (data >> 16 & 0xFF, data >> 24 & 3,
+                (data >> 34) - score_offset, data & 0xFFFF)
+
+    def store(self, key, depth, bound, score, move):
+        """ Stores the result of searching the position with key to depth.
+            move may be None if there is no best move.
+            """
+        words = self.words
+        index = (key & self.mask) * bucket_words
+        data = ((move or 0) | min(depth, 0xFF) << 16 | bound << 24
+                | self.generation << 26 | (score + score_offset) << 34)
+        old_data = words[index + 1]
+        same_key = words[index] ^ old_data == key
+        if same_key or old_data >> 16 & 0xFF <= depth \
+                or old_data >> 26 & 0xFF != self.generation:
+            # Keep the best move already stored if this search did not
+            # find one
+            if move is None and same_key:
+                data |= old_data & 0xFFFF
+            words[index] = key ^ data
+            words[index + 1] = data
+        else:
+            words[index + 2] = key ^ data
+            words[index + 3] = data
+
+    def usage(self):
+        """ Returns the share of depth-preferred entries in use by the
+            current search, sampled from the first 1000 buckets.
+            """
+        sample = min(1000, self.mask + 1)
+        used = sum(1 for bucket in range(sample)
+                   if self.words[bucket * bucket_words + 1] >> 26 & 0xFF
+                   == self.generation
+                   and self.words[bucket * bucket_words + 1] >> 24 & 3)
+        return used / sample
+
+    def close(self):
+        """ Lets go of the table's memory, which a SharedMemory can't be
+            closed without.
+            """
+        if isinstance(self.words, memoryview):
+            self.words.release()
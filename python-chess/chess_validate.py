@@ -0,0 +1,195 @@
+""" Replays every game in a directory of game records through the rules
+    engine, reporting any illegal moves, the final position of each game
+    and how long each took, with the games spread over a pool of worker
+    processes.
+
+    Games are replayed with chess_position.Position and the legal moves
+    of chess_movegen, which keep all of a game's state in the Position
+    object rather than in module globals, so each worker can replay any
+    number of games side by side.
+
+    Run with: python chess_validate.py DIRECTORY [--workers N] [--quiet]
+    DIRECTORY is searched for PGN files (.pgn, see chess_pgn.py) and game
+    stores (.store, see chess_store.py).
+    """
+import argparse
+import collections
+import concurrent.futures
+import os
+import sys
+import time
+
+import chess_movegen
+import chess_pgn
+import chess_store
+from chess_position import Position, move_name
+
+# Games sent to a worker at a time. Larger batches spend less time
+# passing work between processes, smaller ones spread it more evenly.
+batch_size = 200
+state_names = {chess_movegen.ONGOING: "ongoing",
+               chess_movegen.CHECKMATE: "checkmate",
+               chess_movegen.STALEMATE: "stalemate"}
+
+
+def final_report(report, position, start):
+    """ Fills in the final position, game state and time taken of a
+        game's report.
+        """
+    report["final_fen"] = position.to_fen()
+    report["state"] = state_names[chess_movegen.game_state(position)[1]]
+    report["time"] = time.perf_counter() - start
+    return report
+
+
+def replay_pgn_game(game):
+    """ Replays a game read by chess_pgn.read_games() with resolve=False,
+        returning its report: a dictionary of "plies" (moves played),
+        "error" (None, or the first illegal move), "final_fen", "state"
+        and "time".
+        """
+    start = time.perf_counter()
+    report = {"plies": 0, "error": None}
+    try:
+        position = Position.from_fen(game["start_fen"])
+    except (IndexError, KeyError, ValueError):
+        report.update(error=f"Bad FEN {game['start_fen']!r}",
+                      final_fen=None, state=None,
+                      time=time.perf_counter() - start)
+        return report
+    for san in game["san"]:
+        try:
+            move = chess_pgn.san_to_move(position, san)
+        except ValueError as error:
+            report["error"] = f"move {position.fullmove_number}: {error}"
+            break
+        position.make_move(move)
+        report["plies"] += 1
+    return final_report(report, position, start)
+
+
+def replay_stored_game(store, game_num):
+    """ Replays game game_num of an open chess_store.GameStore, returning
+        its report (see replay_pgn_game()).
+        """
+    start = time.perf_counter()
+    report = {"plies": 0, "error": None}
+    position = store.position(game_num)
+    for move in store.moves(game_num):
+        if move not in chess_movegen.generate_legal_moves(position):
+            report["error"] = (f"move {position.fullmove_number}: "
+                               f"Illegal move {move_name(move)}")
+            break
+        position.make_move(move)
+        report["plies"] += 1
+    return final_report(report, position, start)
+
+
+def validate_pgn_batch(games):
+    """ Worker task: replays a list of PGN games."""
+    return [replay_pgn_game(game) for game in games]
+
+
+def validate_store_batch(file_name, first_game, last_game):
+    """ Worker task: replays games first_game up to (not including)
+        last_game of a store. Each worker maps the file itself rather
+        than being sent the games.
+        """
+    with chess_store.GameStore(file_name) as store:
+        return [replay_stored_game(store, game_num)
+                for game_num in range(first_game, last_game)]
+
+
+def game_batches(directory):
+    """ Yields (file_name, first game number, worker task, task
+        arguments) for every batch of games in the records of directory,
+        in file name order. PGN files are read here one game at a time,
+        so only the batches waiting for a worker are held in memory.
+        """
+    for file_name in sorted(os.listdir(directory)):
+        path = os.path.join(directory, file_name)
+        if file_name.endswith(".pgn"):
+            batch = []
+            first_game = 0
+            for game in chess_pgn.read_pgn_file(path, resolve=False):
+                batch.append(game)
+                if len(batch) == batch_size:
+                    yield file_name, first_game, validate_pgn_batch, (batch,)
+                    first_game += len(batch)
+                    batch = []
+            if batch:
+                yield file_name, first_game, validate_pgn_batch, (batch,)
+        elif file_name.endswith(".store"):
+            with chess_store.GameStore(path) as store:
+                game_total = len(store)
+            for first_game in range(0, game_total, batch_size):
+                yield (file_name, first_game, validate_store_batch,
+                       (path, first_game,
+                        min(first_game + batch_size, game_total)))
+
+
+def validate_directory(directory, workers=None, quiet=False):
+    """ Replays every game in directory over a pool of worker processes
+        (one per core if workers is None), printing a line for each game
+        (only for games with an illegal move if quiet) and a summary.
+        Returns the number of games with an illegal move.
+        """
+    start = time.perf_counter()
+    game_total = 0
+    ply_total = 0
+    illegal_total = 0
+    worker_count = workers or os.cpu_count() or 1
+    with concurrent.futures.ProcessPoolExecutor(worker_count) as executor:
+        # Batches are handed out a few per worker ahead of the one being
+        # reported, so workers never wait and the memory used stays the
+        # same however many games there are
+        pending = collections.deque()
+        batches = game_batches(directory)
+        while True:
+            while len(pending) < 2 * worker_count:
+                batch = next(batches, None)
+                if batch is None:
+                    break
+                file_name, first_game, task, arguments = batch
+                pending.append((file_name, first_game,
+                                executor.submit(task, *arguments)))
+            if not pending:
+                break
+            file_name, first_game, future = pending.popleft()
+            for game_num, report in enumerate(future.result(), first_game):
+                game_total += 1
+                ply_total += report["plies"]
+                if report["error"]:
+                    illegal_total += 1
+                    print(f"{file_name} game {game_num + 1}: ILLEGAL "
+                          f"{report['error']} (after {report['plies']} "
+                          f"plies)")
+                elif not quiet:
+                    print(f"{file_name} game {game_num + 1}: "
+                          f"{report['plies']} plies, {report['state']}, "
+                          f"{report['time'] * 1000:.1f} ms, "
+                          f"{report['final_fen']}")
+    elapsed = time.perf_counter() - start
+    print(f"{game_total} games, {ply_total} plies, {illegal_total} with "
+          f"illegal moves, {elapsed:.3f} s with {worker_count} workers "
+          f"({ply_total / max(elapsed, 1e-9):.0f} plies/s)")
+    return illegal_total
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Replays every game in a directory of PGN files and "
+                    "game stores, reporting illegal moves.")
+    parser.add_argument("directory")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="worker processes (default: one per core)")
+    parser.add_argument("--quiet", action="store_true",
+                        help="only print games with illegal moves")
+    args = parser.parse_args(argv)
+    illegal_total = validate_directory(args.directory, args.workers,
+                                       args.quiet)
+    return 1 if illegal_total else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,88 +1,182 @@
-import chess_config as config
-
-
-def print_board(height, width, color, position, pieces):
-    """ Prints a game board with square spaces with "height" rows and
-        "width" columns.
-
-        color and position are tuples, and piece a list, that populate
-        the respective information into the squares starting from the
-        top left, filling each column from left to right, before moving
-        down to the next row.
-
-        Colors use a 1-character designation. These fill the blank area
-        within each square to help mimic the actual coloration of a game
-        board. This is purely an aesthetic choice; you could hard-code
-        " " into this argument if you don't care about the spaces
-        looking different. ex. For chess, one might use "#" for white,
-        and " " for black, assuming a dark themed IDE with light color
-        printed text.
-
-        Positions use 2-character designations containing a row and
-        column ID. These appear at the bottom right corner of each
-        square. ex. A1, B1, C1, A2, B2, C2, A3, B3, C3 for a 3x3 game
-        board.
-
-        Pieces use 3-character designations. These are be kept as a
-        dictionary so that as the board is re-printed between successive
-        turns, the dictionary can be updated to the current piece.
-        ex. For chess (from the perspective of the white-side player)
-        the leftmost white pawn could be represented by "WP1", and the
-        rightmost black rook could be "BR2".
-        """
-    # Multiplying a list by an integer n creates a new list
-    # by concatenating the original list n times.
-    #
-    # .join concatenates elements of a list, with a separator b/t each.
-    top = "┌" + "┬".join(["─"*9]*width) + "┐\n"
-    middle = "├" + "┼".join(["─"*9]*width) + "┤\n"
-    bottom = "└" + "┴".join(["─"*9]*width) + "┘"
-    print(top +
-          middle.join(
-              ("|" + "|".join([f' {" "}  {color[col + row*width]}  {" "} '
-                               for col in range(width)]) + "|\n") +
-              ("│" + "│".join(f' {color[col + row*width]} '
-                              f'{pieces[config.col[col] + config.row[row]]}'
-                              f' {color[col + row*width]} '
-                              for col in range(width)) + "│\n") +
-              ("|" + "|".join([f' {" "}  {color[col + row*width]} '
-                               f'{position[col + row*width]} '
-                               for col in range(width)]) + "|\n")
-              # range(n) gives a sequence of n elements, with values
-              # starting at 0 and ending at n-1 (effectively a list).
-              #
-              # The for loop below means each element of the range list
-              # has its value fed into the index "row". The row'th index
-              # element of the list then has its value replaced by
-              # whatever is in front of "for" (ie. the string containing
-              # the pipes "|").
-              #
-              # For height 0, an empty list is made, thus no pipe string
-              # is added to the list, creating a squashed game board.
-              #
-              # For height 1, the list [0] is made, which then becomes a
-              # single element list with a value of pipe string ["|||"].
-              # Since the list being joined only has the one pipe string
-              # element, there is no place to add "middle" as a
-              # separator, thus we get a single row game board.
-              #
-              # For height 2, the list ["|||", "|||"] is made. Now, two
-              # elements are present in the list, meaning middle.join
-              # has place for a separator and "middle" is added between
-              # the two pipe strings. This gives us a double row game
-              # board.
-              #
-              # Repeat this process for a game board of height n,
-              # noticing that there will be n-1 "middle" separators in
-              # the final game board.
-              for row in range(height)) +
-          bottom)
-
-
-if __name__ == "__main__":
-    height = 3
-    width = 3
-    color = ("B", "W", "B", "W", "B", "W", "B", "W", "B")
-    position = ("A1", "B1", "C1", "A2", "B2", "C2", "A3", "B3", "C3")
-    pieces = ["one", "two", "thr", "for", "fiv", "six", "svn", "ate", "nin"]
-    print_board(height, width, color, position, pieces)
+import chess_config as config
+
+
+def print_board(height, width, color, position, pieces):
+    """ Prints a game board with square spaces with "height" rows and
+        "width" columns.
+
+        color and position are tuples, and piece a list, that populate
+        the respective information into the squares starting from the
+        top left, filling each column from left to right, before moving
+        down to the next row.
+
+        Colors use a 1-character designation. These fill the blank area
+        within each square to help mimic the actual coloration of a game
+        board. This is purely an aesthetic choice; you could hard-code
+        " " into this argument if you don't care about the spaces
+        looking different. ex. For chess, one might use "#" for white,
+        and " " for black, assuming a dark themed IDE with light color
+        printed text.
+
+        Positions use 2-character designations containing a row and
+        column ID. These appear at the bottom right corner of each
+        square. ex. A1, B1, C1, A2, B2, C2, A3, B3, C3 for a 3x3 game
+        board.
+
+        Pieces use 3-character designations. These are be kept as a
+        dictionary so that as the board is re-printed between successive
+        turns, the dictionary can be updated to the current piece.
+        ex. For chess (from the perspective of the white-side player)
+        the leftmost white pawn could be represented by "WP1", and the
+        rightmost black rook could be "BR2".
+        """
+    print(board_renderer(height, width, color, position).render(pieces))
+
+
+# A BoardRenderer for each board layout print_board() has been given,
+# keyed by (height, width, color, position), so that printing the board
+# again only redraws the rows that changed
+renderers = {}
+
+
+def board_renderer(height, width, color, position):
+    """ Returns the BoardRenderer print_board() uses for a board layout,
+        making it the first time the layout is seen.
+        """
+    key = (height, width, tuple(color), tuple(position))
+    if key not in renderers:
+        renderers[key] = BoardRenderer(height, width, color, position)
+    return renderers[key]
+
+
+class BoardRenderer:
+    """ Draws the board print_board() prints, but works out the parts that
+        never change (the grid lines, the colors and the space IDs) once,
+        when it is made, and remembers the last pieces drawn on each
+        space. Drawing the board again only rebuilds the rows holding a
+        space whose piece changed, which on most moves is two of them.
+
+        With ansi=True, update() instead gives ANSI escape codes (which
+        most terminals understand) that move the cursor onto just the
+        spaces that changed and write the new pieces there, leaving the
+        rest of the board on the screen as it is. A move then sends a few
+        dozen characters rather than the whole board, which matters most
+        on slow serial consoles and when watching games over a network.
+        """
+
+    def __init__(self, height, width, color, position, ansi=False):
+        self.height = height
+        self.width = width
+        self.ansi = ansi
+        # Key of each space in the pieces dictionary, in drawing order
+        self.space_keys = tuple(config.col[col] + config.row[row]
+                                for row in range(height)
+                                for col in range(width))
+        # Multiplying a list by an integer n creates a new list
+        # by concatenating the original list n times.
+        #
+        # .join concatenates elements of a list, with a separator b/t each.
+        self.top = "┌" + "┬".join(["─"*9]*width) + "┐\n"
+        self.middle = "├" + "┼".join(["─"*9]*width) + "┤\n"
+        self.bottom = "└" + "┴".join(["─"*9]*width) + "┘"
+        # Each row of spaces is three lines of text: the upper and lower
+        # lines never change, and the middle line is a format string
+        # with a {} for the piece on each space. Braces in the colors are
+        # doubled so that format() leaves them alone.
+        self.upper_lines = []
+        self.piece_lines = []
+        self.lower_lines = []
+        for row in range(height):
+            row_colors = [color[col + row*width] for col in range(width)]
+            self.upper_lines.append(
+                "|" + "|".join(f"    {space_color}    "
+                               for space_color in row_colors) + "|\n")
+            format_colors = [space_color.replace("{", "{{")
+                             .replace("}", "}}")
+                             for space_color in row_colors]
+            self.piece_lines.append(
+                "│" + "│".join(f" {space_color} {{}} {space_color} "
+                               for space_color in format_colors) + "│\n")
+            self.lower_lines.append(
+                "|" + "|".join(f"    {row_colors[col]} "
+                               f"{position[col + row*width]} "
+                               for col in range(width)) + "|\n")
+        # What was last drawn: the piece label on each space, and the
+        # text of each row (None for rows render() has to rebuild)
+        self.labels = [None] * (height*width)
+        self.row_text = [None] * height
+        # Whether update() has put the whole board on the screen yet
+        self.drawn = False
+
+    def changes(self, pieces):
+        """ Returns a list of (space number, label) pairs, in drawing
+            order, for every space whose piece label differs from the
+            one last drawn there, and remembers the new labels.
+            """
+        changed = []
+        for space_num, space_key in enumerate(self.space_keys):
+            label = str(pieces[space_key])
+            if label != self.labels[space_num]:
+                self.labels[space_num] = label
+                changed.append((space_num, label))
+        return changed
+
+    def render(self, pieces):
+        """ Returns the text print_board() prints for pieces, rebuilding
+            only the rows that changed since the last call.
+            """
+        rows = {space_num // self.width
+                for space_num, label in self.changes(pieces)}
+        rows.update(row for row, text in enumerate(self.row_text)
+                    if text is None)
+        for row in rows:
+            first = row * self.width
+            self.row_text[row] = (
+                self.upper_lines[row]
+                + self.piece_lines[row].format(
+                    *self.labels[first:first + self.width])
+                + self.lower_lines[row])
+        # For height 1 there is a single row of text, so there is no
+        # place to add "middle" as a separator, giving a single row game
+        # board. For height 2, middle.join has place for one separator
+        # between the two rows, and so on: a game board of height n has
+        # n-1 "middle" separators.
+        return self.top + self.middle.join(self.row_text) + self.bottom
+
+    def update(self, pieces):
+        """ Returns the text to write to a terminal to bring the board on
+            the screen up to date with pieces. Without ansi this is the
+            whole board and a newline, as print_board() prints.
+
+            With ansi, the first update clears the screen and draws the
+            whole board at the top of it, and later ones only write the
+            spaces that changed. Each update ends with the cursor on the
+            line below the board and everything after it cleared, ready
+            for the next prompt.
+            """
+        if not self.ansi:
+            return self.render(pieces) + "\n"
+        if not self.drawn:
+            self.drawn = True
+            return "\x1b[H\x1b[2J" + self.render(pieces) + "\n"
+        # The piece on row r, column c is on line 4r + 3, starting at
+        # column 10c + 5 (both counted from 1, as the terminal does)
+        text = []
+        for space_num, label in self.changes(pieces):
+            row, col = divmod(space_num, self.width)
+            text.append(f"\x1b[{4*row + 3};{10*col + 5}H{label}")
+            # The row's text was not rebuilt, so render() has to
+            self.row_text[row] = None
+        return "".join(text) + f"\x1b[{4*self.height + 2};1H\x1b[J"
+
+
+if __name__ == "__main__":
+    height = 3
+    width = 3
+    color = ("B", "W", "B", "W", "B", "W", "B", "W", "B")
+    position = ("A1", "B1", "C1", "A2", "B2", "C2", "A3", "B3", "C3")
+    # Pieces are looked up by column and row ID, from the top left
+    pieces = dict(zip(("A8", "B8", "C8", "A7", "B7", "C7", "A6", "B6", "C6"),
+                      ("one", "two", "thr", "for", "fiv", "six", "svn", "ate",
+                       "nin")))
+    print_board(height, width, color, position, pieces)
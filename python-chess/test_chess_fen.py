@@ -0,0 +1,106 @@
+""" Tests for saving and loading games as FEN strings (chess_fen.py and
+    Game.save_game()/load_game()).
+
+    Run with: python -m pytest
+    """
+import pytest
+
+import chess
+import chess_fen
+
+
+def play_moves(game, moves):
+    for piece_choice, move_to in moves:
+        assert game.play_move(piece_choice, move_to) is None
+
+
+def save_and_reload(game, tmp_path, monkeypatch):
+    # load_game() takes anything with a "/" in it for a FEN, so the file
+    # is saved in the working directory
+    monkeypatch.chdir(tmp_path)
+    game.save_game("saved_game.fen")
+    loaded = chess.Game()
+    loaded.load_game("saved_game.fen")
+    return loaded
+
+
+def test_reload_after_pawn_moved_on_from_two_space_move(tmp_path,
+                                                        monkeypatch):
+    # The F pawn's two-space move is long past when it takes on G7, so
+    # there is no en passant capture for the H7 pawn
+    game = chess.Game()
+    play_moves(game, [("WP6", "F4"), ("BP1", "A6"), ("WP6", "F5"),
+                      ("BP1", "A5"), ("WP6", "F6"), ("BP1", "A4"),
+                      ("WP6", "G7")])
+    loaded = save_and_reload(game, tmp_path, monkeypatch)
+    assert loaded.position.to_fen() == game.position.to_fen()
+    assert loaded.position.to_fen().split()[3] == "-"
+    assert loaded.position.key == game.position.key
+    assert chess_fen.board_to_fen(game.board, game.turn_count) \
+        == game.position.to_fen()
+
+
+def test_reload_keeps_en_passant_space(tmp_path, monkeypatch):
+    game = chess.Game()
+    play_moves(game, [("WP5", "E4"), ("BP1", "A6"), ("WP5", "E5"),
+                      ("BP4", "D5")])
+    loaded = save_and_reload(game, tmp_path, monkeypatch)
+    assert loaded.position.to_fen() == game.position.to_fen()
+    assert loaded.position.to_fen().split()[3] == "d6"
+    assert loaded.position.key == game.position.key
+
+
+@pytest.mark.parametrize("fen", [
+    # Black's king is in check with white to move
+    "4k3/8/8/8/8/8/8/4R1K1 w - - 0 1",
+    # Pawns on the last and first rows
+    "P3k3/8/8/8/8/8/8/6K1 w - - 0 1",
+    "4k3/8/8/8/8/8/8/p5K1 b - - 0 1",
+    # No black pawn on G5 to take en passant
+    "4k3/8/8/7P/8/8/8/6K1 w - g6 0 1",
+    # Two white kings
+    "4k3/8/8/8/8/8/8/6KK w - - 0 1",
+    # Castling rights with no rook on H1, and with the king off E8
+    "4k3/8/8/8/8/8/R7/4K3 w K - 0 1",
+    "3k3r/8/8/8/8/8/8/4K3 w k - 0 1",
+    # Too few rows, and a row of nine spaces
+    "4k3/8/8/4K3 w - - 0 1",
+    "4k3/8/8/8/8/8/8/4K4 w - - 0 1",
+    # Not "w" or "b" to move
+    "4k3/8/8/8/8/8/8/4K3 x - - 0 1",
+    # Castling letters out of order, and an en passant space off the board
+    "r3k3/8/8/8/8/8/8/4K2R w kK - 0 1",
+    "4k3/8/8/8/8/8/8/4K3 w - j3 0 1",
+    # Negative, non-numeric and missing move counters
+    "4k3/8/8/8/8/8/8/4K3 w - - -1 1",
+    "4k3/8/8/8/8/8/8/4K3 w - - 0 x",
+    "4k3/8/8/8/8/8/8/4K3 w - - 0 0",
+    "4k3/8/8/8/8/8/8/4K3 w - - 0",
+])
+def test_illegal_positions_are_refused(fen):
+    with pytest.raises(ValueError):
+        chess_fen.fen_to_board(fen)
+
+
+def test_search_refuses_castling_without_rook(tmp_path, monkeypatch):
+    # Keeps the computer player off any opening book or tablebases in
+    # the working directory
+    monkeypatch.chdir(tmp_path)
+    with pytest.raises(ValueError):
+        chess.Game(fen="4k3/8/8/8/8/8/R7/4K3 w K - 0 1")
+    game = chess.Game(fen="4k3/8/8/8/8/8/8/4K2R w K - 0 1")
+    player = game.current_player()
+    player.time_budget = 0.2
+    game.computer_move(player)
+    assert game.position.turn == 1
+
+
+def test_legal_positions_are_read():
+    for fen in ("4k3/8/8/8/8/8/8/4R1K1 b - - 0 1",
+                "r3k2r/8/8/8/8/8/8/4K3 w kq - 0 1",
+                "4k3/8/8/8/8/8/8/4K3 w - -",
+                "4k3/8/8/5Pp1/8/8/8/6K1 w - g6 0 1",
+                "4k3/8/8/8/5pP1/8/8/6K1 b - g3 0 1"):
+        position = chess_fen.fen_to_board(fen)["position"]
+        # The move counters default to 0 and 1 if left out
+        assert position.to_fen().startswith(fen)
@@ -0,0 +1,60 @@
+""" Tests for the line protocol of chess_server.py.
+
+    Run with: python -m pytest
+    """
+import asyncio
+
+import chess
+import chess_server
+from chess_position import start_fen
+
+
+async def send_commands(commands):
+    """ Sends each command to a local server on one connection, returning
+        the greeting and the reply to each command.
+        """
+    listener = await chess_server.GameServer().start()
+    host, port = listener.sockets[0].getsockname()[:2]
+    reader, writer = await asyncio.open_connection(host, port)
+    replies = [(await reader.readline()).decode().strip()]
+    for command in commands:
+        writer.write(command.encode() + b"\n")
+        replies.append((await reader.readline()).decode().strip())
+    writer.write(b"QUIT\n")
+    await writer.drain()
+    writer.close()
+    listener.close()
+    await listener.wait_closed()
+    return replies
+
+
+def test_new_refuses_side_not_to_move_in_check():
+    greeting, new_reply, move_reply, board_reply = asyncio.run(
+        send_commands(["NEW 4k3/8/8/8/8/8/8/4R1K1 w - - 0 1",
+                       "MOVE E1 E8", "BOARD"]))
+    assert greeting == f"OK {start_fen}"
+    assert new_reply.startswith("ERROR")
+    # The game in progress is kept, where E1 to E8 is no move at all
+    assert move_reply.startswith("ERROR")
+    assert board_reply == f"OK {start_fen}"
+
+
+def test_new_refuses_illegal_positions():
+    server = chess_server.GameServer()
+    game = chess.Game()
+    for fen in ("4k3/8/8/8/8/8/8/4R1K1 w - - 0 1",
+                "P3k3/8/8/8/8/8/8/6K1 w - - 0 1",
+                "4k3/8/8/7P/8/8/8/6K1 w - g6 0 1",
+                "8/8/8/8/8/8/8/6K1 w - - 0 1",
+                "not a fen"):
+        same_game, reply = server.answer(game, f"NEW {fen}")
+        assert same_game is game
+        assert reply.startswith("ERROR")
+
+
+def test_new_accepts_legal_position():
+    server = chess_server.GameServer()
+    fen = "4k3/8/8/8/8/8/8/4R1K1 b - - 0 1"
+    game, reply = server.answer(chess.Game(), f"NEW {fen}")
+    assert reply == f"OK {fen}"
+    assert game.position.to_fen() == fen